@@ -0,0 +1,281 @@
+""" Benchmarks for testGeneratorScript.py.
+
+Synthesizes quiz configurations in the format save_config writes, renders them
+and reports render time, peak memory, output size and configuration load time
+as JSON. Each scenario runs in its own process so peak memory is per scenario.
+Any metric that got worse than the baseline by more than --max-regression
+percent fails the run, and so does a missing baseline. The baseline depends
+on the machine, so it is not kept in the repository; save one first.
+
+    python benchmark.py --save-baseline         # store the results as the baseline
+    python benchmark.py                         # run and compare with the baseline
+    python benchmark.py -o results.json         # also write the results to a file
+    python benchmark.py --max-regression 15     # allow at most 15% per metric
+"""
+import json
+import base64
+import os
+import sys
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+
+# cards, questions, answers per question, distinct audio files and their size
+SCENARIOS = [
+    {'name': 'small', 'cards': 10, 'questions': 10, 'answers': 3, 'audio_files': 10, 'audio_kb': 60},
+    {'name': 'many_questions', 'cards': 20, 'questions': 2000, 'answers': 4, 'audio_files': 20, 'audio_kb': 30},
+    {'name': 'many_cards', 'cards': 1000, 'questions': 50, 'answers': 3, 'audio_files': 250, 'audio_kb': 30},
+    {'name': 'large_audio', 'cards': 6, 'questions': 5, 'answers': 2, 'audio_files': 6, 'audio_kb': 20 * 1024},
+]
+
+# Differences below these are noise, whatever their percentage
+ABSOLUTE_SLACK = {'seconds': 0.01, 'bytes': 256 * 1024}
+
+def write_random_file(path, size):
+    with open(path, 'wb') as f:
+        while size > 0:
+            chunk = os.urandom(min(size, 1024 * 1024))
+            f.write(chunk)
+            size -= len(chunk)
+
+def synthesize_config(scenario, directory):
+    """ Write a scenario's audio files and config into directory; returns the config path """
+    audio_paths = []
+    for i in range(scenario['audio_files']):
+        audio_path = os.path.join(directory, f"clip{i}.mp3")
+        write_random_file(audio_path, scenario['audio_kb'] * 1024)
+        audio_paths.append(audio_path)
+
+    config = {
+        'animals': [
+            {
+                'image_url': f"https://example.com/images/card{i}.png",
+                'title': f"Card {i} (بطاقة {i})",
+                'word': f"كلمة {i}",
+                'audio': audio_paths[i % len(audio_paths)]
+            }
+            for i in range(scenario['cards'])
+        ],
+        'questions': [
+            {
+                'image_url': f"https://example.com/images/question{i}.png" if i % 2 else "",
+                'text': f"Question {i}? سؤال {i}",
+                'answers': [f"Answer {j} إجابة" for j in range(scenario['answers'])],
+                'correct_index': i % scenario['answers']
+            }
+            for i in range(scenario['questions'])
+        ],
+        'animals_per_row': 3,
+        'output_file': os.path.join(directory, "game.html"),
+        'output_mode': 'single',
+        'localize_images': False
+    }
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return config_path
+
+def best_time(function, repeat):
+    """ Shortest of repeat runs of function(), in seconds """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def measure_gui_load(generator, config_path, repeat):
+    """ Seconds to load the config into the editor, or None without a usable display """
+    try:
+        generator.load_tk()
+        root = generator.tk.Tk()
+    except Exception:
+        return None
+    try:
+        root.withdraw()
+        app = generator.AnimalLearningGameGenerator(root)
+        root.update()
+
+        def load():
+            # The editor's own load path, as used by "Load Configuration"
+            app.open_config(config_path)
+            root.update()
+            # Tabs are built when first shown, so show the Questions tab as well
+            app.notebook.select(app.questions_frame)
+            app.on_tab_changed()
+            root.update()
+            app.notebook.select(app.animals_frame)
+        return best_time(load, repeat)
+    finally:
+        root.destroy()
+
+def run_scenario(config_path, repeat, measure_gui):
+    """ Measure one synthesized config; runs in the scenario's own process """
+    directory = os.path.dirname(config_path)
+    # Keep the caches away from the user's own
+    os.environ['TESTSGENERATOR_CACHE_DIR'] = os.path.join(directory, "cache")
+    sys.path.insert(0, SCRIPT_DIR)
+    import testGeneratorScript as generator
+
+    success_audio_path = os.path.join(directory, "success.mp3")
+    write_random_file(success_audio_path, 30 * 1024)
+    with open(success_audio_path, 'rb') as f:
+        success_audio = base64.b64encode(f.read()).decode('ascii')
+
+    def load_quiz():
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return generator.Quiz.from_config(json.load(f))
+
+    quiz = load_quiz()
+    output_file = os.path.join(directory, "game.html")
+    results = {'load_seconds': best_time(load_quiz, repeat)}
+
+    # Every clip encoded from scratch
+    results['render_seconds'] = best_time(lambda: generator.generate(quiz, output_file, success_audio), repeat)
+    results['output_bytes'] = os.path.getsize(output_file)
+
+    # Clips read from a warm audio cache
+    audio_cache = generator.AudioCache()
+    generator.generate(quiz, output_file, success_audio, audio_cache)
+    results['render_cached_seconds'] = best_time(lambda: generator.generate(quiz, output_file, success_audio, audio_cache), repeat)
+
+    # One card edited between builds that share a fragment cache
+    fragment_cache = generator.FragmentCache()
+    generator.generate(quiz, output_file, success_audio, audio_cache, fragment_cache=fragment_cache)
+    def rebuild():
+        quiz.cards[0].title += "!"
+        generator.generate(quiz, output_file, success_audio, audio_cache, fragment_cache=fragment_cache)
+    results['rebuild_seconds'] = best_time(rebuild, repeat)
+
+    tracemalloc.start()
+    generator.generate(quiz, output_file, success_audio)
+    results['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    results['gui_load_seconds'] = measure_gui_load(generator, config_path, repeat) if measure_gui else None
+    results['peak_rss_bytes'] = peak_rss_bytes()
+    return results
+
+def start_virtual_display():
+    """ Start Xvfb when there is no display but Xvfb is installed; returns (process, env) """
+    if sys.platform in ("win32", "darwin") or os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None, os.environ.copy()
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(["Xvfb", display, "-nolisten", "tcp"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Give the server a moment to accept connections
+    time.sleep(1)
+    return process, dict(os.environ, DISPLAY=display)
+
+def run_benchmarks(scenarios, repeat, measure_gui):
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'scenarios': {}
+    }
+    display_process, env = start_virtual_display() if measure_gui else (None, os.environ.copy())
+    try:
+        for scenario in scenarios:
+            with tempfile.TemporaryDirectory() as directory:
+                config_path = synthesize_config(scenario, directory)
+                command = [sys.executable, os.path.abspath(__file__), "--scenario-config", config_path, "--repeat", str(repeat)]
+                if measure_gui:
+                    command.append("--gui")
+                child = subprocess.run(command, env=env, capture_output=True, text=True)
+            if child.returncode != 0:
+                raise RuntimeError(f"Scenario {scenario['name']} failed:\n{child.stderr}")
+            metrics = json.loads(child.stdout)
+            results['scenarios'][scenario['name']] = dict(scenario, **metrics)
+            print(f"{scenario['name']}: " + ", ".join(f"{name} {format_metric(name, value)}" for name, value in metrics.items()), file=sys.stderr)
+    finally:
+        if display_process is not None:
+            display_process.terminate()
+    return results
+
+def format_metric(name, value):
+    if value is None:
+        return "n/a"
+    if name.endswith('_seconds'):
+        return f"{value * 1000:.1f} ms"
+    return f"{value / (1024 * 1024):.2f} MB"
+
+def compare(results, baseline, max_regression):
+    """ Regressions of results against baseline, as printable lines """
+    regressions = []
+    for name, metrics in results['scenarios'].items():
+        base_metrics = baseline.get('scenarios', {}).get(name)
+        if base_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            base_value = base_metrics.get(metric)
+            if not metric.endswith(('_seconds', '_bytes')) or value is None or not base_value:
+                continue
+            slack = ABSOLUTE_SLACK['seconds'] if metric.endswith('_seconds') else ABSOLUTE_SLACK['bytes']
+            change = (value - base_value) / base_value * 100
+            if change > max_regression and value - base_value > slack:
+                regressions.append(f"{name} {metric}: {format_metric(metric, base_value)} -> {format_metric(metric, value)} (+{change:.0f}%)")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quiz generation on synthetic configurations.")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare with (default: benchmark_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline instead of comparing")
+    parser.add_argument("--max-regression", type=float, default=20.0, metavar="PERCENT", help="allowed slowdown or growth per metric (default: 20)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timing; the fastest counts (default: 5)")
+    parser.add_argument("--scenario", action="append", choices=[scenario['name'] for scenario in SCENARIOS], help="run only this scenario (repeatable)")
+    parser.add_argument("--gui", action="store_true", help="also time loading into the editor (needs a display or Xvfb)")
+    # Used by the per-scenario child processes
+    parser.add_argument("--scenario-config", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.scenario_config:
+        print(json.dumps(run_scenario(args.scenario_config, args.repeat, args.gui)))
+        return 0
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario['name'] in args.scenario]
+    results = run_benchmarks(scenarios, args.repeat, args.gui)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one", file=sys.stderr)
+        return 2
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.max_regression)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if regressions:
+        return 1
+    print(f"No regressions above {args.max_regression:g}% against {args.baseline}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
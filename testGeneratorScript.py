@@ -1,12 +1,44 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+import time
+# Startup is timed from here for --startup-report
+STARTUP_TIME = time.perf_counter()
+
 import json
 import base64
 import sys
 import os
-import urllib.request
+import io
+import shutil
+import hashlib
+import html
+import tempfile
+import glob
+import argparse
+import re
+import random
+import zlib
+import struct
+import bisect
+import urllib.parse
+import mimetypes
+import threading
+import queue
 from pathlib import Path
 
+# Modules only some sessions need (http.client and email.utils for image
+# downloads, concurrent.futures for worker pools, gzip for precompressed
+# copies, csv for bank imports) are imported where they are used, to keep
+# startup short
+
+# tkinter is imported by load_tk() only when the GUI starts, so headless
+# builds (and their worker processes) never load it
+tk = ttk = filedialog = messagebox = None
+
+def load_tk():
+    """ Import tkinter into the module globals for the GUI """
+    global tk, ttk, filedialog, messagebox
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
     try:
@@ -17,535 +49,104 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-class AnimalLearningGameGenerator:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Learning Game Generator")
-        self.root.geometry("900x700")
-        
-        # Data storage
-        self.animals = []
-        self.questions = []
-        self.animals_per_row = 3
-        
-        # Create notebook for sections
-        self.notebook = ttk.Notebook(root)
-        self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        # Animals frame
-        self.animals_frame = ttk.Frame(self.notebook, padding=10)
-        self.notebook.add(self.animals_frame, text="Cards")
-        
-        # Questions frame
-        self.questions_frame = ttk.Frame(self.notebook, padding=10)
-        self.notebook.add(self.questions_frame, text="Questions")
-        
-        # Settings frame
-        self.settings_frame = ttk.Frame(self.notebook, padding=10)
-        self.notebook.add(self.settings_frame, text="Settings")
+class Card:
+    """ One picture card: image, title, word to speak and audio file """
+    __slots__ = ('image_url', 'title', 'word', 'audio')
 
-        # successAudio
-        self.successAudioEncodedString=""
-        try:
-            success_audio_path = resource_path("successAudio.mp3")
-            with open(success_audio_path, "rb") as success_audio_file:
-                self.successAudioEncodedString = base64.b64encode(success_audio_file.read()).decode("utf-8")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load success audio: {str(e)}")
-        
-        self.setup_animals_section()
-        self.setup_questions_section()
-        self.setup_settings_section()
-        self.setup_menu()
-        self.setup_context_menus()
+    def __init__(self, image_url='', title='', word='', audio=''):
+        self.image_url = image_url
+        self.title = title
+        self.word = word
+        self.audio = audio
 
-    def setup_context_menus(self):
-        # Create a context menu
-        self.context_menu = tk.Menu(self.root, tearoff=0)
-        self.context_menu.add_command(label="Cut", command=lambda: self.cut_text())
-        self.context_menu.add_command(label="Copy", command=lambda: self.copy_text())
-        self.context_menu.add_command(label="Paste", command=lambda: self.paste_text())
-        
-        # Bind right-click event to all entry widgets
-        self.root.bind_class("TEntry", "<Button-3>", self.show_context_menu)
-        
-    def show_context_menu(self, event):
-        # Store the widget that was right-clicked
-        self.focused_widget = event.widget
-        # Show the context menu at the cursor position
-        self.context_menu.post(event.x_root, event.y_root)
-        
-    def cut_text(self):
-        if hasattr(self, 'focused_widget') and isinstance(self.focused_widget, tk.Entry):
-            self.focused_widget.event_generate("<<Cut>>")
-            
-    def copy_text(self):
-        if hasattr(self, 'focused_widget') and isinstance(self.focused_widget, tk.Entry):
-            self.focused_widget.event_generate("<<Copy>>")
-            
-    def paste_text(self):
-        if hasattr(self, 'focused_widget') and isinstance(self.focused_widget, tk.Entry):
-            self.focused_widget.event_generate("<<Paste>>")
-        
-    def setup_menu(self):
-        menubar = tk.Menu(self.root)
-        file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label="New", command=self.new_config)
-        file_menu.add_command(label="Load", command=self.load_config)
-        file_menu.add_command(label="Save", command=self.save_config)
-        file_menu.add_separator()
-        file_menu.add_command(label="Generate HTML", command=self.generate_html)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
-        menubar.add_cascade(label="File", menu=file_menu)
-        self.root.config(menu=menubar)
-        
-    def setup_animals_section(self):
-        # Animals per row setting
-        ttk.Label(self.animals_frame, text="Cards per row:").grid(row=0, column=0, sticky='w', pady=5)
-        self.animals_per_row_var = tk.StringVar(value="3")
-        animals_per_row_spinbox = ttk.Spinbox(self.animals_frame, from_=1, to=6, textvariable=self.animals_per_row_var, width=5)
-        animals_per_row_spinbox.grid(row=0, column=1, sticky='w', pady=5)
-        
-        # Add animal button
-        ttk.Button(self.animals_frame, text="Add Card", command=self.add_animal_frame).grid(row=0, column=2, pady=5, padx=5)
-        
-        #  # Create a frame for the canvas and scrollbar
-        container = ttk.Frame(self.animals_frame)
-        container.grid(row=1, column=0, columnspan=3, sticky='nsew', pady=10)
-        
-        # Create a canvas and scrollbar
-        canvas = tk.Canvas(container)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        self.animals_container = ttk.Frame(canvas)
-        
-        # Configure the canvas
-        self.animals_container.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        # Create a window in the canvas for the animals container
-        canvas.create_window((0, 0), window=self.animals_container, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack the canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Configure grid weights
-        self.animals_frame.columnconfigure(0, weight=1)
-        self.animals_frame.rowconfigure(1, weight=1)
-        
-        # Add initial animal frame
-        self.add_animal_frame()
-        
-    def add_animal_frame(self):
-        frame = ttk.Frame(self.animals_container, relief='groove', borderwidth=1)
-        frame.pack(fill='x', pady=5, padx=5)
-        
-        # Image URL
-        ttk.Label(frame, text="Image URL:").grid(row=0, column=0, sticky='w', pady=2)
-        image_url_entry = ttk.Entry(frame, width=40)
-        image_url_entry.grid(row=0, column=1, pady=2, padx=5)
-        
-        # Title
-        ttk.Label(frame, text="Title (e.g., 'Cat (قطة)'):").grid(row=1, column=0, sticky='w', pady=2)
-        title_entry = ttk.Entry(frame, width=40)
-        title_entry.grid(row=1, column=1, pady=2, padx=5)
-        
-        # Word to speak
-        ttk.Label(frame, text="Word to speak (Arabic):").grid(row=2, column=0, sticky='w', pady=2)
-        word_entry = ttk.Entry(frame, width=40)
-        word_entry.grid(row=2, column=1, pady=2, padx=5)
-        
-        # Audio file
-        ttk.Label(frame, text="Audio file:").grid(row=3, column=0, sticky='w', pady=2)
-        audio_frame = ttk.Frame(frame)
-        audio_frame.grid(row=3, column=1, sticky='we', pady=2)
-        audio_entry = ttk.Entry(audio_frame, width=35)
-        audio_entry.pack(side='left', fill='x', expand=True)
-        ttk.Button(audio_frame, text="Browse", command=lambda: self.browse_audio(audio_entry)).pack(side='right', padx=5)
-        
-        # Remove button
-        ttk.Button(frame, text="Remove", command=lambda: self.remove_animal_frame(frame)).grid(row=4, column=1, sticky='e', pady=5)
-        
-        # Store references
-        frame.image_url = image_url_entry
-        frame.title = title_entry
-        frame.word = word_entry
-        frame.audio = audio_entry
-        
-        self.animals.append(frame)
-        
-    def remove_animal_frame(self, frame):
-        frame.destroy()
-        self.animals.remove(frame)
-        
-    def browse_audio(self, audio_entry):
-        filename = filedialog.askopenfilename(
-            title="Select Audio File",
-            filetypes=[("Audio files", "*.mp3 *.wav *.ogg *.OPUS"), ("All files", "*.*")]
-        )
-        if filename:
-            audio_entry.delete(0, tk.END)
-            audio_entry.insert(0, filename)
-            
-    def setup_questions_section(self):
-        # Add question button
-        ttk.Button(self.questions_frame, text="Add Question", command=self.add_question_frame).pack(pady=5)
-        
-        # Create a frame for the canvas and scrollbar
-        container = ttk.Frame(self.questions_frame)
-        container.pack(fill='both', expand=True, pady=10)
-        
-        # Create a canvas and scrollbar
-        canvas = tk.Canvas(container)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        self.questions_container = ttk.Frame(canvas)
-        
-        # Configure the canvas
-        self.questions_container.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        # Create a window in the canvas for the questions container
-        canvas.create_window((0, 0), window=self.questions_container, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack the canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Add initial question frame
-        self.add_question_frame()
-        
-    def add_question_frame(self):
-        frame = ttk.Frame(self.questions_container, relief='groove', borderwidth=1)
-        frame.pack(fill='x', pady=5, padx=5)
-        
-        # Question image URL
-        ttk.Label(frame, text="Question Image URL (optional):").grid(row=0, column=0, sticky='w', pady=2)
-        image_url_entry = ttk.Entry(frame, width=50)
-        image_url_entry.grid(row=0, column=1, columnspan=2, sticky='we', pady=2, padx=5)
-        
-        # Question text (moved to row 1)
-        ttk.Label(frame, text="Question Text:").grid(row=1, column=0, sticky='w', pady=2)
-        question_text_entry = ttk.Entry(frame, width=50)
-        question_text_entry.grid(row=1, column=1, columnspan=2, sticky='we', pady=2, padx=5)
-        
-        # Answers frame (moved to row 2)
-        answers_frame = ttk.LabelFrame(frame, text="Answers")
-        answers_frame.grid(row=2, column=0, columnspan=3, sticky='we', pady=5, padx=5)
-        
-        # Correct answer variable
-        correct_answer_var = tk.StringVar()
-        
-        # Store answer entries and radio buttons
-        answer_entries = []
-        radio_buttons = []
-        
-        # Function to add answer
-        def add_answer_row():
-            row = len(answer_entries)
-            # Radio button for correct answer
-            rb = ttk.Radiobutton(answers_frame, variable=correct_answer_var, value=str(row))
-            rb.grid(row=row, column=0, padx=5)
-            # Answer entry
-            entry = ttk.Entry(answers_frame, width=40)
-            entry.grid(row=row, column=1, pady=2, padx=5, sticky='we')
-            
-            # Create the remove button first
-            btn = ttk.Button(answers_frame, text="Remove")
-            btn.grid(row=row, column=2, padx=5)
-            
-            # Now configure the command with the button reference
-            btn.configure(command=lambda: remove_answer_row(rb, entry, btn))
-            
-            answer_entries.append(entry)
-            radio_buttons.append(rb)
-            
-        def remove_answer_row(rb, entry, btn):
-            idx = answer_entries.index(entry)
-            answer_entries.remove(entry)
-            radio_buttons.remove(rb)
-            rb.destroy()
-            entry.destroy()
-            btn.destroy()
-            # Update radio button values
-            for i, rb in enumerate(radio_buttons):
-                rb.config(value=str(i))
-            # Update correct answer if needed
-            if correct_answer_var.get() == str(idx):
-                correct_answer_var.set("")
-                
-        # Add answer button
-        add_answer_btn = ttk.Button(answers_frame, text="Add Answer", command=add_answer_row)
-        add_answer_btn.grid(row=0, column=2, padx=5)
-        
-        # Add initial answers
-        for _ in range(2):
-            add_answer_row()
-            
-        # Remove question button
-        ttk.Button(frame, text="Remove Question", command=lambda: self.remove_question_frame(frame)).grid(row=4, column=2, sticky='e', pady=5)
-        ttk.Button(frame, text="Add Answer", command=lambda: add_answer_row()).grid(row=4, column=3, sticky='e', pady=5)
-        
-        # Configure grid weights
-        frame.columnconfigure(1, weight=1)
-        answers_frame.columnconfigure(1, weight=1)
-        
-        # Store references
-        frame.image_url = image_url_entry
-        frame.question_text = question_text_entry
-        frame.answer_entries = answer_entries
-        frame.radio_buttons = radio_buttons
-        frame.correct_answer_var = correct_answer_var
-        frame.add_answer_row = add_answer_row
-        frame.remove_answer_row = remove_answer_row
-        
-        self.questions.append(frame)
-        
-    def remove_question_frame(self, frame):
-        frame.destroy()
-        self.questions.remove(frame)
-        
-    def setup_settings_section(self):
-        # Output file settings
-        ttk.Label(self.settings_frame, text="Output File:").grid(row=0, column=0, sticky='w', pady=5)
-        self.output_file_var = tk.StringVar(value="animal_game.html")
-        output_entry = ttk.Entry(self.settings_frame, textvariable=self.output_file_var, width=40)
-        output_entry.grid(row=0, column=1, pady=5, padx=5, sticky='we')
-        ttk.Button(self.settings_frame, text="Browse", command=self.browse_output).grid(row=0, column=2, pady=5, padx=5)
-        
-        # Configure grid weights
-        self.settings_frame.columnconfigure(1, weight=1)
-        
-    def browse_output(self):
-        filename = filedialog.asksaveasfilename(
-            title="Save HTML File",
-            defaultextension=".html",
-            filetypes=[("HTML files", "*.html"), ("All files", "*.*")]
-        )
-        if filename:
-            self.output_file_var.set(filename)
-            
-    def new_config(self):
-        # Clear all data
-        for animal in self.animals:
-            animal.destroy()
-        self.animals = []
-        
-        for question in self.questions:
-            question.destroy()
-        self.questions = []
-        
-        # Reset settings
-        self.animals_per_row_var.set("3")
-        self.output_file_var.set("animal_game.html")
-        
-        # Add default frames
-        self.add_animal_frame()
-        self.add_question_frame()
-        
-    def load_config(self):
-        filename = filedialog.askopenfilename(
-            title="Load Configuration",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-        )
-        if not filename:
-            return
-            
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                
-            # Clear current data
-            self.new_config()
-            
-            # Load animals
-            for animal_data in config.get('animals', []):
-                self.add_animal_frame()
-                animal_frame = self.animals[-1]
-                animal_frame.image_url.insert(0, animal_data.get('image_url', ''))
-                animal_frame.title.insert(0, animal_data.get('title', ''))
-                animal_frame.word.insert(0, animal_data.get('word', ''))
-                animal_frame.audio.insert(0, animal_data.get('audio', ''))
-                
-            # Load questions
-            for question_data in config.get('questions', []):
-                self.add_question_frame()
-                question_frame = self.questions[-1]
-                question_frame.image_url.insert(0, question_data.get('image_url', '')) 
-                question_frame.question_text.insert(0, question_data.get('text', ''))
-                
-                # Clear default answers
-                for entry in question_frame.answer_entries[:]:
-                    question_frame.remove_answer_row(
-                        question_frame.radio_buttons[question_frame.answer_entries.index(entry)],
-                        entry,
-                        None  # Button reference not stored, but it's OK for initial load
-                    )
-                
-                # Add answers from config
-                answers = question_data.get('answers', [])
-                correct_index = question_data.get('correct_index', 0)
-                
-                for i, answer in enumerate(answers):
-                    question_frame.add_answer_row()
-                    question_frame.answer_entries[-1].insert(0, answer)
-                    
-                # Set correct answer
-                if answers and 0 <= correct_index < len(answers):
-                    question_frame.correct_answer_var.set(str(correct_index))
-                    
-            # Load settings
-            self.animals_per_row_var.set(str(config.get('animals_per_row', 3)))
-            self.output_file_var.set(config.get('output_file', 'animal_game.html'))
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
-            
-    def save_config(self):
-        filename = filedialog.asksaveasfilename(
-            title="Save Configuration",
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+    @classmethod
+    def from_config(cls, data):
+        return cls(data.get('image_url', ''), data.get('title', ''), data.get('word', ''), data.get('audio', ''))
+
+    def to_config(self):
+        return {'image_url': self.image_url, 'title': self.title, 'word': self.word, 'audio': self.audio}
+
+class Question:
+    """ One multiple choice question; correct_index is None until an answer is marked """
+    __slots__ = ('image_url', 'text', 'answers', 'correct_index')
+
+    def __init__(self, image_url='', text='', answers=None, correct_index=None):
+        self.image_url = image_url
+        self.text = text
+        # New questions start with two empty answers
+        self.answers = ['', ''] if answers is None else answers
+        self.correct_index = correct_index
+
+    @classmethod
+    def from_config(cls, data):
+        answers = list(data.get('answers', []))
+        correct_index = data.get('correct_index', 0)
+        if not (isinstance(correct_index, int) and 0 <= correct_index < len(answers)):
+            correct_index = None
+        return cls(data.get('image_url', ''), data.get('text', ''), answers, correct_index)
+
+    def answer_index(self):
+        """ Correct answer index as written to the page, 0 when unset """
+        return self.correct_index if self.correct_index is not None else 0
+
+    def to_config(self):
+        return {'image_url': self.image_url, 'text': self.text, 'answers': list(self.answers), 'correct_index': self.answer_index()}
+
+class Quiz:
+    """ Cards, questions and settings of one game, independent of the editor widgets """
+    __slots__ = ('cards', 'questions', 'animals_per_row', 'output_file', 'output_mode', 'localize_images', 'write_report', 'precompress', 'template', 'lazy_page', 'data_page', 'offline')
+
+    # Settings and their defaults, in the order they are saved
+    SETTINGS = {
+        'animals_per_row': 3,
+        'output_file': 'animal_game.html',
+        'output_mode': 'single',
+        'localize_images': False,
+        'write_report': False,
+        'precompress': False,
+        'template': "",
+        'lazy_page': False,
+        'data_page': False,
+        'offline': False,
+    }
+
+    def __init__(self, cards=None, questions=None, **settings):
+        self.cards = [] if cards is None else cards
+        self.questions = [] if questions is None else questions
+        for name, default in self.SETTINGS.items():
+            setattr(self, name, settings.pop(name, default))
+        if settings:
+            raise TypeError(f"Unknown quiz setting(s): {', '.join(settings)}")
+
+    @classmethod
+    def from_config(cls, config):
+        """ Quiz from a configuration as written by save_config """
+        quiz = cls(
+            [Card.from_config(animal_data) for animal_data in config.get('animals', [])],
+            [Question.from_config(question_data) for question_data in config.get('questions', [])],
+            **{name: config[name] for name in cls.SETTINGS if name in config}
         )
-        if not filename:
-            return
-            
-        try:
-            # Prepare animals data
-            animals_data = []
-            for animal in self.animals:
-                animals_data.append({
-                    'image_url': animal.image_url.get(),
-                    'title': animal.title.get(),
-                    'word': animal.word.get(),
-                    'audio': animal.audio.get()
-                })
-                
-            # Prepare questions data
-            questions_data = []
-            for question in self.questions:
-                answers = [entry.get() for entry in question.answer_entries]
-                correct_index = int(question.correct_answer_var.get()) if question.correct_answer_var.get() else 0
-                
-                questions_data.append({
-                    'text': question.question_text.get(),
-                    'answers': answers,
-                    'correct_index': correct_index
-                })
-                
-            # Prepare config
-            config = {
-                'animals': animals_data,
-                'questions': questions_data,
-                'animals_per_row': int(self.animals_per_row_var.get()),
-                'output_file': self.output_file_var.get()
-            }
-            
-            # Save to file
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
-                
-            messagebox.showinfo("Success", "Configuration saved successfully!")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
-            
-    def generate_html(self):
-        try:
-            # Prepare animals HTML
-            animals_html = ""
-            animals_per_row = int(self.animals_per_row_var.get())
-            
-            for i, animal in enumerate(self.animals):
-                if i % animals_per_row == 0:
-                    if i > 0:
-                        animals_html += "</div>\n"
-                    animals_html += "<div class=\"animals-container\">\n"
-                
-                # Encode audio file to base64
-                audio_data = ""
-                audio_path = animal.audio.get()
-                if audio_path and os.path.exists(audio_path):
-                    with open(audio_path, 'rb') as audio_file:
-                        audio_data = base64.b64encode(audio_file.read()).decode('utf-8')
-                
-                # Get file extension for MIME type
-                audio_ext = os.path.splitext(audio_path)[1].lower() if audio_path else ""
-                mime_type = f"audio/{audio_ext[1:]}" if audio_ext else "audio/mpeg"
-                
-                animals_html += f"""
-                <div class="animal-card">
-                    <img src="{animal.image_url.get()}" alt="{animal.word.get()}" onclick="playAudio('audio_{i}')">
-                    <div class="animal-name">{animal.title.get()}</div>
-                    <button class="repeat-btn" onclick="playAudio('audio_{i}')">🔊 Repeat</button>
-                    <audio id="audio_{i}">
-                        <source src="data:{mime_type};base64,{audio_data}" type="{mime_type}">
-                    </audio>
-                </div>
-                """
-            
-            if self.animals:
-                animals_html += "</div>\n"
-                
-            # Prepare questions HTML
-            questions_html = ""
-            for i, question in enumerate(self.questions):
-                question_text = question.question_text.get()
-                image_url = question.image_url.get()
-                answers = [entry.get() for entry in question.answer_entries]
-                correct_index = int(question.correct_answer_var.get()) if question.correct_answer_var.get() else 0
-
-                # Add image if provided
-                image_html = ""
-                if image_url:
-                    image_html = f'<img src="{image_url}" alt="Question image" style="max-width: 300px; margin-bottom: 15px; border-radius: 15px;">'
-                
-                answers_html = ""
-                for j, answer in enumerate(answers):
-                    answers_html += f'<div class="answer" onclick="checkAnswer({i+1}, {j})">{answer}</div>\n'
-                
-                questions_html += f"""
-                <div class="question" id="q{i+1}">
-                    {image_html}
-                    <div class="question-text">{question_text}</div>
-                    <div class="answers-container">
-                        {answers_html}
-                    </div>
-                    <div class="feedback" id="feedback{i+1}"></div>
-                </div>
-                """
-                
-            # Prepare correct answers JavaScript
-            correct_answers_js = "const correctAnswers = {\n"
-            for i, question in enumerate(self.questions):
-                correct_index = int(question.correct_answer_var.get()) if question.correct_answer_var.get() else 0
-                correct_answers_js += f"    {i+1}: {correct_index},\n"
-            correct_answers_js += "};\n"
-            
-            # Prepare correct answer text for audio
-            correct_answer_text_js = "const correctAnswerText = {\n"
-            for i, question in enumerate(self.questions):
-                answers = [entry.get() for entry in question.answer_entries]
-                correct_index = int(question.correct_answer_var.get()) if question.correct_answer_var.get() else 0
-                if 0 <= correct_index < len(answers):
-                    correct_answer_text_js += f"    {i+1}: \"{answers[correct_index]}\",\n"
-            correct_answer_text_js += "};\n"
-            
-            successAudioEncoded=f""" 
-            <audio id="successAudio" controls style="display: none;">
-              <source src="data:audio/mp3;base64,{self.successAudioEncodedString}" type="audio/mp3">
-              Your browser does not support the audio element.
-            </audio>
-            """
-            
-            # Read HTML template
-            html_template = """
+        quiz.animals_per_row = int(quiz.animals_per_row)
+        quiz.localize_images = bool(quiz.localize_images)
+        quiz.write_report = bool(quiz.write_report)
+        quiz.precompress = bool(quiz.precompress)
+        quiz.template = str(quiz.template or "")
+        quiz.lazy_page = bool(quiz.lazy_page)
+        quiz.data_page = bool(quiz.data_page)
+        quiz.offline = bool(quiz.offline)
+        return quiz
+
+    def to_config(self):
+        config = {
+            'animals': [card.to_config() for card in self.cards],
+            'questions': [question.to_config() for question in self.questions],
+        }
+        for name in self.SETTINGS:
+            config[name] = getattr(self, name)
+        return config
+
+# Start of the built-in templates: document head and styles
+PAGE_HEAD = """
 <!DOCTYPE html>
 <html lang="ar" dir="rtl">
 <head>
@@ -554,7 +155,7 @@ class AnimalLearningGameGenerator:
   <title> امتحان تعليمي</title>
   <style>
     /* تحسينات التصميم العامة */
-    body {{
+    body {
       font-family: 'Arial', 'Segoe UI', sans-serif;
       text-align: center;
       background: linear-gradient(to bottom, #e0f7fa, #b2ebf2);
@@ -562,45 +163,45 @@ class AnimalLearningGameGenerator:
       padding: 20px;
       color: #01579b;
       min-height: 100vh;
-    }}
+    }
     
-    .container {{
+    .container {
       max-width: 800px;
       margin: 0 auto;
       background-color: rgba(255, 255, 255, 0.9);
       border-radius: 20px;
       padding: 20px;
       box-shadow: 0 8px 25px rgba(2, 62, 118, 0.2);
-    }}
+    }
     
-    h1 {{
+    h1 {
       color: #0288d1;
       font-size: 2.5rem;
       margin-bottom: 20px;
       text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.1);
-    }}
+    }
     
     /* تحسين صور الحيوانات */
-    .animals-container {{
+    .animals-container {
       display: flex;
       justify-content: center;
       flex-wrap: wrap;
       gap: 15px;
       margin: 20px 0;
-    }}
+    }
     
-    .animal-card {{
+    .animal-card {
       display: flex;
       flex-direction: column;
       align-items: center;
       transition: transform 0.3s;
-    }}
+    }
     
-    .animal-card:hover {{
+    .animal-card:hover {
       transform: translateY(-5px);
-    }}
+    }
     
-    .animal-card img {{
+    .animal-card img {
       width: 150px;
       height: 150px;
       object-fit: cover;
@@ -609,47 +210,47 @@ class AnimalLearningGameGenerator:
       cursor: pointer;
       border: 3px solid #81d4fa;
       transition: all 0.3s;
-    }}
+    }
     
-    .animal-card img:hover {{
+    .animal-card img:hover {
       border-color: #0288d1;
       box-shadow: 0 6px 12px rgba(0, 0, 0, 0.3);
-    }}
+    }
     
-    .animal-name {{
+    .animal-name {
       margin-top: 8px;
       font-weight: bold;
       color: #0277bd;
-    }}
+    }
     
     /* تحسين الأسئلة والخيارات */
-    .questions-container {{
+    .questions-container {
       margin-top: 30px;
-    }}
+    }
     
-    .question {{
+    .question {
       margin: 25px 0;
       padding: 15px;
       background-color: #e1f5fe;
       border-radius: 15px;
       box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-    }}
+    }
     
-    .question-text {{
+    .question-text {
       font-size: 1.3rem;
       font-weight: bold;
       margin-bottom: 15px;
       color: #01579b;
-    }}
+    }
     
-    .answers-container {{
+    .answers-container {
       display: flex;
       flex-direction: column;
       gap: 10px;
       margin-top: 15px;
-    }}
+    }
     
-    .answer {{
+    .answer {
       padding: 12px 20px;
       background: #f5f5f5;
       cursor: pointer;
@@ -657,33 +258,33 @@ class AnimalLearningGameGenerator:
       transition: all 0.3s;
       border: 2px solid transparent;
       font-size: 1.1rem;
-    }}
+    }
     
-    .answer:hover {{
+    .answer:hover {
       background: #e0f2f1;
       border-color: #4db6ac;
-    }}
+    }
     
-    .correct {{
+    .correct {
       background-color: #c8e6c9;
       border-color: #2e7d32;
-    }}
+    }
     
-    .incorrect {{
+    .incorrect {
       background-color: #ffcdd2;
       border-color: #c62828;
-    }}
+    }
     
     /* تحسين الفاصل */
-    hr {{
+    hr {
       border: none;
       height: 3px;
       background: linear-gradient(to right, transparent, #0288d1, transparent);
       margin: 30px 0;
-    }}
+    }
     
     /* زر التكرار */
-    .repeat-btn {{
+    .repeat-btn {
       margin-top: 10px;
       padding: 5px 15px;
       background-color: #4db6ac;
@@ -693,140 +294,4381 @@ class AnimalLearningGameGenerator:
       cursor: pointer;
       font-size: 0.9rem;
       transition: background-color 0.3s;
-    }}
+    }
     
-    .repeat-btn:hover {{
+    .repeat-btn:hover {
       background-color: #26a69a;
-    }}
+    }
     
     /* رسائل التغذية الراجعة */
-    .feedback {{
+    .feedback {
       margin-top: 10px;
       font-weight: bold;
       min-height: 24px;
-    }}
+    }
     
     /* التكيف مع الشاشات الصغيرة */
-    @media (max-width: 600px) {{
-      .animal-card img {{
+    @media (max-width: 600px) {
+      .animal-card img {
         width: 120px;
         height: 120px;
-      }}
+      }
       
-      .question-text {{
+      .question-text {
         font-size: 1.1rem;
-      }}
+      }
       
-      .answer {{
+      .answer {
         padding: 10px 15px;
         font-size: 1rem;
-      }}
-    }}
+      }
+    }
   </style>
 </head>
 <body>
-  {successAudioEncoded}
+"""
+
+DEFAULT_TEMPLATE = PAGE_HEAD + """  {{successAudioEncoded}}
   <div class="container">
     <h1>Learning Test</h1>
 
     <!-- صور الحيوانات -->
-    {animals_html}
+    {{animals_html}}
 
     <hr>
 
     <!-- الأسئلة -->
     <div class="questions-container">
-      {questions_html}
+      {{questions_html}}
     </div>
   </div>
 
   <script>
     // الإجابات الصحيحة
-    {correct_answers_js}
+    {{correct_answers_js}}
     
     // نصوص الإجابات الصحيحة للتشغيل
-    {correct_answer_text_js}
+    {{correct_answer_text_js}}
+    
+    // تحميل ملف الصوت عند أول تشغيل
+    function loadAudio(audio) {
+      if (audio.dataset.src && !audio.getAttribute('src')) {
+        audio.src = audio.dataset.src;
+      }
+    }
     
     // تشغيل الصوت
-    function playAudio(audioId) {{
+    function playAudio(audioId) {
       const audio = document.getElementById(audioId);
-      if (audio) {{
+      if (audio) {
+        loadAudio(audio);
         audio.currentTime = 0;
         audio.play();
-      }}
-    }}
+      }
+    }
     
     // التحقق من الإجابات
-    function checkAnswer(questionId, answerIndex) {{
-      const question = document.getElementById(`q${{questionId}}`);
+    function checkAnswer(questionId, answerIndex) {
+      const question = document.getElementById(`q${questionId}`);
       const answers = question.getElementsByClassName('answer');
-      const feedback = document.getElementById(`feedback${{questionId}}`);
+      const feedback = document.getElementById(`feedback${questionId}`);
       
       // إزالة الأنماط السابقة
-      for (let answer of answers) {{
+      for (let answer of answers) {
         answer.classList.remove('correct', 'incorrect');
-      }}
+      }
       
       // التحقق من الإجابة
-      if (answerIndex === correctAnswers[questionId]) {{
+      if (answerIndex === correctAnswers[questionId]) {
         answers[answerIndex].classList.add('correct');
         feedback.textContent = 'Correct! Well done! 🎉';
         feedback.style.color = '#2e7d32';
         playCorrectAnswer(questionId);
-      }} else {{
+      } else {
         answers[answerIndex].classList.add('incorrect');
         answers[correctAnswers[questionId]].classList.add('correct');
         feedback.textContent = 'Try again!';
         feedback.style.color = '#c62828';
-      }}
-    }}
+      }
+    }
 
-    function hasEnglishCharacter(text) {{
+    function hasEnglishCharacter(text) {
       return /[a-zA-Z]/.test(text);
-    }}
+    }
     
     // تشغيل الإجابة الصحيحة
-    function playCorrectAnswer(questionId) {{
+    function playCorrectAnswer(questionId) {
       // إنشاء عنصر صوت مؤقت للإجابة الصحيحة
       const text = correctAnswerText[questionId];
-      if (text) {{
-        if (hasEnglishCharacter(text)) {{
+      if (text) {
+        if (hasEnglishCharacter(text)) {
           const utterance = new SpeechSynthesisUtterance(text);
           utterance.lang = "en-US";
           utterance.rate = 0.9;
           speechSynthesis.speak(utterance);
-        }}else{{
+        }else{
           const successAudio = document.getElementById('successAudio');
+          loadAudio(successAudio);
           successAudio.currentTime = 0;
           successAudio.play();
-        }}
-      }}
-    }}
+        }
+      }
+    }
   </script>
 </body>
 </html>
 """
-            
-            # Format the HTML
-            html_content = html_template.format(
-                successAudioEncoded=successAudioEncoded,
-                animals_html=animals_html,
-                questions_html=questions_html,
-                correct_answers_js=correct_answers_js,
-                correct_answer_text_js=correct_answer_text_js
-            )
-            
-            # Save HTML file
-            output_file = self.output_file_var.get()
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-                
-            messagebox.showinfo("Success", f"HTML file generated successfully!\nSaved as: {output_file}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate HTML: {str(e)}")
 
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = AnimalLearningGameGenerator(root)
-    root.mainloop()
\ No newline at end of file
+# Script shared by the lazy and data page templates: audio played on demand and
+# one click handler for every card and answer
+PLAYER_SCRIPT = """    // تحميل ملف الصوت عند أول تشغيل
+    function loadAudio(audio) {
+      if (audio.dataset.src && !audio.getAttribute('src')) {
+        audio.src = audio.dataset.src;
+      }
+    }
+
+    // تشغيل الصوت
+    function playAudio(audioId) {
+      const audio = document.getElementById(audioId);
+      if (audio) {
+        loadAudio(audio);
+        audio.currentTime = 0;
+        audio.play();
+      }
+    }
+
+    // معالج واحد لكل النقرات على البطاقات والإجابات
+    document.addEventListener('click', function (event) {
+      const answer = event.target.closest('.answer');
+      if (answer) {
+        checkAnswer(answer.closest('.question'), Number(answer.dataset.answer));
+        return;
+      }
+      const player = event.target.closest('[data-audio]');
+      if (player) {
+        playAudio(player.dataset.audio);
+      }
+    });
+
+    // التحقق من الإجابات
+    function checkAnswer(question, answerIndex) {
+      const questionId = Number(question.dataset.question);
+      const answers = question.querySelector('.answers-container').children;
+      const feedback = question.querySelector('.feedback');
+
+      // إزالة الأنماط السابقة
+      for (const answer of question.markedAnswers || []) {
+        answer.classList.remove('correct', 'incorrect');
+      }
+
+      // التحقق من الإجابة
+      const correctAnswer = answers[correctAnswers[questionId]];
+      if (answerIndex === correctAnswers[questionId]) {
+        correctAnswer.classList.add('correct');
+        question.markedAnswers = [correctAnswer];
+        feedback.textContent = 'Correct! Well done! 🎉';
+        feedback.style.color = '#2e7d32';
+        playCorrectAnswer(questionId);
+      } else {
+        answers[answerIndex].classList.add('incorrect');
+        question.markedAnswers = [answers[answerIndex]];
+        if (correctAnswer) {
+          correctAnswer.classList.add('correct');
+          question.markedAnswers.push(correctAnswer);
+        }
+        feedback.textContent = 'Try again!';
+        feedback.style.color = '#c62828';
+      }
+    }
+
+    function hasEnglishCharacter(text) {
+      return /[a-zA-Z]/.test(text);
+    }
+
+    // تشغيل الإجابة الصحيحة
+    function playCorrectAnswer(questionId) {
+      const text = correctAnswerText[questionId];
+      if (text) {
+        if (hasEnglishCharacter(text)) {
+          const utterance = new SpeechSynthesisUtterance(text);
+          utterance.lang = "en-US";
+          utterance.rate = 0.9;
+          speechSynthesis.speak(utterance);
+        }else{
+          const successAudio = document.getElementById('successAudio');
+          loadAudio(successAudio);
+          successAudio.currentTime = 0;
+          successAudio.play();
+        }
+      }
+    }
+  </script>
+</body>
+</html>
+"""
+
+# Built-in template of lazy pages: cards and questions arrive as inert <template>
+# chunks that are mounted as they come near the screen
+LAZY_TEMPLATE = PAGE_HEAD + """  {{successAudioEncoded}}
+  <div class="container">
+    <h1>Learning Test</h1>
+
+    <!-- صور الحيوانات -->
+    {{animals_html}}
+
+    <hr>
+
+    <!-- الأسئلة -->
+    <div class="questions-container">
+      {{questions_html}}
+    </div>
+  </div>
+
+  <script>
+    // الإجابات الصحيحة
+    {{correct_answers_js}}
+
+    // نصوص الإجابات الصحيحة للتشغيل
+    {{correct_answer_text_js}}
+
+    // إضافة البطاقات والأسئلة عند اقترابها من الشاشة
+    function mountChunk(chunk) {
+      chunk.replaceWith(chunk.firstElementChild.content);
+    }
+
+    const chunks = document.querySelectorAll('.lazy-chunk');
+    if ('IntersectionObserver' in window) {
+      const observer = new IntersectionObserver(function (entries) {
+        for (const entry of entries) {
+          if (entry.isIntersecting) {
+            observer.unobserve(entry.target);
+            mountChunk(entry.target);
+          }
+        }
+      }, { rootMargin: '1000px 0px' });
+      chunks.forEach(function (chunk) { observer.observe(chunk); });
+    } else {
+      chunks.forEach(mountChunk);
+    }
+
+""" + PLAYER_SCRIPT
+
+# Built-in template of data pages: cards and questions are one JSON document
+# that the page turns into elements, all at once or, for lazy pages, as the
+# reader scrolls
+DATA_TEMPLATE = PAGE_HEAD + """  {{successAudioEncoded}}
+  <div class="container">
+    <h1>Learning Test</h1>
+
+    <!-- صور الحيوانات -->
+    <div id="cards"></div>
+    {{animals_html}}
+
+    <hr>
+
+    <!-- الأسئلة -->
+    <div class="questions-container"></div>
+  </div>
+
+  <script id="quiz-data" type="application/json">{{quiz_data}}</script>
+  <script>
+    const quiz = JSON.parse(document.getElementById('quiz-data').textContent);
+
+    // الإجابات الصحيحة ونصوصها للتشغيل
+    const correctAnswers = {};
+    const correctAnswerText = {};
+    quiz.questions.forEach(function (question, i) {
+      correctAnswers[i + 1] = question.correct;
+      correctAnswerText[i + 1] = question.answers[question.correct];
+    });
+
+    function createElement(tag, className) {
+      const element = document.createElement(tag);
+      if (className) {
+        element.className = className;
+      }
+      return element;
+    }
+
+    // بطاقة حيوان؛ النصوص تكتب كـ HTML كما في الصفحات الأخرى
+    let cardRow = null;
+    function renderCard(container, card, i) {
+      if (i % quiz.perRow === 0) {
+        cardRow = createElement('div', 'animals-container');
+        container.append(cardRow);
+      }
+      const element = createElement('div', 'animal-card');
+      const image = createElement('img');
+      image.src = card.image;
+      image.alt = card.word;
+      image.dataset.audio = card.audio;
+      const name = createElement('div', 'animal-name');
+      name.innerHTML = card.title;
+      const button = createElement('button', 'repeat-btn');
+      button.dataset.audio = card.audio;
+      button.textContent = '🔊 Repeat';
+      element.append(image, name, button);
+      cardRow.append(element);
+    }
+
+    // سؤال وإجاباته
+    function renderQuestion(container, question, i) {
+      const element = createElement('div', 'question');
+      element.id = `q${i + 1}`;
+      element.dataset.question = i + 1;
+      if (question.image) {
+        const image = createElement('img');
+        image.src = question.image;
+        image.alt = 'Question image';
+        image.style.cssText = 'max-width: 300px; margin-bottom: 15px; border-radius: 15px;';
+        element.append(image);
+      }
+      const text = createElement('div', 'question-text');
+      text.innerHTML = question.text;
+      const answers = createElement('div', 'answers-container');
+      question.answers.forEach(function (answer, j) {
+        const option = createElement('div', 'answer');
+        option.dataset.answer = j;
+        option.innerHTML = answer;
+        answers.append(option);
+      });
+      element.append(text, answers, createElement('div', 'feedback'));
+      container.append(element);
+    }
+
+    // إضافة العناصر دفعة بعد دفعة عند الاقتراب من نهاية القائمة
+    function renderList(items, container, render, chunkSize) {
+      let next = 0;
+      function renderChunk() {
+        const fragment = document.createDocumentFragment();
+        for (const end = Math.min(next + chunkSize, items.length); next < end; next++) {
+          render(fragment, items[next], next);
+        }
+        container.append(fragment);
+      }
+      if (!quiz.lazy || !('IntersectionObserver' in window)) {
+        chunkSize = items.length;
+        renderChunk();
+        return;
+      }
+      const sentinel = createElement('div');
+      container.after(sentinel);
+      const observer = new IntersectionObserver(function (entries) {
+        if (!entries[0].isIntersecting) {
+          return;
+        }
+        renderChunk();
+        if (next >= items.length) {
+          observer.disconnect();
+          sentinel.remove();
+        } else {
+          // المراقبة من جديد تعيد فحص موضع العلامة
+          observer.unobserve(sentinel);
+          observer.observe(sentinel);
+        }
+      }, { rootMargin: '1000px 0px' });
+      observer.observe(sentinel);
+    }
+
+    renderList(quiz.cards, document.getElementById('cards'), renderCard, quiz.cardsPerChunk);
+    renderList(quiz.questions, document.querySelector('.questions-container'), renderQuestion, quiz.questionsPerChunk);
+
+""" + PLAYER_SCRIPT
+
+# Built-in templates by name; a quiz's template setting overrides them
+BUILTIN_TEMPLATES = {'default': DEFAULT_TEMPLATE, 'lazy': LAZY_TEMPLATE, 'data': DATA_TEMPLATE}
+
+# Cards and questions per chunk of a lazy page, and the height their
+# placeholder reserves before it is mounted, in pixels
+LAZY_CARD_ROWS_PER_CHUNK = 8
+LAZY_QUESTIONS_PER_CHUNK = 20
+LAZY_CARD_ROW_HEIGHT = 230
+LAZY_QUESTION_HEIGHT = 220
+
+# Slots a page template can use, as {{name}}; render_page fills each with a section of the page
+TEMPLATE_SLOTS = ('successAudioEncoded', 'animals_html', 'questions_html', 'correct_answers_js', 'correct_answer_text_js', 'quiz_data')
+TEMPLATE_SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# What a custom template of each kind of page must have: slots, and text of
+# the page script that the sections rely on. Lazy sections are inert
+# .lazy-chunk elements whose answers are found by their data-answer attribute;
+# data pages are built from quiz_data, with their audio elements in animals_html.
+TEMPLATE_REQUIREMENTS = {
+    'lazy': {'slots': ('animals_html', 'questions_html'), 'code': ('lazy-chunk', 'dataset.answer')},
+    'data': {'slots': ('quiz_data', 'animals_html'), 'code': ('dataset.answer',)},
+}
+
+# Bytes of audio read at a time; a multiple of 3 so the base64 pieces join up exactly
+AUDIO_CHUNK_SIZE = 3 * 256 * 1024
+
+# Page of the compressed output mode: the game page, gzipped and base64-encoded
+# between these two parts, is expanded by the browser when the file is opened
+COMPRESSED_PAGE_HEAD = """<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title> امتحان تعليمي</title>
+</head>
+<body>
+  <p id="loading" style="font-family: Arial, sans-serif; text-align: center;">جارٍ التحميل...</p>
+  <script id="payload" type="application/octet-stream">"""
+COMPRESSED_PAGE_TAIL = """</script>
+  <script>
+    // الصفحة مضغوطة داخل هذا الملف ويفك المتصفح ضغطها عند الفتح
+    (async function () {
+      if (!('DecompressionStream' in window)) {
+        document.getElementById('loading').textContent = 'هذا المتصفح قديم ولا يمكنه فتح هذا الملف. This browser is too old to open this file.';
+        return;
+      }
+      const payload = document.getElementById('payload').textContent;
+      const response = await fetch('data:application/gzip;base64,' + payload);
+      const html = await new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).text();
+      document.open();
+      document.write(html);
+      document.close();
+    })();
+  </script>
+</body>
+</html>
+"""
+
+# zlib level for the compressed page and the .gz copies; brotli quality for the .br copies
+COMPRESS_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# Default size cap of the encoded audio cache
+AUDIO_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Image downloads: cache size cap, parallel connections, timeouts and limits
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+IMAGE_FETCH_WORKERS = 8
+IMAGE_TIMEOUT = 20
+IMAGE_MAX_REDIRECTS = 5
+IMAGE_HEURISTIC_MAX_AGE = 24 * 60 * 60
+
+# Largest CSS box of each kind of image (.animal-card img, question img max-width),
+# and the pixel density localized images are resized for
+IMAGE_DISPLAY_SIZES = {'card': (150, 150), 'question': (300, None)}
+IMAGE_DENSITY = 2
+IMAGE_QUALITY = 80
+
+def default_cache_dir():
+    """ Per-user cache directory; TESTSGENERATOR_CACHE_DIR overrides it """
+    override = os.environ.get("TESTSGENERATOR_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base_path = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base_path = os.path.expanduser("~/Library/Caches")
+    else:
+        base_path = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base_path, "LearningGameGenerator")
+
+def hash_file(path):
+    """ sha256 hex digest of a file's content """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            chunk = source.read(AUDIO_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class AudioCache:
+    """ On-disk cache of base64-encoded audio.
+
+    Files are looked up by path, size and mtime; when that identity is new the
+    content hash is used instead, so moved or touched files still hit. Encoded
+    payloads are stored once per content hash and evicted least recently used
+    first once the cache grows past max_bytes.
+    """
+    def __init__(self, cache_dir=None, max_bytes=AUDIO_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), "audio")
+        self.max_bytes = max_bytes
+        self.keys_dir = os.path.join(self.cache_dir, "keys")
+        self.blobs_dir = os.path.join(self.cache_dir, "blobs")
+        self.hits = 0
+        self.misses = 0
+
+    def content_hash(self, path):
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        key_path = os.path.join(self.keys_dir, hashlib.sha256(identity.encode('utf-8')).hexdigest())
+        try:
+            with open(key_path, 'r', encoding='ascii') as key_file:
+                digest = key_file.read()
+            os.utime(key_path)
+            return digest
+        except OSError:
+            pass
+
+        # Unknown identity: fall back to hashing the content
+        digest = hash_file(path)
+        try:
+            os.makedirs(self.keys_dir, exist_ok=True)
+            write_file_atomic(key_path, digest)
+        except OSError:
+            pass
+        return digest
+
+    def blob_path(self, digest):
+        return os.path.join(self.blobs_dir, digest + ".b64")
+
+    def write_base64(self, path, f, report=None):
+        """ Write the base64 of a file into f, encoding it only on a cache miss """
+        report = report or GenerationReport()
+        blob_path = self.blob_path(self.content_hash(path))
+        try:
+            blob = open(blob_path, 'r', encoding='ascii')
+        except OSError:
+            blob = None
+
+        if blob is not None:
+            self.hits += 1
+            with blob:
+                while True:
+                    start = time.perf_counter()
+                    chunk = blob.read(AUDIO_CHUNK_SIZE)
+                    report.timed('read', start)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            # The blob's mtime records when it was last used, for LRU eviction
+            try:
+                os.utime(blob_path)
+            except OSError:
+                pass
+            return
+
+        self.misses += 1
+        try:
+            os.makedirs(self.blobs_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.blobs_dir, suffix=".tmp")
+        except OSError:
+            # Cache not writable; just encode
+            write_base64_file(path, f, report)
+            return
+
+        try:
+            with os.fdopen(fd, 'w', encoding='ascii') as blob, open(path, 'rb') as source:
+                while True:
+                    start = time.perf_counter()
+                    chunk = source.read(AUDIO_CHUNK_SIZE)
+                    start = report.timed('read', start)
+                    if not chunk:
+                        break
+                    encoded = base64.b64encode(chunk).decode('ascii')
+                    start = report.timed('encode', start)
+                    f.write(encoded)
+                    start = time.perf_counter()
+                    blob.write(encoded)
+                    report.timed('cache', start)
+            os.replace(temp_path, blob_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def read_base64(self, path):
+        """ The base64 of a (small) file as a string """
+        buffer = io.StringIO()
+        self.write_base64(path, buffer)
+        return buffer.getvalue()
+
+    def info(self):
+        """ (number of cached payloads, total bytes) """
+        return directory_usage(self.blobs_dir, ".b64")
+
+    def trim(self):
+        """ Evict least recently used payloads until the cache fits max_bytes """
+        evicted, oldest = trim_directory(self.blobs_dir, ".b64", self.max_bytes)
+
+        # Drop path keys that have not been used since the oldest surviving payload
+        if evicted and oldest is not None:
+            try:
+                for entry in os.scandir(self.keys_dir):
+                    if entry.stat().st_mtime < oldest:
+                        os.remove(entry.path)
+            except OSError:
+                pass
+        return evicted
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+def cache_entries(directory, suffix):
+    try:
+        return [entry for entry in os.scandir(directory) if entry.name.endswith(suffix)]
+    except OSError:
+        return []
+
+def directory_usage(directory, suffix):
+    """ (number of cache entries, total bytes) in a cache directory """
+    entries = cache_entries(directory, suffix)
+    return len(entries), sum(entry.stat().st_size for entry in entries)
+
+def trim_directory(directory, suffix, max_bytes, remove=os.remove):
+    """ Delete least recently used (oldest mtime) entries until the directory fits max_bytes.
+
+    Returns the number evicted and the last-use time of the oldest survivor.
+    """
+    entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in cache_entries(directory, suffix))
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for mtime, size, entry_path in entries:
+        if total <= max_bytes:
+            return evicted, mtime
+        try:
+            remove(entry_path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted, None
+
+class ImageCache:
+    """ On-disk cache of downloaded images and their HTTP validators.
+
+    Each URL has a body file and a JSON file with its ETag, Last-Modified,
+    content type, content hash and freshness lifetime.
+    """
+    def __init__(self, cache_dir=None, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), "images")
+        self.max_bytes = max_bytes
+
+    def entry_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def load(self, url):
+        """ Cached metadata for url (with the body's 'path'), or None """
+        entry_path = self.entry_path(url)
+        try:
+            with open(entry_path + ".json", 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        meta['path'] = entry_path + ".img"
+        if not os.path.exists(meta['path']):
+            return None
+        return meta
+
+    def store(self, url, meta, body=None):
+        """ Save metadata, and the body when it changed; returns the stored metadata """
+        entry_path = self.entry_path(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = {key: value for key, value in meta.items() if key != 'path'}
+        if body is not None:
+            meta['sha256'] = hashlib.sha256(body).hexdigest()
+            meta['size'] = len(body)
+            write_file_atomic(entry_path + ".img", body)
+        write_file_atomic(entry_path + ".json", json.dumps(meta))
+        meta['path'] = entry_path + ".img"
+        return meta
+
+    def touch(self, meta):
+        try:
+            os.utime(meta['path'])
+        except OSError:
+            pass
+
+    def resized_path(self, digest, width, height):
+        """ Cache path (without extension) of a source image resized to fit width x height """
+        return os.path.join(self.cache_dir, "resized", f"{digest}_{width}x{height or 0}")
+
+    def load_resized(self, base_path):
+        """ Metadata of a resized image cached at base_path (with its 'path'), or None """
+        try:
+            with open(base_path + ".json", 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            meta['path'] = base_path + meta.pop('extension')
+            # Both files count as used, so they are evicted together
+            os.utime(meta['path'])
+            os.utime(base_path + ".json")
+        except (OSError, ValueError, KeyError):
+            return None
+        return meta
+
+    def store_resized(self, base_path, extension, content_type, data):
+        """ Save a resized image with its hash, so using it later does not read it again """
+        meta = {'extension': extension, 'content_type': content_type, 'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+        write_file_atomic(base_path + extension, data)
+        write_file_atomic(base_path + ".json", json.dumps(meta))
+        meta['path'] = base_path + meta.pop('extension')
+        return meta
+
+    def info(self):
+        """ (number of cached images, total bytes) """
+        count, size = directory_usage(self.cache_dir, ".img")
+        resized_dir = os.path.join(self.cache_dir, "resized")
+        # Each resized image has a .json file with its hash
+        resized_count = directory_usage(resized_dir, ".json")[0]
+        resized_size = directory_usage(resized_dir, "")[1]
+        return count + resized_count, size + resized_size
+
+    def trim(self):
+        """ Evict least recently used images until the cache fits max_bytes """
+        def remove(body_path):
+            os.remove(body_path)
+            os.remove(os.path.splitext(body_path)[0] + ".json")
+        evicted = trim_directory(self.cache_dir, ".img", self.max_bytes, remove)[0]
+        return evicted + trim_directory(os.path.join(self.cache_dir, "resized"), "", self.max_bytes // 4)[0]
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+def freshness_lifetime(headers, now):
+    """ Seconds a response may be reused without revalidation (RFC 9111) """
+    cache_control = (headers.get('Cache-Control') or "").lower()
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return 0
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == 'max-age' and value.strip().isdigit():
+            return int(value)
+    import email.utils
+    try:
+        if headers.get('Expires'):
+            return max(0, email.utils.parsedate_to_datetime(headers['Expires']).timestamp() - now)
+        if headers.get('Last-Modified'):
+            # Heuristic freshness: a tenth of the time since the last change, at most a day
+            age = now - email.utils.parsedate_to_datetime(headers['Last-Modified']).timestamp()
+            return min(max(0, age / 10), IMAGE_HEURISTIC_MAX_AGE)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return 0
+
+class ImageFetcher:
+    """ Downloads images through an ImageCache.
+
+    Each worker thread keeps one keep-alive connection per host. Fresh cache
+    entries are used without touching the network; stale ones are revalidated
+    with If-None-Match / If-Modified-Since.
+    """
+    def __init__(self, image_cache, timeout=IMAGE_TIMEOUT):
+        self.image_cache = image_cache
+        self.timeout = timeout
+        self.local = threading.local()
+        self.all_connections = []
+        self.lock = threading.Lock()
+
+    def connection(self, scheme, netloc):
+        import http.client
+        connections = getattr(self.local, 'connections', None)
+        if connections is None:
+            connections = self.local.connections = {}
+        if (scheme, netloc) not in connections:
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connections[(scheme, netloc)] = connection_class(netloc, timeout=self.timeout)
+            with self.lock:
+                self.all_connections.append(connections[(scheme, netloc)])
+        return connections[(scheme, netloc)]
+
+    def get(self, url, headers):
+        """ GET url, following redirects; returns (response, body) """
+        import http.client
+        for _ in range(IMAGE_MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in ('http', 'https'):
+                raise ValueError(f"Unsupported image URL: {url}")
+            target = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+            connection = self.connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', target, headers=headers)
+                response = connection.getresponse()
+            except (http.client.HTTPException, ConnectionError):
+                # The server may have closed the idle connection; retry once on a new one
+                connection.close()
+                connection.request('GET', target, headers=headers)
+                response = connection.getresponse()
+            body = response.read()
+            location = response.getheader('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            return response, body
+        raise ValueError(f"Too many redirects: {url}")
+
+    def fetch(self, url):
+        """ Cached metadata for url after downloading or revalidating it; returns (meta, used_network) """
+        import http.client
+        now = time.time()
+        meta = self.image_cache.load(url)
+        if meta is not None and meta.get('fresh_until', 0) > now:
+            self.image_cache.touch(meta)
+            return meta, False
+
+        headers = {'User-Agent': 'LearningGameGenerator', 'Accept': 'image/*,*/*;q=0.8'}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response, body = self.get(url, headers)
+        except (OSError, http.client.HTTPException, ValueError):
+            if meta is None:
+                raise
+            # Offline or server down: a stale copy is better than a broken image
+            return meta, True
+
+        if response.status == 304 and meta is not None:
+            meta['fresh_until'] = now + freshness_lifetime(response.headers, now)
+            return self.image_cache.store(url, meta), True
+        if response.status != 200:
+            if meta is not None:
+                return meta, True
+            raise ValueError(f"HTTP {response.status} for {url}")
+
+        content_type = (response.getheader('Content-Type') or "").split(";")[0].strip()
+        if not content_type.startswith("image/"):
+            content_type = mimetypes.guess_type(urllib.parse.urlsplit(url).path)[0] or "application/octet-stream"
+        new_meta = {
+            'url': url,
+            'etag': response.getheader('ETag'),
+            'last_modified': response.getheader('Last-Modified'),
+            'content_type': content_type,
+            'fresh_until': now + freshness_lifetime(response.headers, now),
+        }
+        return self.image_cache.store(url, new_meta, body), True
+
+    def close(self):
+        with self.lock:
+            for connection in self.all_connections:
+                connection.close()
+            self.all_connections = []
+
+def image_urls(quiz):
+    """ Distinct http(s) image URLs of the cards and questions, in page order """
+    urls = []
+    for item in quiz.cards + quiz.questions:
+        url = item.image_url
+        if url.startswith(('http://', 'https://')) and url not in urls:
+            urls.append(url)
+    return urls
+
+def fetch_images(urls, image_cache, max_workers=IMAGE_FETCH_WORKERS):
+    """ Download or revalidate images concurrently.
+
+    Returns {url: cached metadata} for the images that are available, plus
+    statistics on network use and failures.
+    """
+    images = {}
+    stats = {'images': len(urls), 'images_from_cache': 0, 'images_failed': 0, 'image_errors': {}}
+    if not urls:
+        return images, stats
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    start = time.perf_counter()
+    fetcher = ImageFetcher(image_cache)
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+            futures = {executor.submit(fetcher.fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    meta, used_network = future.result()
+                except Exception as e:
+                    stats['images_failed'] += 1
+                    stats['image_errors'][url] = str(e)
+                    continue
+                images[url] = meta
+                if not used_network:
+                    stats['images_from_cache'] += 1
+    finally:
+        fetcher.close()
+    stats['image_fetch_seconds'] = time.perf_counter() - start
+    return images, stats
+
+def create_temp_file(directory):
+    """ Create a uniquely named temporary file in directory; returns (fd, path).
+
+    Unlike mkstemp, which makes files private to their owner, the file gets the
+    permissions of any new file under the process umask, which the operating
+    system applies, so the umask is never read (and changed) to find them.
+    """
+    while True:
+        temp_path = os.path.join(directory, f"tmp{os.urandom(8).hex()}.tmp")
+        try:
+            return os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666), temp_path
+        except FileExistsError:
+            continue
+
+def write_file_atomic(path, data):
+    """ Replace a file with text or bytes in one step so readers never see a partial write, even after a crash.
+
+    The temporary file has a unique name, so threads and processes writing the
+    same path do not get in each other's way; the last one wins.
+    """
+    fd, temp_path = create_temp_file(os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, 'wb') if isinstance(data, bytes) else os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def load_success_audio(audio_cache=None):
+    """ Base64 of the success sound shipped next to the script """
+    success_audio_path = resource_path("successAudio.mp3")
+    if audio_cache is not None:
+        return audio_cache.read_base64(success_audio_path)
+    with open(success_audio_path, "rb") as success_audio_file:
+        return base64.b64encode(success_audio_file.read()).decode("utf-8")
+
+# Whether resize_image has said that it cannot resize without Pillow
+_pillow_missing_reported = False
+
+def resize_image(image, width, height, image_cache):
+    """ A smaller copy of a cached image fitting the display box, or image itself.
+
+    The image is scaled down (never up) to cover width x height, or to width
+    when height is None, and re-encoded as WebP (JPEG or PNG when Pillow lacks
+    WebP). Results are cached, with their hash, by source hash and target
+    size; images that would not get smaller are remembered and used as they
+    are. Needs Pillow.
+    """
+    base_path = image_cache.resized_path(image['sha256'], width, height)
+    resized = image_cache.load_resized(base_path)
+    if resized is not None:
+        return resized
+    if os.path.exists(base_path + ".orig"):
+        return image
+
+    try:
+        from PIL import Image, ImageOps, features
+    except ImportError:
+        global _pillow_missing_reported
+        if not _pillow_missing_reported:
+            _pillow_missing_reported = True
+            print("Pillow is not installed; images are stored at their original size", file=sys.stderr)
+        return image
+
+    try:
+        with Image.open(image['path']) as source:
+            if getattr(source, 'is_animated', False):
+                return image
+            source = ImageOps.exif_transpose(source)
+            scale = width / source.width if height is None else max(width / source.width, height / source.height)
+            if scale < 1:
+                source = source.resize((max(1, round(source.width * scale)), max(1, round(source.height * scale))), Image.LANCZOS)
+
+            has_alpha = source.mode in ('RGBA', 'LA', 'PA') or 'transparency' in source.info
+            buffer = io.BytesIO()
+            if features.check('webp'):
+                extension, content_type = ".webp", "image/webp"
+                source.convert('RGBA' if has_alpha else 'RGB').save(buffer, 'WEBP', quality=IMAGE_QUALITY, method=6)
+            elif has_alpha:
+                extension, content_type = ".png", "image/png"
+                source.convert('RGBA').save(buffer, 'PNG', optimize=True)
+            else:
+                extension, content_type = ".jpg", "image/jpeg"
+                source.convert('RGB').save(buffer, 'JPEG', quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # Not something Pillow can decode (SVG, icons...); keep the original
+        return image
+
+    os.makedirs(os.path.dirname(base_path), exist_ok=True)
+    data = buffer.getvalue()
+    if len(data) >= image['size']:
+        Path(base_path + ".orig").touch()
+        return image
+    return image_cache.store_resized(base_path, extension, content_type, data)
+
+def prepare_images(quiz, fetched, image_cache):
+    """ Images to embed, keyed by (role, url) with role 'card' or 'question'.
+
+    Each fetched image is resized for the largest size it is displayed at.
+    Returns the mapping and the bytes saved by resizing.
+    """
+    uses = []
+    for role, items in (('card', quiz.cards), ('question', quiz.questions)):
+        for item in items:
+            url = item.image_url
+            if url in fetched and (role, url) not in uses:
+                uses.append((role, url))
+
+    def prepare(use):
+        role, url = use
+        width, height = IMAGE_DISPLAY_SIZES[role]
+        return resize_image(fetched[url], width * IMAGE_DENSITY, height and height * IMAGE_DENSITY, image_cache)
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS) as executor:
+        prepared = dict(zip(uses, executor.map(prepare, uses)))
+    saved = sum(fetched[url]['size'] - prepared[(role, url)]['size'] for role, url in uses)
+    return prepared, saved
+
+def write_base64_file(path, f, report=None):
+    """ Stream a file into f as base64, one chunk at a time """
+    report = report or GenerationReport()
+    with open(path, 'rb') as source:
+        while True:
+            start = time.perf_counter()
+            chunk = source.read(AUDIO_CHUNK_SIZE)
+            start = report.timed('read', start)
+            if not chunk:
+                break
+            encoded = base64.b64encode(chunk).decode('ascii')
+            report.timed('encode', start)
+            f.write(encoded)
+
+# Phases of a generation in the order they run: downloading and resizing
+# images, rendering the page sections, reading audio and image files, base64
+# encoding, writing the page (and gzipping it in the compressed mode), filling
+# the audio cache, writing the .gz and .br copies and replacing the output
+REPORT_PHASES = ('images', 'render', 'read', 'encode', 'write', 'cache', 'compress', 'finalize')
+
+class GenerationReport:
+    """ Seconds spent in each phase of one generation, and bytes written per card and question """
+    def __init__(self):
+        self.phases = dict.fromkeys(REPORT_PHASES, 0.0)
+        self.bytes_written = 0
+        self.items = {'card': {}, 'question': {}}
+
+    def timed(self, phase, start):
+        """ Add the time since start to phase; returns the current time """
+        now = time.perf_counter()
+        self.phases[phase] += now - start
+        return now
+
+    def as_dict(self, quiz, total_seconds):
+        return {
+            'total_seconds': total_seconds,
+            'phases': dict(self.phases),
+            'bytes_written': self.bytes_written,
+            'cards': [{'index': i, 'title': card.title, 'bytes': self.items['card'].get(i)} for i, card in enumerate(quiz.cards)],
+            'questions': [{'index': i, 'text': question.text, 'bytes': self.items['question'].get(i)} for i, question in enumerate(quiz.questions)],
+        }
+
+class ReportWriter:
+    """ Text file wrapper that times the writes and counts the bytes written into a GenerationReport """
+    def __init__(self, f, report):
+        self.f = f
+        self.report = report
+
+    def write(self, text):
+        start = time.perf_counter()
+        self.f.write(text)
+        self.report.timed('write', start)
+        self.report.bytes_written += len(text) if text.isascii() else len(text.encode('utf-8'))
+
+def base64_length(size):
+    """ Length of the base64 text for size bytes """
+    return (size + 2) // 3 * 4
+
+def format_size(size):
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+# Project bundles: one zip holding the quiz manifest and the audio it uses, stored
+# by content hash next to its base64 encoding
+PACK_EXTENSION = ".quizpack"
+PACK_MANIFEST = "manifest.json"
+PACK_FORMAT = 1
+
+def split_pack_path(path):
+    """ (bundle file, member name) for a path inside a project bundle, or None """
+    for separator in ("/", "\\"):
+        index = path.find(PACK_EXTENSION + separator)
+        if index >= 0:
+            end = index + len(PACK_EXTENSION)
+            return path[:end], path[end + 1:].replace("\\", "/")
+    return None
+
+# zipfile is imported by load_zipfile() only when a bundle is opened or saved
+zipfile = None
+
+def load_zipfile():
+    """ Import zipfile into the module globals for project bundles """
+    global zipfile
+    import zipfile
+
+class QuizPack:
+    """ An opened project bundle.
+
+    Opening reads only the zip directory and the manifest; a member is read
+    from its offset in the file when it is used.
+    """
+    def __init__(self, path):
+        load_zipfile()
+        self.path = path
+        try:
+            with zipfile.ZipFile(path) as archive:
+                self.members = {info.filename: info for info in archive.infolist()}
+                if PACK_MANIFEST not in self.members:
+                    raise ValueError(f"{path} is not a project bundle: it has no {PACK_MANIFEST}")
+                self.manifest = json.loads(archive.read(PACK_MANIFEST).decode('utf-8'))
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"{path} is not a project bundle: {e}")
+        if self.manifest.get('format', 0) > PACK_FORMAT:
+            raise ValueError(f"{path} was saved by a newer version of the generator")
+        # Member name -> {'sha256', 'size'} of each audio file
+        self.audio = self.manifest.get('audio', {})
+        self.offsets = {}
+
+    def member_offset(self, name):
+        """ Start of a stored member's data in the bundle file """
+        offset = self.offsets.get(name)
+        if offset is None:
+            info = self.members[name]
+            with open(self.path, 'rb') as f:
+                f.seek(info.header_offset)
+                header = f.read(30)
+            # The local file header ends with the lengths of the name and extra field that follow it
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            offset = self.offsets[name] = info.header_offset + 30 + name_length + extra_length
+        return offset
+
+    def read_chunks(self, name, chunk_size=AUDIO_CHUNK_SIZE):
+        """ Yield the content of a member in chunks """
+        info = self.members[name]
+        if info.compress_type != zipfile.ZIP_STORED:
+            with zipfile.ZipFile(self.path) as archive, archive.open(name) as source:
+                yield from iter(lambda: source.read(chunk_size), b"")
+            return
+        with open(self.path, 'rb') as source:
+            source.seek(self.member_offset(name))
+            remaining = info.file_size
+            while remaining > 0:
+                chunk = source.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise ValueError(f"{self.path} is truncated")
+                remaining -= len(chunk)
+                yield chunk
+
+    def write_base64(self, name, f, report=None):
+        """ Write the base64 of a member into f, copying its stored encoding when there is one """
+        report = report or GenerationReport()
+        encoded_name = name + ".b64"
+        start = time.perf_counter()
+        if encoded_name in self.members:
+            for chunk in self.read_chunks(encoded_name):
+                start = report.timed('read', start)
+                f.write(chunk.decode('ascii'))
+                start = time.perf_counter()
+            return
+        for chunk in self.read_chunks(name):
+            start = report.timed('read', start)
+            encoded = base64.b64encode(chunk).decode('ascii')
+            report.timed('encode', start)
+            f.write(encoded)
+            start = time.perf_counter()
+
+# Opened bundles by path, opened again when their file changes
+_open_packs = {}
+
+def open_pack(path):
+    """ The QuizPack of a bundle file, shared while the file is unchanged """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _open_packs.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    pack = QuizPack(path)
+    _open_packs[path] = (stamp, pack)
+    return pack
+
+def source_info(path, audio_cache=None):
+    """ (identity, sha256, size) of an audio file or bundle member, or None if it is missing """
+    packed = split_pack_path(path)
+    if packed is not None:
+        try:
+            pack = open_pack(packed[0])
+        except (OSError, ValueError):
+            return None
+        entry = pack.audio.get(packed[1])
+        if entry is None or packed[1] not in pack.members:
+            return None
+        return (pack.path, packed[1], entry['sha256']), entry['sha256'], entry['size']
+
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    digest = audio_cache.content_hash(path) if audio_cache is not None else hash_file(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns), digest, st.st_size
+
+def source_size(path):
+    """ Size of a file or bundle member """
+    packed = split_pack_path(path)
+    if packed is not None:
+        return open_pack(packed[0]).members[packed[1]].file_size
+    return os.path.getsize(path)
+
+def source_chunks(path):
+    """ Yield the content of a file or bundle member in chunks """
+    packed = split_pack_path(path)
+    if packed is not None:
+        yield from open_pack(packed[0]).read_chunks(packed[1])
+        return
+    with open(path, 'rb') as source:
+        yield from iter(lambda: source.read(AUDIO_CHUNK_SIZE), b"")
+
+def write_source_base64(path, f, audio_cache=None, report=None):
+    """ Write the base64 of a file or bundle member into f """
+    packed = split_pack_path(path)
+    if packed is not None:
+        open_pack(packed[0]).write_base64(packed[1], f, report)
+    elif audio_cache is not None:
+        audio_cache.write_base64(path, f, report)
+    else:
+        write_base64_file(path, f, report)
+
+def copy_source(source, path):
+    """ Copy a file or bundle member to path """
+    if split_pack_path(source) is None:
+        shutil.copyfile(source, path)
+        return
+    with open(path, 'wb') as f:
+        for chunk in source_chunks(source):
+            f.write(chunk)
+
+def write_pack(quiz, path, audio_cache=None):
+    """ Save a quiz as a project bundle with the audio of its cards.
+
+    Each distinct clip is stored once, uncompressed and named by content hash,
+    with its base64 encoding next to it so pages are generated without
+    encoding it again. Cards whose audio file is missing keep their path.
+    """
+    load_zipfile()
+    config = quiz.to_config()
+    audio = {}
+    sources = {}
+    for card_config, card in zip(config['animals'], quiz.cards):
+        info = source_info(card.audio, audio_cache) if card.audio else None
+        if info is None:
+            continue
+        _, digest, size = info
+        member = f"audio/{digest}{os.path.splitext(card.audio)[1].lower()}"
+        card_config['audio'] = member
+        audio[member] = {'sha256': digest, 'size': size}
+        sources[member] = card.audio
+    manifest = {'format': PACK_FORMAT, 'quiz': config, 'audio': audio}
+
+    fd, temp_path = create_temp_file(os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(temp_path, 'w') as archive:
+            archive.writestr(zipfile.ZipInfo(PACK_MANIFEST), json.dumps(manifest, ensure_ascii=False, indent=2),
+                             compress_type=zipfile.ZIP_DEFLATED)
+            for member, source in sources.items():
+                with archive.open(zipfile.ZipInfo(member), 'w') as blob:
+                    for chunk in source_chunks(source):
+                        blob.write(chunk)
+                with io.TextIOWrapper(archive.open(zipfile.ZipInfo(member + ".b64"), 'w'), encoding='ascii') as encoded:
+                    write_source_base64(source, encoded, audio_cache)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def load_pack(path):
+    """ Quiz of a project bundle; its cards' audio paths point into the bundle """
+    pack = open_pack(path)
+    quiz = Quiz.from_config(pack.manifest.get('quiz', {}))
+    for card in quiz.cards:
+        if card.audio in pack.audio:
+            card.audio = f"{pack.path}/{card.audio}"
+    return quiz
+
+def load_quiz_file(path):
+    """ Quiz from a configuration file or a project bundle; a relative template path is taken from the file's folder """
+    if path.lower().endswith(PACK_EXTENSION):
+        quiz = load_pack(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            quiz = Quiz.from_config(json.load(f))
+    if quiz.template and not os.path.isabs(quiz.template):
+        quiz.template = os.path.join(os.path.dirname(os.path.abspath(path)), quiz.template)
+    return quiz
+
+def save_quiz_file(quiz, path, audio_cache=None):
+    """ Save a quiz as a configuration file, or as a project bundle by its extension """
+    if path.lower().endswith(PACK_EXTENSION):
+        write_pack(quiz, path, audio_cache)
+    else:
+        # Written to a temporary file first, so an interrupted save leaves the old file intact
+        write_file_atomic(path, json.dumps(quiz.to_config(), ensure_ascii=False, indent=2))
+
+def script_json(value):
+    """ Compact JSON for value that is also a JavaScript literal, safe inside a <script> element """
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace("<", "\\u003c")
+
+def fragment_key(*inputs):
+    """ Hash of the inputs a fragment of the page is rendered from """
+    return hashlib.sha256(repr(inputs).encode('utf-8')).hexdigest()
+
+class FragmentCache:
+    """ Rendered card and question fragments, keyed by a hash of their inputs.
+
+    A fragment is a list of text pieces plus ('base64', path, content_hash)
+    and ('asset', relative_path, source_path) entries, so embedded audio and
+    images are streamed from disk when the page is written rather than held in
+    memory. Only the fragments used by the latest build are kept. The cache
+    also remembers the inputs of each page it wrote, so a page whose inputs
+    did not change is not written again.
+    """
+    def __init__(self):
+        self.fragments = {}
+        self.pages = {}
+
+    def page_is_current(self, html_file, page_key):
+        try:
+            st = os.stat(html_file)
+        except OSError:
+            return False
+        return self.pages.get(html_file) == (page_key, st.st_size, st.st_mtime_ns)
+
+    def page_written(self, html_file, page_key):
+        st = os.stat(html_file)
+        self.pages[html_file] = (page_key, st.st_size, st.st_mtime_ns)
+
+def compile_template(text, name="the template"):
+    """ Split page template text into (literal_text, slot_name) parts; the last part's slot_name is None """
+    parts = []
+    position = 0
+    for match in TEMPLATE_SLOT_PATTERN.finditer(text):
+        slot_name = match.group(1)
+        if slot_name not in TEMPLATE_SLOTS:
+            raise ValueError(f"Unknown slot {match.group(0)} in {name}; the slots are " + ", ".join(TEMPLATE_SLOTS))
+        parts.append((text[position:match.start()], slot_name))
+        position = match.end()
+    parts.append((text[position:], None))
+    return parts
+
+# Compiled templates by (path, kind of page), kept for the life of the process
+_compiled_templates = {}
+
+def check_template(text, parts, kind, name):
+    """ Raise ValueError when a custom template lacks what pages of kind (see TEMPLATE_REQUIREMENTS) need """
+    requirements = TEMPLATE_REQUIREMENTS.get(kind, {})
+    slots = {slot_name for _, slot_name in parts}
+    missing = [f"{{{{{slot_name}}}}}" for slot_name in requirements.get('slots', ()) if slot_name not in slots]
+    missing += [f"page script code {code!r}" for code in requirements.get('code', ()) if code not in text]
+    if missing:
+        raise ValueError(f"{name} cannot be used for {kind} pages: it lacks " + ", ".join(missing) +
+                         f". Start from the built-in one (template --page {kind}).")
+
+def load_template(path="", builtin='default'):
+    """ The compiled page template at path, or the named built-in template; returns {'parts', 'key'}.
+
+    builtin also names the kind of page, which a template at path is checked
+    against. A template is compiled once per process, so every page of a batch
+    build or watch session shares it, and again only when its file changes.
+    """
+    stamp = None
+    if path:
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns)
+    cache_key = (path, builtin)
+    cached = _compiled_templates.get(cache_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = BUILTIN_TEMPLATES[builtin]
+    parts = compile_template(text, path or f"the built-in {builtin} template")
+    if path:
+        check_template(text, parts, builtin, path)
+    template = {
+        'parts': parts,
+        'key': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+    }
+    _compiled_templates[cache_key] = (stamp, template)
+    return template
+
+# Static code in template text: whole <style> and <script> elements, and the
+# rest of a script after its last slot when that slot ends its line
+INLINE_CODE_PATTERN = re.compile(r"<(style|script)>(.*?)</\1>", re.S)
+SCRIPT_OPEN_PATTERN = re.compile(r"<script(\s[^>]*)?>", re.I)
+
+# Templates with their code moved to files, by template key and asset URL
+_shared_code_templates = {}
+
+def share_template_code(template, asset_url=""):
+    """ A compiled template with its static styles and scripts moved out to files.
+
+    Each <style> and <script> element without slots becomes a link to a css/
+    or js/ file named by content hash, so pages sharing a template share the
+    files and browsers cache them once. The code after the last slot of an
+    inline script moves to a file of its own as well, which is safe when the
+    slots' statements end on their own lines, as in the built-in templates.
+    Returns (template, files), files mapping relative paths to their text.
+    """
+    cache_key = (template['key'], asset_url)
+    cached = _shared_code_templates.get(cache_key)
+    if cached is not None:
+        return cached
+
+    files = {}
+
+    def code_file(kind, code):
+        relative_path = f"{kind}/{hashlib.sha256(code.encode('utf-8')).hexdigest()[:16]}.{kind}"
+        files[relative_path] = code
+        if kind == 'css':
+            return f'<link rel="stylesheet" href="{asset_url}{relative_path}">'
+        return f'<script src="{asset_url}{relative_path}"></script>'
+
+    def move_code(match):
+        if not match.group(2).strip():
+            return match.group(0)
+        return code_file('css' if match.group(1) == 'style' else 'js', match.group(2))
+
+    parts = []
+    # Inside an inline <script> that a slot interrupted
+    in_script = False
+    for literal_text, slot_name in template['parts']:
+        head = ""
+        if in_script and "</script>" in literal_text:
+            end = literal_text.index("</script>")
+            code = literal_text[:end]
+            if code.strip() and "\n" in code[:len(code) - len(code.lstrip())]:
+                head = "</script>\n  " + code_file('js', code)
+            else:
+                head = literal_text[:end + len("</script>")]
+            literal_text = literal_text[end + len("</script>"):]
+            in_script = False
+        literal_text = head + INLINE_CODE_PATTERN.sub(move_code, literal_text)
+
+        # A script left open continues after the slot
+        opened = list(SCRIPT_OPEN_PATTERN.finditer(literal_text))
+        if opened and "</script>" not in literal_text[opened[-1].end():]:
+            in_script = opened[-1].group(1) is None
+        parts.append((literal_text, slot_name))
+
+    shared = ({'parts': parts, 'key': fragment_key(template['key'], asset_url, 'shared code')}, files)
+    _shared_code_templates[cache_key] = shared
+    return shared
+
+def service_worker_registration(script_url, scope):
+    return SERVICE_WORKER_REGISTRATION.replace("{{script_url}}", script_json(script_url)).replace("{{scope}}", script_json(scope))
+
+def add_service_worker(template, script_url, scope):
+    """ A compiled template that registers the service worker at script_url before its </body> """
+    registration = service_worker_registration(script_url, scope)
+    parts = list(template['parts'])
+    for index in range(len(parts) - 1, -1, -1):
+        literal_text, slot_name = parts[index]
+        end = literal_text.rfind("</body>")
+        if end >= 0:
+            parts[index] = (literal_text[:end] + registration + literal_text[end:], slot_name)
+            break
+    else:
+        parts[-1] = (parts[-1][0] + registration, None)
+    return {'parts': parts, 'key': fragment_key(template['key'], script_url, scope)}
+
+def render_page(quiz, success_audio="", audio_cache=None, asset_dir=None, images=None, fragment_cache=None, asset_url="",
+                share_code=False, service_worker=None):
+    """ Render the sections of the game page for a Quiz, for write_page.
+
+    Audio is embedded as base64 unless asset_dir is given; then each distinct
+    clip is written to its audio/ folder once, named by content hash, and the
+    page loads it on first play. Images found in images (as returned by
+    prepare_images) are inlined, or written to asset_dir's images/ folder.
+    Card and question fragments whose inputs are unchanged are taken from
+    fragment_cache. The page refers to asset files by their path under
+    asset_dir after asset_url, the folder's location relative to the page.
+    With share_code, the template's static styles and scripts are written to
+    asset_dir as well (see share_template_code). A service_worker dict from
+    service_worker_paths is registered by the page.
+
+    With the quiz's lazy_page setting, cards and questions are wrapped in
+    <template> chunks that the page mounts as they scroll into view, and every
+    audio element is kept outside them with its source in data-src until it
+    is first played. With its data_page setting, cards and questions are
+    written once as a JSON data island that a script in the page turns into
+    elements, with audio kept the same way. The page is laid out by the quiz's
+    template file, or the matching built-in template.
+    Returns a dict with the page key (a hash of everything the page is made
+    of), the compiled template, its sections (lists of fragment parts for the
+    template's slots, each card and question led by an ('item', role, index)
+    marker) and the generation statistics: duplicate audio clips
+    that were embedded only once and the bytes that saved, the asset files the
+    page uses and the fragments reused from the cache.
+    """
+    lazy = quiz.lazy_page
+    data_page = quiz.data_page
+    # Audio elements are kept apart from the cards, with their source set on first play
+    store_audio = lazy or data_page
+    template = load_template(quiz.template, 'data' if data_page else 'lazy' if lazy else 'default')
+    if share_code:
+        template, code_files = share_template_code(template, asset_url)
+    if service_worker is not None:
+        template = add_service_worker(template, service_worker['url'], service_worker['scope'])
+    animals = quiz.cards
+    questions = quiz.questions
+    animals_per_row = quiz.animals_per_row
+    images = images or {}
+    fragments = fragment_cache.fragments if fragment_cache is not None else {}
+    used_fragments = {}
+    stats = {'duplicate_audio': 0, 'dedup_saved_bytes': 0, 'asset_files': [], 'fragments_reused': 0}
+    # How fragments refer to audio and images: embedded, or by URL under asset_url
+    asset_base = None if asset_dir is None else asset_url
+
+    def write_asset_file(relative_path, write_data):
+        # Content-addressed, so an existing file is already up to date
+        stats['asset_files'].append(relative_path)
+        asset_file = os.path.join(asset_dir, relative_path)
+        if not os.path.exists(asset_file):
+            # Pages built side by side may write the same file, so each writes its own temporary file
+            fd, temp_file = create_temp_file(os.path.dirname(asset_file))
+            os.close(fd)
+            try:
+                write_data(temp_file)
+                os.replace(temp_file, asset_file)
+            except BaseException:
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+                raise
+        return asset_url + relative_path
+
+    if share_code:
+        for relative_path, text in code_files.items():
+            write_asset_file(relative_path, lambda path, text=text: Path(path).write_text(text, encoding='utf-8'))
+
+    def image_inputs(role, url):
+        image = images.get((role, url))
+        return None if image is None else (image['path'], image['sha256'], image['content_type'])
+
+    def write_image_src(out, role, url):
+        image = images.get((role, url))
+        if image is None:
+            out.append(url)
+        elif asset_dir is not None:
+            extension = mimetypes.guess_extension(image['content_type']) or os.path.splitext(urllib.parse.urlsplit(url).path)[1]
+            relative_path = f"images/{image['sha256'][:16]}{extension.lower()}"
+            out.append(('asset', relative_path, image['path']))
+            out.append(asset_url + relative_path)
+        else:
+            out.append(f"data:{image['content_type']};base64,")
+            out.append(('base64', image['path'], image['sha256']))
+
+    def fragment(key, render, *args):
+        # Reuse the fragment rendered from the same inputs, or render it now
+        parts = fragments.get(key)
+        if parts is None:
+            parts = []
+            render(parts, *args)
+        else:
+            stats['fragments_reused'] += 1
+        used_fragments[key] = parts
+        for part in parts:
+            if isinstance(part, tuple) and part[0] == 'asset':
+                write_asset_file(part[1], lambda path, source=part[2]: copy_source(source, path))
+        return parts
+
+    def lazy_chunk(parts, height):
+        # Inert until the page mounts it; the placeholder keeps the scroll length close
+        return [f'<div class="lazy-chunk" style="min-height: {height}px;"><template>\n'] + parts + ["</template></div>\n"]
+
+    def render_success_audio():
+        if asset_dir is not None:
+            src = ""
+            if success_audio:
+                success_audio_data = base64.b64decode(success_audio)
+                name = hashlib.sha256(success_audio_data).hexdigest()[:16] + ".mp3"
+                src = write_asset_file(f"audio/{name}", lambda path: Path(path).write_bytes(success_audio_data))
+            return [f""" 
+            <audio id="successAudio" preload="none" data-src="{src}" style="display: none;"></audio>
+            """]
+        if store_audio:
+            src = f"data:audio/mp3;base64,{success_audio}" if success_audio else ""
+            return [f""" 
+            <audio id="successAudio" preload="none" data-src="{src}" style="display: none;"></audio>
+            """]
+
+        return [f""" 
+            <audio id="successAudio" controls style="display: none;">
+              <source src="data:audio/mp3;base64,{success_audio}" type="audio/mp3">
+              Your browser does not support the audio element.
+            </audio>
+            """]
+
+    def render_card(out, i, animal, audio_id, audio_path, audio_ext, mime_type, digest):
+        if lazy:
+            # Played through the page's click handler; the audio element is in the audio store
+            out.append("""
+                <div class="animal-card">
+                    <img src=\"""")
+            write_image_src(out, 'card', animal.image_url)
+            out.append(f"""" alt="{animal.word}" data-audio="{audio_id}">
+                    <div class="animal-name">{animal.title}</div>
+                    <button class="repeat-btn" data-audio="{audio_id}">🔊 Repeat</button>
+                </div>
+                """)
+            return
+
+        out.append("""
+                <div class="animal-card">
+                    <img src=\"""")
+        write_image_src(out, 'card', animal.image_url)
+        out.append(f"""" alt="{animal.word}" onclick="playAudio('{audio_id}')">
+                    <div class="animal-name">{animal.title}</div>
+                    <button class="repeat-btn" onclick="playAudio('{audio_id}')">🔊 Repeat</button>
+""")
+
+        # A card repeating an earlier card's clip plays that card's audio element
+        own_audio = audio_id == f"audio_{i}"
+        if own_audio and asset_dir is not None:
+            src = ""
+            if digest is not None:
+                relative_path = f"audio/{digest[:16]}{audio_ext}"
+                out.append(('asset', relative_path, audio_path))
+                src = asset_url + relative_path
+            out.append(f"""                    <audio id="{audio_id}" preload="none" data-src="{src}"></audio>
+""")
+        elif own_audio:
+            out.append(f"""                    <audio id="{audio_id}">
+                        <source src="data:{mime_type};base64,""")
+            # Encode audio file to base64 straight into the output
+            if digest is not None:
+                out.append(('base64', audio_path, digest))
+            out.append(f"""" type="{mime_type}">
+                    </audio>
+""")
+
+        out.append("""                </div>
+                """)
+
+    def render_card_data(out, animal, audio_id):
+        out.append('{"image":"')
+        write_json_image_src(out, 'card', animal.image_url)
+        out.append('",' + script_json({'title': animal.title, 'word': animal.word, 'audio': audio_id})[1:])
+
+    def write_json_image_src(out, role, url):
+        # Inlined and local images give JSON-safe text
+        if images.get((role, url)) is None:
+            out.append(script_json(url)[1:-1])
+        else:
+            write_image_src(out, role, url)
+
+    def render_stored_audio(out, audio_id, audio_path, audio_ext, mime_type, digest):
+        # Audio element of a lazy or data page; its source is set on first play
+        if asset_dir is not None:
+            src = ""
+            if digest is not None:
+                relative_path = f"audio/{digest[:16]}{audio_ext}"
+                out.append(('asset', relative_path, audio_path))
+                src = asset_url + relative_path
+            out.append(f"""    <audio id="{audio_id}" preload="none" data-src="{src}"></audio>\n""")
+        elif digest is not None:
+            out.append(f"""    <audio id="{audio_id}" preload="none" data-src="data:{mime_type};base64,""")
+            out.append(('base64', audio_path, digest))
+            out.append(""""></audio>\n""")
+        else:
+            out.append(f"""    <audio id="{audio_id}" preload="none" data-src=""></audio>\n""")
+
+    def render_animals():
+        parts = []
+        # Rows of cards go straight into parts, or into lazy chunks of parts
+        rows = parts
+        audio_store = []
+        cards_per_chunk = animals_per_row * LAZY_CARD_ROWS_PER_CHUNK
+        # First card id for each distinct audio payload, so repeated clips are embedded once
+        shared_audio = {}
+
+        for i, animal in enumerate(animals):
+            if i % animals_per_row == 0 and not data_page:
+                if i > 0:
+                    rows.append("</div>\n")
+                if lazy and i % cards_per_chunk == 0:
+                    if i > 0:
+                        parts.extend(lazy_chunk(rows, LAZY_CARD_ROWS_PER_CHUNK * LAZY_CARD_ROW_HEIGHT))
+                    rows = []
+                rows.append("<div class=\"animals-container\">\n")
+
+            # Get file extension for MIME type
+            audio_path = animal.audio
+            audio_ext = os.path.splitext(audio_path)[1].lower() if audio_path else ""
+            mime_type = f"audio/{audio_ext[1:]}" if audio_ext else "audio/mpeg"
+
+            audio_id = f"audio_{i}"
+            digest = audio_identity = None
+            audio_info = source_info(audio_path, audio_cache) if audio_path else None
+            if audio_info is not None:
+                audio_identity, digest, audio_size = audio_info
+                audio_id = shared_audio.setdefault((digest, mime_type), audio_id)
+                if audio_id != f"audio_{i}":
+                    stats['duplicate_audio'] += 1
+                    stats['dedup_saved_bytes'] += audio_size if asset_dir is not None else base64_length(audio_size)
+
+            if data_page:
+                key = fragment_key('card data', animal.to_config(), audio_id, asset_base, image_inputs('card', animal.image_url))
+                card_data.append("," if i > 0 else "")
+                card_data.append(('item', 'card', i))
+                card_data.extend(fragment(key, render_card_data, animal, audio_id))
+            else:
+                key = fragment_key('card', i, animal.to_config(), audio_id, audio_identity, digest,
+                                   asset_base, image_inputs('card', animal.image_url), lazy)
+                rows.append(('item', 'card', i))
+                rows.extend(fragment(key, render_card, i, animal, audio_id, audio_path, audio_ext, mime_type, digest))
+            if store_audio and audio_id == f"audio_{i}":
+                key = fragment_key('card audio', audio_id, audio_identity, digest, audio_ext, asset_base)
+                audio_store.append(('item', 'card', i))
+                audio_store.extend(fragment(key, render_stored_audio, audio_id, audio_path, audio_ext, mime_type, digest))
+
+        if animals and not data_page:
+            rows.append("</div>\n")
+            if lazy:
+                last_cards = len(animals) - (len(animals) - 1) // cards_per_chunk * cards_per_chunk
+                last_rows = (last_cards + animals_per_row - 1) // animals_per_row
+                parts.extend(lazy_chunk(rows, last_rows * LAZY_CARD_ROW_HEIGHT))
+        if store_audio:
+            parts.append("<div id=\"audio-store\" hidden>\n")
+            parts.extend(audio_store)
+            parts.append("</div>\n")
+        return parts
+
+    def render_question_data(out, question):
+        out.append('{"image":"')
+        write_json_image_src(out, 'question', question.image_url)
+        out.append('",' + script_json({'text': question.text, 'answers': question.answers, 'correct': question.answer_index()})[1:])
+
+    def render_question(out, i, question):
+        answers_html = ""
+        for j, answer in enumerate(question.answers):
+            if lazy:
+                # Answered through the page's click handler
+                answers_html += f'<div class="answer" data-answer="{j}">{answer}</div>\n'
+            else:
+                answers_html += f'<div class="answer" onclick="checkAnswer({i+1}, {j})">{answer}</div>\n'
+
+        question_attributes = f' data-question="{i+1}"' if lazy else ""
+        out.append(f"""
+                <div class="question" id="q{i+1}"{question_attributes}>
+                    """)
+        # Add image if provided
+        if question.image_url:
+            out.append('<img src="')
+            write_image_src(out, 'question', question.image_url)
+            out.append('" alt="Question image" style="max-width: 300px; margin-bottom: 15px; border-radius: 15px;">')
+        out.append(f"""
+                    <div class="question-text">{question.text}</div>
+                    <div class="answers-container">
+                        {answers_html}
+                    </div>
+                    <div class="feedback" id="feedback{i+1}"></div>
+                </div>
+                """)
+
+    # Cards and questions of a data page, as JSON
+    card_data = []
+    question_data = []
+
+    # One pass over the questions renders their HTML and the script data
+    questions_parts = []
+    # Questions of the current lazy chunk
+    chunk = questions_parts
+    correct_answers_parts = ["const correctAnswers = {\n"]
+    # Correct answer text for audio
+    correct_answer_text_parts = ["const correctAnswerText = {\n"]
+    for i, question in enumerate(questions):
+        if data_page:
+            # The page builds the question and its answer data from the data island
+            key = fragment_key('question data', question.text, question.image_url, question.answers, question.answer_index(),
+                               asset_base, image_inputs('question', question.image_url))
+            question_data.append("," if i > 0 else "")
+            question_data.append(('item', 'question', i))
+            question_data.extend(fragment(key, render_question_data, question))
+            continue
+
+        if lazy and i % LAZY_QUESTIONS_PER_CHUNK == 0:
+            if i > 0:
+                questions_parts.extend(lazy_chunk(chunk, LAZY_QUESTIONS_PER_CHUNK * LAZY_QUESTION_HEIGHT))
+            chunk = []
+        key = fragment_key('question', i, question.text, question.image_url, question.answers,
+                           asset_base, image_inputs('question', question.image_url), lazy)
+        chunk.append(('item', 'question', i))
+        chunk.extend(fragment(key, render_question, i, question))
+
+        answers = question.answers
+        correct_index = question.answer_index()
+        correct_answers_parts.append(f"    {i+1}: {correct_index},\n")
+        if 0 <= correct_index < len(answers):
+            correct_answer_text_parts.append(f"    {i+1}: {script_json(answers[correct_index])},\n")
+    if lazy and questions:
+        last_count = len(questions) - (len(questions) - 1) // LAZY_QUESTIONS_PER_CHUNK * LAZY_QUESTIONS_PER_CHUNK
+        questions_parts.extend(lazy_chunk(chunk, last_count * LAZY_QUESTION_HEIGHT))
+    correct_answers_parts.append("};\n")
+    correct_answer_text_parts.append("};\n")
+
+    sections = {
+        'successAudioEncoded': render_success_audio(),
+        'animals_html': render_animals(),
+        'questions_html': questions_parts,
+        'correct_answers_js': correct_answers_parts,
+        'correct_answer_text_js': correct_answer_text_parts,
+        'quiz_data': [],
+    }
+    if data_page:
+        settings = {
+            'perRow': animals_per_row,
+            'lazy': lazy,
+            'cardsPerChunk': animals_per_row * LAZY_CARD_ROWS_PER_CHUNK,
+            'questionsPerChunk': LAZY_QUESTIONS_PER_CHUNK,
+        }
+        sections['quiz_data'] = ([script_json(settings)[:-1] + ',"cards":['] + card_data
+                                 + ['],"questions":['] + question_data + [']}'])
+        sections['correct_answers_js'] = sections['correct_answer_text_js'] = []
+    if fragment_cache is not None:
+        fragment_cache.fragments = used_fragments
+
+    # The key covers the template and the text of every section, with embedded files by content hash
+    page_hash = hashlib.sha256(template['key'].encode('ascii'))
+    for field_name in sections:
+        for part in sections[field_name]:
+            if isinstance(part, str):
+                page_hash.update(part.encode('utf-8'))
+            elif part[0] == 'base64':
+                page_hash.update(part[2].encode('ascii'))
+    return {'key': page_hash.hexdigest(), 'template': template['parts'], 'sections': sections, 'stats': stats}
+
+class GenerationCancelled(Exception):
+    """ Raised by write_page when its cancel event is set """
+
+def write_page(page, f, audio_cache=None, progress=None, cancel=None, report=None):
+    """ Stream a page from render_page into f.
+
+    progress, if given, is called as progress(bytes_written, bytes_total,
+    files_encoded, files_total) as embedded files are written. Setting the
+    cancel event stops the write with GenerationCancelled. Times and bytes per
+    card and question are added to report.
+    """
+    report = report or GenerationReport()
+    f = ReportWriter(f, report)
+    bytes_total = sum(len(literal_text) for literal_text, _ in page['template'])
+    files_total = 0
+    for parts in page['sections'].values():
+        for part in parts:
+            if isinstance(part, str):
+                bytes_total += len(part)
+            elif part[0] == 'base64':
+                bytes_total += base64_length(source_size(part[1]))
+                files_total += 1
+    bytes_written = files_encoded = 0
+
+    def end_item(item):
+        # Added up, as a card's audio on a lazy page is written apart from the card
+        sizes = report.items[item[0]]
+        sizes[item[1]] = sizes.get(item[1], 0) + report.bytes_written - item[2]
+
+    def write_parts(parts):
+        nonlocal bytes_written, files_encoded
+        item = None
+        for part in parts:
+            if cancel is not None and cancel.is_set():
+                raise GenerationCancelled()
+            if isinstance(part, str):
+                f.write(part)
+                bytes_written += len(part)
+            elif part[0] == 'item':
+                # A card or question starts; the previous one ends
+                if item is not None:
+                    end_item(item)
+                item = (part[1], part[2], report.bytes_written)
+            elif part[0] == 'base64':
+                write_source_base64(part[1], f, audio_cache, report)
+                bytes_written += base64_length(source_size(part[1]))
+                files_encoded += 1
+                if progress is not None:
+                    progress(bytes_written, bytes_total, files_encoded, files_total)
+        if item is not None:
+            end_item(item)
+
+    # Write the template text between the slots, and each slot's section as it comes up
+    for literal_text, slot_name in page['template']:
+        f.write(literal_text)
+        if slot_name is not None:
+            write_parts(page['sections'][slot_name])
+    if progress is not None:
+        progress(bytes_total, bytes_total, files_encoded, files_total)
+
+# Asset folders of the folder output mode
+ASSET_FOLDERS = ("audio", "images")
+
+# The site output mode writes pages side by side, sharing one folder of
+# content-addressed audio, images, styles and scripts that browsers may keep
+SITE_ASSET_DIR = "assets"
+SITE_ASSET_FOLDERS = ASSET_FOLDERS + ("css", "js")
+SITE_INDEX = "index.html"
+# Cache rules for static hosts that read a _headers file (Netlify, Cloudflare Pages)
+SITE_HEADERS = f"""/{SITE_ASSET_DIR}/*
+  Cache-Control: public, max-age=31536000, immutable
+"""
+
+# Service worker of offline games; {{precache}} is the precache manifest. The
+# browser installs a new version whenever the manifest changes, and that
+# version downloads only the files whose revision changed
+SERVICE_WORKER_SCRIPT = """// عامل الخدمة: يحفظ الاختبار وملفاته ليعمل دون اتصال
+const PRECACHE = {{precache}};
+// كل صفحة لها مخزنها الخاص
+const PRECACHE_NAME = 'quiz-precache ' + self.registration.scope;
+const RUNTIME_NAME = 'quiz-runtime ' + self.registration.scope;
+// إصدارات الملفات المحفوظة
+const REVISIONS_URL = new URL('__precache-revisions', self.registration.scope).href;
+
+function absolute(url) {
+  return new URL(url, self.location).href;
+}
+
+async function storedRevisions(cache) {
+  const stored = await cache.match(REVISIONS_URL);
+  return stored ? await stored.json() : {};
+}
+
+self.addEventListener('install', function (event) {
+  event.waitUntil((async function () {
+    const cache = await caches.open(PRECACHE_NAME);
+    const revisions = await storedRevisions(cache);
+    // تنزيل الملفات الجديدة أو المتغيرة فقط
+    await Promise.all(Object.entries(PRECACHE.entries).map(async function ([url, revision]) {
+      if (revisions[url] === revision && await cache.match(absolute(url))) {
+        return;
+      }
+      const response = await fetch(absolute(url), { cache: 'no-cache' });
+      if (!response.ok) {
+        throw new Error('Could not download ' + url);
+      }
+      await cache.put(absolute(url), response);
+      revisions[url] = revision;
+    }));
+    await cache.put(REVISIONS_URL, new Response(JSON.stringify(revisions)));
+
+    // الصور من مواقع أخرى تحفظ كما هي، والفشل لا يمنع التثبيت
+    const runtime = await caches.open(RUNTIME_NAME);
+    await Promise.all(PRECACHE.remote.map(async function (url) {
+      if (await runtime.match(url)) {
+        return;
+      }
+      try {
+        await runtime.put(url, await fetch(url, { mode: 'no-cors' }));
+      } catch (error) {
+        // تحفظ عند أول عرض لها
+      }
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', function (event) {
+  event.waitUntil((async function () {
+    // حذف الملفات التي لم تعد مستخدمة
+    const cache = await caches.open(PRECACHE_NAME);
+    const revisions = await storedRevisions(cache);
+    const wanted = {};
+    for (const url of Object.keys(PRECACHE.entries)) {
+      wanted[absolute(url)] = true;
+    }
+    for (const request of await cache.keys()) {
+      if (request.url !== REVISIONS_URL && !wanted[request.url]) {
+        await cache.delete(request);
+      }
+    }
+    for (const url of Object.keys(revisions)) {
+      if (!(url in PRECACHE.entries)) {
+        delete revisions[url];
+      }
+    }
+    await cache.put(REVISIONS_URL, new Response(JSON.stringify(revisions)));
+
+    const runtime = await caches.open(RUNTIME_NAME);
+    for (const request of await runtime.keys()) {
+      if (!PRECACHE.remote.includes(request.url)) {
+        await runtime.delete(request);
+      }
+    }
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', function (event) {
+  const request = event.request;
+  if (request.method !== 'GET' || !request.url.startsWith('http')) {
+    return;
+  }
+  event.respondWith((async function () {
+    let url = request.url.split('#')[0];
+    if (request.mode === 'navigate') {
+      url = url.split('?')[0];
+      if (url.endsWith('/')) {
+        url += 'index.html';
+      }
+    }
+    const cached = await (await caches.open(PRECACHE_NAME)).match(url);
+    if (cached) {
+      return cached;
+    }
+    const runtime = await caches.open(RUNTIME_NAME);
+    const stored = await runtime.match(request.url);
+    if (stored) {
+      return stored;
+    }
+    const response = await fetch(request);
+    if (PRECACHE.remote.includes(request.url) && (response.ok || response.type === 'opaque')) {
+      await runtime.put(request.url, response.clone());
+    }
+    return response;
+  })());
+});
+"""
+
+# Registers a page's service worker, added before </body>; file:// pages cannot have one.
+# {{script_url}} and {{scope}} are JavaScript strings
+SERVICE_WORKER_REGISTRATION = """  <script>
+    // حفظ الاختبار للعمل دون اتصال
+    if ('serviceWorker' in navigator && location.protocol !== 'file:') {
+      navigator.serviceWorker.register({{script_url}}, { scope: {{scope}} });
+    }
+  </script>
+"""
+
+class CompressedPayloadWriter:
+    """ Text file wrapper that gzips what is written and passes it on to f as base64 """
+    def __init__(self, f):
+        self.f = f
+        self.compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        # Compressed bytes waiting for a multiple of 3, so the base64 pieces join up
+        self.pending = b""
+
+    def write(self, text):
+        self.write_compressed(self.compressor.compress(text.encode('utf-8')))
+
+    def write_compressed(self, data):
+        data = self.pending + data
+        usable = len(data) - len(data) % 3
+        self.pending = data[usable:]
+        if usable:
+            self.f.write(base64.b64encode(data[:usable]).decode('ascii'))
+
+    def close(self):
+        self.write_compressed(self.compressor.flush())
+        self.f.write(base64.b64encode(self.pending).decode('ascii'))
+        self.pending = b""
+
+def update_precompressed(path, enabled):
+    """ Write path.gz, and path.br when brotli is installed, for static web servers.
+
+    Copies that are not wanted (or cannot be made) are removed, so a server
+    never serves a stale one. Returns the files written.
+    """
+    brotli = None
+    if enabled:
+        try:
+            import brotli
+        except ImportError:
+            pass
+
+    written = []
+    for suffix, wanted in ((".gz", enabled), (".br", brotli is not None)):
+        target = path + suffix
+        if not wanted:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+            continue
+
+        temp_file = f"{target}.{os.getpid()}.tmp"
+        try:
+            with open(path, 'rb') as source, open(temp_file, 'wb') as raw:
+                if suffix == ".gz":
+                    import gzip
+                    # mtime 0 and no file name, so unchanged pages give identical files
+                    with gzip.GzipFile(filename="", mode='wb', fileobj=raw, compresslevel=COMPRESS_LEVEL, mtime=0) as compressed:
+                        shutil.copyfileobj(source, compressed, AUDIO_CHUNK_SIZE)
+                else:
+                    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+                    while True:
+                        chunk = source.read(AUDIO_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        raw.write(compressor.process(chunk))
+                    raw.write(compressor.finish())
+            os.replace(temp_file, target)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+        written.append(target)
+    return written
+
+def service_worker_paths(html_file, output_mode):
+    """ Where the service worker of a page goes and how the page registers it.
+
+    A folder or site has one service worker for all of it; a single page gets
+    its own, next to it and limited to it, so pages in one folder stay apart.
+    Returns a dict of the 'script' and precache 'manifest' paths, the script's
+    'url' and the 'scope' relative to the page, and the page's 'page_url'
+    relative to the script.
+    """
+    folder, name = os.path.split(html_file)
+    if output_mode in ('folder', 'site'):
+        return {'script': os.path.join(folder, "sw.js"), 'manifest': os.path.join(folder, "precache-manifest.json"),
+                'url': "sw.js", 'scope': "./", 'page_url': name}
+    stem = os.path.splitext(name)[0]
+    return {'script': os.path.join(folder, stem + ".sw.js"), 'manifest': os.path.join(folder, stem + ".precache.json"),
+            'url': stem + ".sw.js", 'scope': "./" + name, 'page_url': name}
+
+def page_precache(html_file, page_url, asset_url, asset_files, remote_urls):
+    """ Precache entries of a page: its own file and assets by revision, and remote images """
+    entries = {page_url: hash_file(html_file)[:16]}
+    for relative_path in asset_files:
+        # Assets are named by content hash
+        entries[asset_url + relative_path] = os.path.splitext(os.path.basename(relative_path))[0]
+    return {'entries': entries, 'remote': list(remote_urls)}
+
+def update_service_worker(paths, precache):
+    """ Write the service worker and precache manifest at paths, or remove them when precache is None.
+
+    The manifest lists every file the pages need with its revision, plus
+    their remote images, and is built into the script as well so browsers
+    see a new version whenever a revision changes. Returns the files written.
+    """
+    if precache is None:
+        for path in (paths['script'], paths['manifest']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return []
+    manifest = {
+        'version': fragment_key(precache['entries'], precache['remote'])[:16],
+        'entries': precache['entries'],
+        'remote': precache['remote'],
+    }
+    write_file_atomic(paths['manifest'], json.dumps(manifest, ensure_ascii=False, indent=2))
+    write_file_atomic(paths['script'], SERVICE_WORKER_SCRIPT.replace("{{precache}}", script_json(manifest)))
+    return [paths['script'], paths['manifest']]
+
+def resolve_output(output_file, output_mode):
+    """ (HTML file, asset folder or None) for an output file and mode """
+    if output_mode == 'folder':
+        # A folder named after the output file, holding index.html, audio/ and images/
+        folder = os.path.splitext(output_file)[0]
+        return os.path.join(folder, "index.html"), folder
+    if output_mode == 'site':
+        # The page in the site folder, next to the assets/ folder it shares with the other pages
+        return output_file, os.path.join(os.path.dirname(output_file), SITE_ASSET_DIR)
+    return output_file, None
+
+def generate(quiz, output_file, success_audio="", audio_cache=None, output_mode=None, image_cache=None, fragment_cache=None,
+             progress=None, cancel=None, profile=False):
+    """ Write the game for a Quiz in its output mode; returns render_page's stats.
+
+    With the quiz's localize_images setting, card and question images are
+    downloaded first (through image_cache), shrunk to their display size and
+    stored with the page. With a fragment_cache, unchanged cards and questions
+    are not rendered again and an unchanged page is not rewritten; the stats
+    then have 'unchanged' set. progress and cancel are passed to write_page;
+    the page is written to a temporary file that replaces the output only when
+    complete, so a cancelled or failed run leaves the previous page in place.
+
+    The 'compressed' output mode writes a single file holding the gzipped page,
+    which the browser expands with DecompressionStream. With the quiz's
+    precompress setting, .gz (and .br) copies of the page are written next to
+    it for static web servers. With its offline setting, a service worker
+    and precache manifest are written for the page (see
+    service_worker_paths). The 'site' output mode writes the page into a
+    site folder whose assets/ it shares with other pages (see build_site);
+    assets there are not cleaned up per page.
+
+    The stats include a 'report' of the time per phase and bytes per card and
+    question, which the quiz's write_report setting also saves next to the
+    page. With profile, the run is captured by cProfile and tracemalloc and
+    the results saved next to the page as well.
+    """
+    output_mode = output_mode or quiz.output_mode
+    html_file, asset_dir = resolve_output(output_file, output_mode)
+    if profile:
+        base_path = os.path.splitext(html_file)[0]
+        stats = capture_profile(
+            lambda: generate(quiz, output_file, success_audio, audio_cache, output_mode, image_cache, fragment_cache, progress, cancel),
+            base_path
+        )
+        stats['profile_files'] = [base_path + ".prof", base_path + ".memory.txt"]
+        return stats
+
+    report = GenerationReport()
+    generation_start = time.perf_counter()
+    cache_counts = (audio_cache.hits, audio_cache.misses) if audio_cache is not None else (0, 0)
+    site = output_mode == 'site'
+    if asset_dir is not None:
+        for folder in SITE_ASSET_FOLDERS if site else ASSET_FOLDERS:
+            os.makedirs(os.path.join(asset_dir, folder), exist_ok=True)
+
+    images, image_stats = {}, {}
+    if quiz.localize_images:
+        start = time.perf_counter()
+        image_cache = image_cache or ImageCache()
+        fetched, image_stats = fetch_images(image_urls(quiz), image_cache)
+        images, image_stats['image_bytes_saved'] = prepare_images(quiz, fetched, image_cache)
+        report.timed('images', start)
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled()
+
+    start = time.perf_counter()
+    asset_url = SITE_ASSET_DIR + "/" if site else ""
+    service_worker = service_worker_paths(html_file, output_mode) if quiz.offline else None
+    page = render_page(quiz, success_audio, audio_cache, asset_dir, images, fragment_cache, asset_url, site, service_worker)
+    report.timed('render', start)
+    stats = page['stats']
+    stats['precompressed_files'] = []
+    # The same sections give a different file in the compressed mode or with precompressed copies
+    page_key = fragment_key(page['key'], output_mode, quiz.precompress)
+    stats['unchanged'] = fragment_cache is not None and fragment_cache.page_is_current(html_file, page_key)
+    if not stats['unchanged']:
+        temp_file = f"{html_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                if output_mode == 'compressed':
+                    f.write(COMPRESSED_PAGE_HEAD)
+                    payload = CompressedPayloadWriter(f)
+                    write_page(page, payload, audio_cache, progress, cancel, report)
+                    payload.close()
+                    f.write(COMPRESSED_PAGE_TAIL)
+                else:
+                    write_page(page, f, audio_cache, progress, cancel, report)
+                # Flushing and replacing the file count as finalizing
+                start = time.perf_counter()
+            os.replace(temp_file, html_file)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+        start = report.timed('finalize', start)
+        stats['precompressed_files'] = update_precompressed(html_file, quiz.precompress)
+        start = report.timed('compress', start)
+        if fragment_cache is not None:
+            fragment_cache.page_written(html_file, page_key)
+    else:
+        start = time.perf_counter()
+
+    if asset_dir is not None and not site:
+        # Remove assets left over from earlier builds
+        asset_files = set(stats['asset_files'])
+        for folder in ASSET_FOLDERS:
+            for name in os.listdir(os.path.join(asset_dir, folder)):
+                if f"{folder}/{name}" not in asset_files:
+                    os.remove(os.path.join(asset_dir, folder, name))
+    report.timed('finalize', start)
+    stats.update(image_stats)
+    stats['html_file'] = html_file
+
+    # Images left remote are cached by the service worker as they are
+    localized = {url for _, url in images}
+    stats['precache'] = None
+    if quiz.offline:
+        stats['precache'] = page_precache(html_file, service_worker['page_url'], asset_url, stats['asset_files'],
+                                          [url for url in image_urls(quiz) if url not in localized])
+    # A site's service worker covers all its pages and is written with its index
+    stats['service_worker_files'] = []
+    if not site:
+        stats['service_worker_files'] = update_service_worker(service_worker_paths(html_file, output_mode), stats['precache'])
+
+    stats['report'] = dict(
+        report.as_dict(quiz, time.perf_counter() - generation_start),
+        html_file=html_file,
+        output_mode=output_mode,
+        output_bytes=os.path.getsize(html_file),
+        precompressed_files={path: os.path.getsize(path) for path in stats['precompressed_files']},
+        service_worker_files=stats['service_worker_files'],
+        generated_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        unchanged=stats['unchanged'],
+        fragments_reused=stats['fragments_reused'],
+        duplicate_audio=stats['duplicate_audio'],
+        dedup_saved_bytes=stats['dedup_saved_bytes'],
+        audio_cache_hits=(audio_cache.hits if audio_cache is not None else 0) - cache_counts[0],
+        audio_cache_misses=(audio_cache.misses if audio_cache is not None else 0) - cache_counts[1],
+        **{name: image_stats[name] for name in ('images', 'images_from_cache', 'images_failed', 'image_fetch_seconds') if name in image_stats}
+    )
+    if quiz.write_report:
+        stats['report_file'] = os.path.splitext(html_file)[0] + ".report.json"
+        write_file_atomic(stats['report_file'], json.dumps(stats['report'], ensure_ascii=False, indent=2))
+    return stats
+
+def capture_profile(function, base_path):
+    """ Run function under cProfile and tracemalloc; saves base_path.prof and base_path.memory.txt """
+    import cProfile
+    import tracemalloc
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        return profiler.runcall(function)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        profiler.dump_stats(base_path + ".prof")
+        with open(base_path + ".memory.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {format_size(peak)}\n\nLargest allocations by line:\n")
+            for statistic in snapshot.statistics('lineno')[:30]:
+                f.write(f"{statistic}\n")
+
+def format_report_summary(report):
+    """ A few lines summarizing a generation report """
+    phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report['phases'].items() if seconds >= 0.005)
+    lines = [f"{report['total_seconds']:.2f}s in total" + (f": {phases}" if phases else "")]
+    if report['unchanged']:
+        lines.append("Nothing changed, so the page was not written again")
+    else:
+        lines.append(f"{format_size(report['bytes_written'])} written")
+    for role, field, label in (('cards', 'title', "Largest cards"), ('questions', 'text', "Largest questions")):
+        items = sorted((item for item in report[role] if item['bytes']), key=lambda item: item['bytes'], reverse=True)[:3]
+        if items:
+            lines.append(f"{label}: " + ", ".join(f"#{item['index'] + 1} {item[field][:20]} ({format_size(item['bytes'])})" for item in items))
+    return "\n".join(lines)
+
+# Bank columns read for each field when no mapping names one, by lower-cased header
+BANK_COLUMNS = {
+    'image_url': ('image_url', 'image', 'picture'),
+    'title': ('title', 'name'),
+    'word': ('word', 'speak'),
+    'audio': ('audio', 'audio_path', 'sound'),
+    'text': ('text', 'question'),
+    'answers': ('answers', 'choices', 'options'),
+    'correct_index': ('correct_index', 'correct', 'answer_index'),
+}
+# Numbered answer columns such as answer1, answer_2 or option3
+BANK_ANSWER_COLUMN = re.compile(r"^(answer|choice|option)_?(\d+)$")
+# Separator of the answers in a single CSV cell
+ANSWER_SEPARATOR = "|"
+# Rows read between progress reports of an import
+IMPORT_PROGRESS_ROWS = 1000
+# Rejected rows an import describes; the rest are only counted
+IMPORT_REJECTED_SHOWN = 10
+
+def read_bank_rows(path, progress=None):
+    """ Yield the rows of a CSV or JSONL (.jsonl, .ndjson) bank as dicts, one at a time.
+
+    progress, if given, is called as progress(bytes_read, bytes_total, rows_read)
+    every IMPORT_PROGRESS_ROWS rows and at the end.
+    """
+    bytes_total = os.path.getsize(path)
+    bytes_read = rows_read = 0
+
+    with open(path, 'rb') as f:
+        def lines():
+            nonlocal bytes_read
+            for raw_line in f:
+                # Only the first line can start with a byte order mark
+                encoding = 'utf-8-sig' if bytes_read == 0 else 'utf-8'
+                bytes_read += len(raw_line)
+                yield raw_line.decode(encoding)
+
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            def rows():
+                for number, line in enumerate(lines(), 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"{path}, line {number}: {e}")
+                    if not isinstance(row, dict):
+                        raise ValueError(f"{path}, line {number}: expected a JSON object")
+                    yield row
+        else:
+            import csv
+            def rows():
+                try:
+                    yield from csv.DictReader(lines())
+                except csv.Error as e:
+                    raise ValueError(f"{path}: {e}")
+
+        for row in rows():
+            yield row
+            rows_read += 1
+            if progress is not None and rows_read % IMPORT_PROGRESS_ROWS == 0:
+                progress(bytes_read, bytes_total, rows_read)
+    if progress is not None:
+        progress(bytes_total, bytes_total, rows_read)
+
+def bank_mapping(columns, mapping=None):
+    """ Field -> column for a bank's columns; answers map to a list of columns.
+
+    Fields missing from mapping are looked up by the BANK_COLUMNS names, and
+    answers also by numbered columns (answer1, answer2, ...).
+    """
+    mapping = dict(mapping or {})
+    by_name = {str(column).strip().lower(): column for column in columns}
+    for field, names in BANK_COLUMNS.items():
+        if field not in mapping:
+            column = next((by_name[name] for name in names if name in by_name), None)
+            if column is not None:
+                mapping[field] = column
+    if 'answers' not in mapping:
+        numbered = sorted((int(match.group(2)), column) for name, column in by_name.items()
+                          for match in [BANK_ANSWER_COLUMN.match(name)] if match)
+        if numbered:
+            mapping['answers'] = [column for _, column in numbered]
+    if isinstance(mapping.get('answers'), str) and "," in mapping['answers']:
+        mapping['answers'] = [column.strip() for column in mapping['answers'].split(",")]
+    return mapping
+
+def bank_row_kind(row, mapping, kind='auto'):
+    """ 'card' or 'question' for a bank row; with kind 'auto', rows with question text are questions """
+    if kind != 'auto':
+        return 'question' if kind == 'questions' else 'card'
+    text = row.get(mapping['text']) if 'text' in mapping else None
+    return 'question' if text not in (None, "") else 'card'
+
+def bank_item(row, mapping, row_kind, base_dir=""):
+    """ Card or Question from one bank row; relative audio paths are taken from base_dir """
+    def value(field):
+        column = mapping.get(field)
+        data = row.get(column) if column is not None else None
+        return "" if data is None else data
+
+    if row_kind == 'card':
+        audio = str(value('audio')).strip()
+        if audio and not os.path.isabs(audio):
+            audio = os.path.join(base_dir, audio)
+        return Card(str(value('image_url')).strip(), str(value('title')), str(value('word')), audio)
+
+    columns = mapping.get('answers')
+    if isinstance(columns, list):
+        answers = [str(row[column]) for column in columns if row.get(column) not in (None, "")]
+    else:
+        answers = value('answers')
+        if not isinstance(answers, list):
+            answers = [answer.strip() for answer in str(answers).split(ANSWER_SEPARATOR)] if answers != "" else []
+    try:
+        correct_index = int(value('correct_index'))
+    except (TypeError, ValueError):
+        correct_index = None
+    return Question.from_config({
+        'image_url': str(value('image_url')).strip(),
+        'text': str(value('text')),
+        'answers': answers,
+        'correct_index': correct_index,
+    })
+
+def import_bank(paths, mapping=None, kind='auto', where=None, limit=None, sample=None, seed=None, progress=None):
+    """ Cards and questions from CSV or JSONL banks, streamed row by row.
+
+    Only rows whose columns equal the values in where are used. limit keeps
+    the first matching cards and the first matching questions, sample picks
+    that many of each at random (seeded by seed), in bank order. Rows are read
+    one at a time and only the chosen ones are kept, so memory use follows
+    the size of the selection rather than of the banks. JSONL rows may each
+    have their own fields, so columns are matched to fields per set of keys.
+    Questions with fewer than two answers are rejected rather than imported.
+    progress is called as progress(path, bytes_read, bytes_total, rows_read).
+
+    Returns (cards, questions, stats) with the rows read, matched and
+    rejected, and 'rejected_rows' describing the first rejected ones.
+    """
+    where = where or {}
+    rng = random.Random(seed)
+    # Chosen (row number, item) pairs and matching row counts, by kind
+    chosen = {'card': [], 'question': []}
+    matched = {'card': 0, 'question': 0}
+    rows_read = rejected = 0
+    rejected_rows = []
+    # Field -> column mappings by the row keys they were made for
+    mappings = {}
+
+    for path in paths:
+        base_dir = os.path.dirname(os.path.abspath(path))
+        file_progress = (lambda *counts, path=path: progress(path, *counts)) if progress is not None else None
+        for row_number, row in enumerate(read_bank_rows(path, file_progress), 1):
+            rows_read += 1
+            keys = tuple(row.keys())
+            row_mapping = mappings.get(keys)
+            if row_mapping is None:
+                row_mapping = mappings[keys] = bank_mapping(keys, mapping)
+            if any(str(row.get(column, "")).strip() != value for column, value in where.items()):
+                continue
+            if not any(value not in (None, "") for value in row.values()):
+                continue
+
+            row_kind = bank_row_kind(row, row_mapping, kind)
+            item = bank_item(row, row_mapping, row_kind, base_dir)
+            if row_kind == 'question' and len(item.answers) < 2:
+                rejected += 1
+                if len(rejected_rows) < IMPORT_REJECTED_SHOWN:
+                    rejected_rows.append(f"{path}, row {row_number}: a question needs at least two answers, found {len(item.answers)}")
+                continue
+            count = matched[row_kind]
+            matched[row_kind] += 1
+            items = chosen[row_kind]
+            if sample is not None:
+                # Reservoir sampling keeps a uniform choice of sample rows
+                if count < sample:
+                    items.append((rows_read, item))
+                else:
+                    slot = rng.randrange(count + 1)
+                    if slot < sample:
+                        items[slot] = (rows_read, item)
+            elif limit is None or count < limit:
+                items.append((rows_read, item))
+
+    cards = [item for _, item in sorted(chosen['card'], key=lambda pair: pair[0])]
+    questions = [item for _, item in sorted(chosen['question'], key=lambda pair: pair[0])]
+    stats = {'rows': rows_read, 'matched_cards': matched['card'], 'matched_questions': matched['question'],
+             'rejected': rejected, 'rejected_rows': rejected_rows}
+    return cards, questions, stats
+
+def parse_pairs(pairs, what):
+    """ Dict from NAME=VALUE strings """
+    result = {}
+    for pair in pairs or []:
+        name, separator, value = pair.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Expected {what} as NAME=VALUE, got {pair!r}")
+        result[name.strip()] = value.strip()
+    return result
+
+def import_banks(paths, output_path, mapping=None, kind='auto', where=None, limit=None, sample=None, seed=None,
+                 base_config=None, build=False):
+    """ Write a configuration made from banks, and with build also its page; prints progress """
+    def progress(path, bytes_read, bytes_total, rows_read):
+        percent = bytes_read * 100 // bytes_total if bytes_total else 100
+        print(f"\r{path}: {percent}%, {rows_read} row(s)", end="", file=sys.stderr)
+        if bytes_read == bytes_total:
+            print(file=sys.stderr)
+
+    try:
+        quiz = Quiz()
+        if base_config:
+            quiz = load_quiz_file(base_config)
+        cards, questions, stats = import_bank(paths, mapping, kind, where, limit, sample, seed, progress)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+
+    quiz.cards.extend(cards)
+    quiz.questions.extend(questions)
+    quiz.output_file = os.path.splitext(output_path)[0] + ".html"
+    write_file_atomic(output_path, json.dumps(quiz.to_config(), ensure_ascii=False, indent=2))
+    print(f"Read {stats['rows']} row(s): {stats['matched_cards']} card(s) and {stats['matched_questions']} question(s) matched, "
+          f"{len(cards)} card(s) and {len(questions)} question(s) imported into {output_path}")
+    if stats['rejected']:
+        print(f"Rejected {stats['rejected']} row(s):", file=sys.stderr)
+        for line in stats['rejected_rows']:
+            print(f"     {line}", file=sys.stderr)
+    if build:
+        return build_configs([output_path], jobs=1)
+    return 0
+
+# Success audio for the current batch worker process, encoded on first use
+_worker_success_audio = None
+
+def build_config(config_path, output_path, use_cache=True, output_mode=None, localize_images=False, write_report=False, profile=False,
+                 precompress=False, template=None, lazy_page=False, data_page=False, offline=False):
+    """ Render one saved configuration to output_path; returns (seconds, error, stats) """
+    global _worker_success_audio
+    start = time.perf_counter()
+    try:
+        audio_cache = AudioCache() if use_cache else None
+        if _worker_success_audio is None:
+            try:
+                _worker_success_audio = load_success_audio(audio_cache)
+            except OSError:
+                _worker_success_audio = ""
+
+        quiz = load_quiz_file(config_path)
+        if localize_images:
+            quiz.localize_images = True
+        if write_report:
+            quiz.write_report = True
+        if precompress:
+            quiz.precompress = True
+        if template:
+            quiz.template = template
+        if lazy_page:
+            quiz.lazy_page = True
+        if data_page:
+            quiz.data_page = True
+        if offline:
+            quiz.offline = True
+
+        stats = generate(quiz, output_path, _worker_success_audio, audio_cache, output_mode, profile=profile)
+        return time.perf_counter() - start, None, stats
+    except Exception as e:
+        return time.perf_counter() - start, str(e), None
+
+def find_configs(patterns):
+    """ Expand config files, directories and glob patterns into a list of paths """
+    config_paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.json")) + glob.glob(os.path.join(pattern, "*" + PACK_EXTENSION)))
+        else:
+            # Keep unmatched names so they are reported as failures
+            matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in config_paths:
+                config_paths.append(path)
+    return config_paths
+
+def build_configs(patterns, output_dir=None, jobs=None, use_cache=True, cache_size=None, output_mode=None, localize_images=False,
+                  write_report=False, profile=False, precompress=False, template=None, lazy_page=False,
+                  data_page=False, offline=False):
+    """ Render many configurations on a process pool and print a summary.
+
+    In the 'site' output mode the pages go into one site folder (output_dir,
+    by default ./site) that finish_site completes with an index page.
+    """
+    config_paths = find_configs(patterns)
+    if not config_paths:
+        print("No configuration files found", file=sys.stderr)
+        return 1
+
+    if not os.path.exists(resource_path("successAudio.mp3")):
+        print("Warning: successAudio.mp3 not found, pages will have no success sound", file=sys.stderr)
+
+    site = output_mode == 'site'
+    if site:
+        output_dir = output_dir or "site"
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(config_paths)))
+
+    # Each page is named after its config and written to output_dir or next to the config
+    outputs = {}
+    for config_path in config_paths:
+        target_dir = output_dir or os.path.dirname(config_path)
+        name = Path(config_path).stem + ".html"
+        if site and name == SITE_INDEX:
+            # The site's own index page has that name
+            name = Path(config_path).stem + "_quiz.html"
+        outputs[config_path] = os.path.join(target_dir, name)
+
+    # Two configs with one name, such as quiz.json and its quiz.quizpack, would write the same page
+    claimed = {}
+    for config_path, output_path in outputs.items():
+        claimed.setdefault(os.path.normcase(os.path.abspath(output_path)), []).append(config_path)
+    clashes = [config_group for config_group in claimed.values() if len(config_group) > 1]
+    if clashes:
+        for config_group in clashes:
+            print(f"Configurations {', '.join(config_group)} would all be written to {outputs[config_group[0]]}", file=sys.stderr)
+        print("Build them separately or with different output folders (-o)", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    failures = 0
+    # Stats of the pages built, by config
+    built_pages = {}
+
+    def report(config_path, seconds, error, stats):
+        nonlocal failures
+        if error:
+            failures += 1
+            print(f"FAIL {seconds:7.2f}s  {config_path}: {error}")
+        else:
+            built_pages[config_path] = stats
+            line = f"OK   {seconds:7.2f}s  {config_path} -> {stats['html_file']}"
+            if stats['duplicate_audio']:
+                line += f" ({stats['duplicate_audio']} repeated clip(s), saved {format_size(stats['dedup_saved_bytes'])})"
+            if stats.get('images'):
+                line += (f" (images: {stats['images']}, {stats['images_from_cache']} from cache, {stats['images_failed']} failed, "
+                         f"{format_size(stats['image_bytes_saved'])} saved by resizing)")
+            print(line)
+            for path in [stats.get('report_file')] + stats.get('profile_files', []) + stats['precompressed_files'] + stats['service_worker_files']:
+                if path:
+                    print(f"     wrote {path}")
+            for url, error in stats.get('image_errors', {}).items():
+                print(f"     image {url}: {error}")
+        sys.stdout.flush()
+
+    if jobs == 1:
+        for config_path in config_paths:
+            report(config_path, *build_config(config_path, outputs[config_path], use_cache, output_mode, localize_images, write_report, profile, precompress, template, lazy_page, data_page, offline))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(build_config, config_path, outputs[config_path], use_cache, output_mode, localize_images, write_report, profile, precompress, template, lazy_page, data_page, offline): config_path
+                for config_path in config_paths
+            }
+            for future in as_completed(futures):
+                report(futures[future], *future.result())
+
+    if use_cache:
+        AudioCache(max_bytes=cache_size or AUDIO_CACHE_MAX_BYTES).trim()
+    ImageCache().trim()
+    if site:
+        pages = [(config_path, built_pages[config_path]) for config_path in config_paths if config_path in built_pages]
+        # Assets of pages that failed to build may still be in use by their previous version
+        site_stats = finish_site(output_dir, pages, precompress, clean=not failures)
+        print(f"Site {output_dir}: {len(pages)} page(s) and {site_stats['asset_files']} shared asset file(s), "
+              f"{format_size(site_stats['bytes'])} in total")
+
+    elapsed = time.perf_counter() - start
+    built = len(config_paths) - failures
+    print(f"Built {built} of {len(config_paths)} configuration(s) in {elapsed:.2f}s with {jobs} worker(s)")
+    return 1 if failures else 0
+
+def render_site_index(pages, service_worker=None):
+    """ Index page of a site, linking its pages in order and registering service_worker if given """
+    items = []
+    for config_path, stats in pages:
+        href = urllib.parse.quote(os.path.basename(stats['html_file']))
+        name = html.escape(Path(config_path).stem)
+        counts = f"{len(stats['report']['cards'])} card(s), {len(stats['report']['questions'])} question(s)"
+        items.append(f'      <li><a href="{href}">{name}</a> <span class="counts">{counts}</span></li>\n')
+    registration = ""
+    if service_worker is not None:
+        registration = service_worker_registration(service_worker['url'], service_worker['scope'])
+    return f"""<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Learning Tests</title>
+  <style>
+    body {{ font-family: 'Arial', 'Segoe UI', sans-serif; background: linear-gradient(to bottom, #e0f7fa, #b2ebf2); margin: 0; padding: 20px; }}
+    .container {{ max-width: 800px; margin: 0 auto; background: white; border-radius: 20px; padding: 20px 30px; }}
+    h1 {{ color: #00796b; text-align: center; }}
+    li {{ padding: 8px 0; font-size: 1.2rem; }}
+    a {{ color: #00796b; }}
+    .counts {{ color: #757575; font-size: 0.9rem; }}
+  </style>
+</head>
+<body>
+  <div class="container">
+    <h1>Learning Tests</h1>
+    <ul>
+{"".join(items)}    </ul>
+  </div>
+{registration}</body>
+</html>
+"""
+
+def finish_site(site_dir, pages, precompress=False, clean=True):
+    """ Write the index page and _headers file of a site and tidy its shared assets.
+
+    pages lists the (config_path, stats) of the site's pages, in order. With
+    clean, asset files that none of them uses are removed. The index, styles
+    and scripts get .gz (and .br) copies when precompress is set or any page
+    has them. When pages are offline, one service worker keeps them, their
+    assets and the index. Returns the number of asset files in use and the
+    site's bytes.
+    """
+    asset_dir = os.path.join(site_dir, SITE_ASSET_DIR)
+    asset_files = set()
+    for _, stats in pages:
+        asset_files.update(stats['asset_files'])
+    precompress = precompress or any(stats['precompressed_files'] for _, stats in pages)
+
+    index_file = os.path.join(site_dir, SITE_INDEX)
+    service_worker = service_worker_paths(index_file, 'site')
+    offline_pages = [stats['precache'] for _, stats in pages if stats['precache'] is not None]
+    write_file_atomic(index_file, render_site_index(pages, service_worker if offline_pages else None))
+    write_file_atomic(os.path.join(site_dir, "_headers"), SITE_HEADERS)
+    update_precompressed(index_file, precompress)
+
+    precache = None
+    if offline_pages:
+        precache = page_precache(index_file, SITE_INDEX, "", [], [])
+        for page in offline_pages:
+            precache['entries'].update(page['entries'])
+            precache['remote'].extend(url for url in page['remote'] if url not in precache['remote'])
+    update_service_worker(service_worker, precache)
+    for relative_path in sorted(asset_files):
+        # Audio and images are compressed already
+        if relative_path.startswith(("css/", "js/")):
+            update_precompressed(os.path.join(asset_dir, relative_path), precompress)
+
+    if clean:
+        for folder in SITE_ASSET_FOLDERS:
+            folder_path = os.path.join(asset_dir, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for name in os.listdir(folder_path):
+                base_name = name[:-3] if name.endswith((".gz", ".br")) else name
+                if f"{folder}/{base_name}" not in asset_files:
+                    os.remove(os.path.join(folder_path, name))
+
+    site_bytes = 0
+    for folder, _, names in os.walk(site_dir):
+        site_bytes += sum(os.path.getsize(os.path.join(folder, name)) for name in names)
+    return {'asset_files': len(asset_files), 'bytes': site_bytes}
+
+def make_variant(quiz, seed):
+    """ Copy of a quiz with its questions and their answers shuffled by seed; returns (variant, key).
+
+    The variant shares the quiz's cards and settings. The key has an entry per
+    question in the variant's order: its index in the quiz, the original
+    indexes of its answers in their new order and its correct answer.
+    """
+    rng = random.Random(seed)
+    order = list(range(len(quiz.questions)))
+    rng.shuffle(order)
+    questions = []
+    key = []
+    for original in order:
+        question = quiz.questions[original]
+        answer_order = list(range(len(question.answers)))
+        rng.shuffle(answer_order)
+        # The answer the page marks correct stays correct wherever it moves
+        correct_index = answer_order.index(question.answer_index()) if question.answer_index() in answer_order else None
+        questions.append(Question(question.image_url, question.text, [question.answers[j] for j in answer_order], correct_index))
+        key.append({
+            'question': original,
+            'answers': answer_order,
+            'correct_index': correct_index,
+            'correct_answer': question.answers[answer_order[correct_index]] if correct_index is not None else None,
+        })
+    variant = Quiz(quiz.cards, questions, **{name: getattr(quiz, name) for name in Quiz.SETTINGS})
+    return variant, key
+
+def parse_seeds(text):
+    """ Seeds from text such as "1-30" or "1,5,10-12", in order and without repeats """
+    seeds = []
+    for item in text.split(","):
+        item = item.strip()
+        match = re.fullmatch(r"(-?\d+)(?:-(-?\d+))?", item)
+        if not match:
+            raise ValueError(f"Seeds must look like 1-30 or 1,5,10-12, not {text!r}")
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) is not None else first
+        if last < first:
+            raise ValueError(f"Seed range {item} is empty")
+        seeds.extend(seed for seed in range(first, last + 1) if seed not in seeds)
+    return seeds
+
+def build_variant_chunk(config_path, variants, use_cache=True, output_mode=None, offline=False):
+    """ Render variants, a list of (seed, output_path), of one configuration in this process.
+
+    The configuration is read once and the variants share the audio, image
+    and fragment caches, so cards, audio and images are rendered or encoded
+    for the first variant only; without use_cache the encoded audio is kept
+    in a temporary cache for the run. Returns a list of (seed, seconds,
+    error, stats, key).
+    """
+    if not use_cache:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            return render_variants(config_path, variants, AudioCache(temp_dir), output_mode, offline)
+    return render_variants(config_path, variants, AudioCache(), output_mode, offline)
+
+def render_variants(config_path, variants, audio_cache, output_mode=None, offline=False):
+    global _worker_success_audio
+    results = []
+    try:
+        if _worker_success_audio is None:
+            try:
+                _worker_success_audio = load_success_audio(audio_cache)
+            except OSError:
+                _worker_success_audio = ""
+        quiz = load_quiz_file(config_path)
+        if offline:
+            quiz.offline = True
+    except Exception as e:
+        return [(seed, 0.0, str(e), None, None) for seed, _ in variants]
+
+    image_cache = ImageCache()
+    fragment_cache = FragmentCache()
+    for seed, output_path in variants:
+        start = time.perf_counter()
+        try:
+            variant, key = make_variant(quiz, seed)
+            stats = generate(variant, output_path, _worker_success_audio, audio_cache, output_mode, image_cache, fragment_cache)
+            results.append((seed, time.perf_counter() - start, None, stats, key))
+        except Exception as e:
+            results.append((seed, time.perf_counter() - start, str(e), None, None))
+    return results
+
+def build_variants(config_path, seeds, output_dir=None, jobs=None, use_cache=True, output_mode=None, offline=False, key_path=None):
+    """ Render a shuffled variant of a configuration per seed and write their answer key.
+
+    Variants are named <config>_v<seed>.html and split into one run of seeds
+    per worker process. The answer key (key_path, by default
+    <config>.answer_key.json next to the variants) maps each variant to its
+    seed, file and the correct answer of each question. In the 'site' output
+    mode the variants share one site folder (by default <config>_variants).
+    """
+    stem = Path(config_path).stem
+    site = output_mode == 'site'
+    if site:
+        output_dir = output_dir or os.path.join(os.path.dirname(config_path), stem + "_variants")
+    target_dir = output_dir or os.path.dirname(config_path)
+    if target_dir:
+        os.makedirs(target_dir, exist_ok=True)
+    key_path = key_path or os.path.join(target_dir, stem + ".answer_key.json")
+    outputs = [(seed, os.path.join(target_dir, f"{stem}_v{seed}.html")) for seed in seeds]
+
+    # Contiguous runs of seeds, so each worker renders the cards once
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(outputs)))
+    chunk_size = (len(outputs) + jobs - 1) // jobs
+    chunks = [outputs[i:i + chunk_size] for i in range(0, len(outputs), chunk_size)]
+
+    start = time.perf_counter()
+    results = []
+    if len(chunks) == 1:
+        results = build_variant_chunk(config_path, chunks[0], use_cache, output_mode, offline)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            for chunk_results in executor.map(build_variant_chunk, [config_path] * len(chunks), chunks, [use_cache] * len(chunks),
+                                              [output_mode] * len(chunks), [offline] * len(chunks)):
+                results.extend(chunk_results)
+
+    failures = 0
+    variants = []
+    pages = []
+    for seed, seconds, error, stats, key in results:
+        if error:
+            failures += 1
+            print(f"FAIL {seconds:7.2f}s  seed {seed}: {error}")
+            continue
+        print(f"OK   {seconds:7.2f}s  seed {seed} -> {stats['html_file']} ({stats['fragments_reused']} fragment(s) reused)")
+        pages.append((stats['html_file'], stats))
+        variants.append({
+            'seed': seed,
+            'file': os.path.relpath(stats['html_file'], os.path.dirname(os.path.abspath(key_path))),
+            'correct': [entry['correct_index'] for entry in key],
+            'questions': key,
+        })
+    if use_cache:
+        AudioCache().trim()
+    ImageCache().trim()
+    if site:
+        finish_site(output_dir, pages, clean=not failures)
+
+    write_file_atomic(key_path, json.dumps({'config': config_path, 'variants': variants}, ensure_ascii=False, indent=2))
+    print(f"Built {len(variants)} of {len(outputs)} variant(s) of {config_path} in {time.perf_counter() - start:.2f}s "
+          f"with {len(chunks)} worker(s); answer key in {key_path}")
+    return 1 if failures else 0
+
+def manage_cache(action):
+    for cache, kind in ((AudioCache(), "encoded file(s)"), (ImageCache(), "image(s)")):
+        if action == "clear":
+            cache.clear()
+            print(f"Cleared {cache.cache_dir}")
+        else:
+            count, size = cache.info()
+            print(f"{cache.cache_dir}: {count} {kind}, {format_size(size)} (limit {format_size(cache.max_bytes)})")
+    return 0
+
+def export_template(output_path=None, builtin='default'):
+    if not output_path:
+        sys.stdout.write(BUILTIN_TEMPLATES[builtin])
+        return 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(BUILTIN_TEMPLATES[builtin])
+    print(f"Wrote the built-in {builtin} template to {output_path}; the slots are " + ", ".join(f"{{{{{name}}}}}" for name in TEMPLATE_SLOTS))
+    return 0
+
+def pack_config(config_path, output_path=None):
+    """ Save a configuration and its cards' audio as a project bundle """
+    output_path = output_path or os.path.splitext(config_path)[0] + PACK_EXTENSION
+    try:
+        quiz = load_quiz_file(config_path)
+        write_pack(quiz, output_path, AudioCache())
+        pack = open_pack(output_path)
+    except (OSError, ValueError) as e:
+        print(f"Packing failed: {e}", file=sys.stderr)
+        return 1
+    missing = sum(1 for card in quiz.cards if card.audio and split_pack_path(card.audio) is None and not os.path.exists(card.audio))
+    print(f"Packed {len(quiz.cards)} card(s), {len(quiz.questions)} question(s) and {len(pack.audio)} audio file(s) "
+          f"into {output_path} ({format_size(os.path.getsize(output_path))})")
+    if missing:
+        print(f"Warning: {missing} card(s) have audio files that do not exist; they keep their paths", file=sys.stderr)
+    return 0
+
+# Seconds between checks of the watched files
+WATCH_INTERVAL = 0.1
+
+def file_stamp(path):
+    """ (size, mtime) of a file, or None if it is missing """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def watch_config(config_path, output_path=None, output_mode=None, interval=WATCH_INTERVAL):
+    """ Regenerate a configuration's page whenever it, its audio files or its template change, until interrupted """
+    output_path = output_path or os.path.splitext(config_path)[0] + ".html"
+    audio_cache = AudioCache()
+    image_cache = ImageCache()
+    fragment_cache = FragmentCache()
+    try:
+        success_audio = load_success_audio(audio_cache)
+    except OSError:
+        print("Warning: successAudio.mp3 not found, pages will have no success sound", file=sys.stderr)
+        success_audio = ""
+
+    print(f"Watching {config_path}, press Ctrl+C to stop")
+    stamps = {}
+    try:
+        while True:
+            if stamps and all(file_stamp(path) == stamp for path, stamp in stamps.items()):
+                time.sleep(interval)
+                continue
+
+            # Stamps are taken before reading, so a change during the build triggers another one
+            start = time.perf_counter()
+            stamps = {config_path: file_stamp(config_path)}
+            try:
+                quiz = load_quiz_file(config_path)
+                for card in quiz.cards:
+                    # Audio inside a bundle changes with the bundle itself
+                    if card.audio and split_pack_path(card.audio) is None:
+                        stamps[card.audio] = file_stamp(card.audio)
+                if quiz.template:
+                    stamps[quiz.template] = file_stamp(quiz.template)
+                stats = generate(quiz, output_path, success_audio, audio_cache, output_mode, image_cache, fragment_cache)
+            except Exception as e:
+                # Often a config caught halfway through saving; the next save retries
+                print(f"FAIL {time.perf_counter() - start:7.3f}s  {config_path}: {e}")
+                sys.stdout.flush()
+                continue
+
+            seconds = time.perf_counter() - start
+            fragment_count = len(quiz.cards) + len(quiz.questions)
+            if stats['unchanged']:
+                print(f"OK   {seconds:7.3f}s  {stats['html_file']} is up to date")
+            else:
+                print(f"OK   {seconds:7.3f}s  {config_path} -> {stats['html_file']} "
+                      f"({stats['fragments_reused']} of {fragment_count} fragment(s) reused)")
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        audio_cache.trim()
+        image_cache.trim()
+
+# Seconds without edits before the editor's queued edits are autosaved, the
+# longest they wait while typing goes on, and the journal entries that are
+# folded into a new snapshot
+AUTOSAVE_DELAY = 1.0
+AUTOSAVE_MAX_DELAY = 5.0
+AUTOSAVE_COMPACT_ENTRIES = 500
+
+def apply_autosave_entry(quiz, entry):
+    """ Replay one autosave journal entry on a Quiz """
+    op = entry['op']
+    items = quiz.cards if entry.get('kind') == 'card' else quiz.questions
+    if op == 'set':
+        if entry['field'] not in ('image_url', 'title', 'word', 'audio', 'text'):
+            raise ValueError(f"Unknown field {entry['field']!r}")
+        setattr(items[entry['index']], entry['field'], entry['value'])
+    elif op == 'answer':
+        quiz.questions[entry['index']].answers[entry['answer']] = entry['value']
+    elif op == 'correct':
+        quiz.questions[entry['index']].correct_index = entry['value']
+    elif op == 'insert':
+        items.insert(entry['index'], Card() if entry['kind'] == 'card' else Question())
+    elif op == 'delete':
+        del items[entry['index']]
+    elif op == 'insert_answer':
+        quiz.questions[entry['index']].answers.insert(entry['answer'], '')
+    elif op == 'delete_answer':
+        del quiz.questions[entry['index']].answers[entry['answer']]
+    elif op == 'setting':
+        if entry['name'] not in Quiz.SETTINGS:
+            raise ValueError(f"Unknown setting {entry['name']!r}")
+        setattr(quiz, entry['name'], entry['value'])
+    else:
+        raise ValueError(f"Unknown autosave entry {op!r}")
+
+class AutosaveJournal:
+    """ The editor's work since it was last loaded or saved, kept safe from crashes.
+
+    The state is a snapshot of the whole quiz plus an append-only journal of
+    the edits made after it, one small JSON line each, so an autosave costs
+    as much as the edits it writes. Edits are queued by record and written by
+    flush; a text edit replaces a queued edit of the same field, so typing
+    writes one entry. Every AUTOSAVE_COMPACT_ENTRIES entries the quiz is
+    written as a new snapshot, replaced in one step. Entries are numbered and
+    the snapshot records the last one it includes, so a crash between the two
+    writes replays nothing twice.
+
+    Each editor keeps its state in a session folder of its own under root,
+    locked while the editor runs, so editors open side by side do not mix
+    their edits. A session left unlocked by an editor that crashed is
+    recovered by the next one to start.
+    """
+    # Edits that replace a queued edit of the same thing
+    COALESCED = ('set', 'answer', 'correct', 'setting')
+
+    def __init__(self, root=None):
+        import uuid
+        self.root = root or os.path.join(default_cache_dir(), "autosave")
+        self.directory = os.path.join(self.root, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.snapshot_path = os.path.join(self.directory, "snapshot.json")
+        self.journal_path = os.path.join(self.directory, "journal.jsonl")
+        # The open, locked lock file of the session once it has written anything
+        self.lock_file = None
+        self.pending = []
+        # When the oldest queued edit was made
+        self.pending_since = None
+        # Number of the last entry recorded
+        self.sequence = 0
+        self.entries_since_snapshot = 0
+        # Whether there is work that was not saved to a file
+        self.dirty = False
+
+    def record(self, entry):
+        """ Queue an edit for the next flush """
+        if self.pending and entry['op'] in self.COALESCED:
+            last = self.pending[-1]
+            if {name: value for name, value in last.items() if name not in ('value', 'seq')} == {name: value for name, value in entry.items() if name != 'value'}:
+                last['value'] = entry['value']
+                return
+        self.sequence += 1
+        self.pending.append(dict(entry, seq=self.sequence))
+        self.dirty = True
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+
+    def pending_age(self):
+        """ Seconds the oldest queued edit has waited """
+        return 0.0 if self.pending_since is None else time.monotonic() - self.pending_since
+
+    def flush(self, current_quiz):
+        """ Append the queued edits to the journal, compacting it when it has grown.
+
+        current_quiz is called for the quiz as edited only when a snapshot is due.
+        """
+        if not self.pending:
+            return
+        self.open_session()
+        text = "".join(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n" for entry in self.pending)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries_since_snapshot += len(self.pending)
+        self.pending = []
+        self.pending_since = None
+        if self.entries_since_snapshot >= AUTOSAVE_COMPACT_ENTRIES:
+            self.write_snapshot(current_quiz())
+
+    def reset(self, quiz, dirty=False):
+        """ Start over from quiz, after it was loaded, saved or replaced as a whole """
+        self.pending = []
+        self.pending_since = None
+        self.dirty = dirty
+        self.write_snapshot(quiz)
+
+    def open_session(self):
+        if self.lock_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.lock_file = lock_session(self.directory)
+
+    def close(self):
+        """ Unlock the session, removing it when it holds no unsaved work """
+        if self.lock_file is None:
+            return
+        self.lock_file.close()
+        self.lock_file = None
+        if not self.dirty and not self.pending:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write_snapshot(self, quiz):
+        self.open_session()
+        snapshot = {'sequence': self.sequence, 'dirty': self.dirty, 'quiz': quiz.to_config()}
+        write_file_atomic(self.snapshot_path, json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')))
+        # Entries in the snapshot are skipped on recovery, so losing this truncation to a crash is harmless
+        with open(self.journal_path, 'w', encoding='utf-8'):
+            pass
+        self.entries_since_snapshot = 0
+
+    def recover(self):
+        """ The unsaved quiz of the latest session that ended without saving, or None.
+
+        Sessions of running editors are locked and left alone. The recovered
+        quiz becomes this session's snapshot before the old session is removed;
+        sessions with nothing unsaved are removed as well, and any others
+        are recovered by the editors started after this one.
+        """
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return None
+        sessions = []
+        for name in names:
+            directory = os.path.join(self.root, name)
+            if directory != self.directory and os.path.isdir(directory):
+                try:
+                    sessions.append((os.path.getmtime(directory), directory))
+                except OSError:
+                    pass
+        for _, directory in sorted(sessions, reverse=True):
+            try:
+                lock_file = lock_session(directory)
+            except OSError:
+                # Its editor is still running
+                continue
+            try:
+                quiz, sequence = read_autosave_session(directory)
+                if quiz is not None:
+                    self.sequence = sequence
+                    self.dirty = True
+                    self.write_snapshot(quiz)
+            finally:
+                lock_file.close()
+            shutil.rmtree(directory, ignore_errors=True)
+            if quiz is not None:
+                return quiz
+        return None
+
+def lock_session(directory):
+    """ Lock an autosave session for this process; returns the open lock file.
+
+    Raises OSError when another process holds the lock. The operating system
+    releases it when the process ends, crashed or not.
+    """
+    lock_file = open(os.path.join(directory, "session.lock"), 'a+')
+    try:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise
+    return lock_file
+
+def read_autosave_session(directory):
+    """ (quiz, last entry number) of an autosave session with unsaved work, or (None, 0).
+
+    Journal entries are replayed up to the first that cannot be read, such
+    as a line cut short by a crash.
+    """
+    try:
+        with open(os.path.join(directory, "snapshot.json"), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        quiz = Quiz.from_config(snapshot['quiz'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, 0
+    sequence = snapshot.get('sequence', 0)
+    replayed = 0
+    try:
+        with open(os.path.join(directory, "journal.jsonl"), 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry['seq'] <= snapshot.get('sequence', 0):
+                    continue
+                apply_autosave_entry(quiz, entry)
+                sequence = entry['seq']
+                replayed += 1
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        pass
+    if not snapshot.get('dirty') and not replayed:
+        return None, 0
+    return quiz, sequence
+
+# Space around each row of the card and question editors
+ROW_PADDING = 5
+
+class VirtualList:
+    """ Scrolling list of editor rows that only has widgets for the rows in view.
+
+    The data stays in a plain list of items. make_row(parent) builds a reusable
+    row object (with frame, index, item and bind(index, item)); a small pool
+    of rows is re-bound to whichever items scroll into view, so the number of
+    widgets does not grow with the list. Row heights are measured per
+    height_key(item) and reused for every item with the same key.
+    """
+    def __init__(self, parent, items, make_row, height_key=lambda item: None):
+        self.items = items
+        self.make_row = make_row
+        self.height_key = height_key
+        self.heights = {}
+        self.default_height = 150
+        self.offsets = [0]
+        self.rows = []
+        self.windows = []
+        self.width = 0
+        self.refresh_pending = False
+        # Set while rows are placed and measured, which may run idle callbacks that refresh again
+        self.refreshing = False
+
+        self.canvas = tk.Canvas(parent)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_refresh())
+
+        # Pack the canvas and scrollbar
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def set_items(self, items):
+        """ Show a new list of items, laid out in one pass from the top """
+        self.items = items
+        self.canvas.yview_moveto(0)
+        self.relayout()
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        # Coalesce bursts of scroll and resize events into one refresh
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def item_height(self, item):
+        return self.heights.get(self.height_key(item), self.default_height)
+
+    def relayout(self):
+        """ Recompute item positions after items were added, removed or changed size """
+        self.update_offsets()
+        self.refresh()
+
+    def update_offsets(self):
+        offsets = [0]
+        for item in self.items:
+            offsets.append(offsets[-1] + self.item_height(item))
+        self.offsets = offsets
+        self.canvas.configure(scrollregion=(0, 0, self.width, offsets[-1]))
+        for row in self.rows:
+            row.index = None
+
+    def see(self, index):
+        """ Scroll so that the item at index is in view """
+        if self.offsets[-1] > 0:
+            self.canvas.yview_moveto(self.offsets[index] / self.offsets[-1])
+        self.refresh()
+
+    def refresh(self):
+        self.refresh_pending = False
+        if self.refreshing:
+            # Run by the update_idletasks in place_rows; the refresh under way covers it
+            return
+        self.refreshing = True
+        try:
+            while self.place_rows():
+                # An estimated height was off; lay out again with the measured ones
+                self.update_offsets()
+        finally:
+            self.refreshing = False
+
+    def place_rows(self):
+        """ Bind and position rows for the items in view; returns whether a measured height changed """
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), 1)
+        first = max(0, bisect.bisect_right(self.offsets, top) - 1)
+        last = min(len(self.items), bisect.bisect_left(self.offsets, bottom))
+        visible = range(first, max(first, last))
+
+        while len(self.rows) < len(visible):
+            row = self.make_row(self.canvas)
+            self.rows.append(row)
+            self.windows.append(self.canvas.create_window(ROW_PADDING, 0, window=row.frame, anchor="nw"))
+
+        for row, window, index in zip(self.rows, self.windows, visible):
+            if row.index != index or row.item is not self.items[index]:
+                row.bind(index, self.items[index])
+            self.canvas.coords(window, ROW_PADDING, self.offsets[index] + ROW_PADDING)
+            self.canvas.itemconfigure(window, state="normal")
+        for row, window in zip(self.rows[len(visible):], self.windows[len(visible):]):
+            row.index = row.item = None
+            self.canvas.itemconfigure(window, state="hidden")
+
+        # Measure the rows in view; lay out again if an estimated height was off
+        self.canvas.update_idletasks()
+        changed = False
+        for row in self.rows[:len(visible)]:
+            key = self.height_key(row.item)
+            height = row.frame.winfo_reqheight() + 2 * ROW_PADDING
+            if self.heights.get(key) != height:
+                self.heights[key] = height
+                changed = True
+            self.width = max(self.width, row.frame.winfo_reqwidth() + 2 * ROW_PADDING)
+        return changed
+
+class CardRow:
+    """ Editor row for one card, re-bound to different cards as the list scrolls """
+    def __init__(self, app, parent):
+        self.app = app
+        self.index = None
+        self.item = None
+        self.binding = False
+        self.vars = {}
+        self.frame = ttk.Frame(parent, relief='groove', borderwidth=1)
+
+        # Image URL
+        ttk.Label(self.frame, text="Image URL:").grid(row=0, column=0, sticky='w', pady=2)
+        ttk.Entry(self.frame, width=40, textvariable=self.field_var('image_url')).grid(row=0, column=1, pady=2, padx=5)
+        
+        # Title
+        ttk.Label(self.frame, text="Title (e.g., 'Cat (قطة)'):").grid(row=1, column=0, sticky='w', pady=2)
+        ttk.Entry(self.frame, width=40, textvariable=self.field_var('title')).grid(row=1, column=1, pady=2, padx=5)
+        
+        # Word to speak
+        ttk.Label(self.frame, text="Word to speak (Arabic):").grid(row=2, column=0, sticky='w', pady=2)
+        ttk.Entry(self.frame, width=40, textvariable=self.field_var('word')).grid(row=2, column=1, pady=2, padx=5)
+        
+        # Audio file
+        ttk.Label(self.frame, text="Audio file:").grid(row=3, column=0, sticky='w', pady=2)
+        audio_frame = ttk.Frame(self.frame)
+        audio_frame.grid(row=3, column=1, sticky='we', pady=2)
+        audio_var = self.field_var('audio')
+        ttk.Entry(audio_frame, width=35, textvariable=audio_var).pack(side='left', fill='x', expand=True)
+        ttk.Button(audio_frame, text="Browse", command=lambda: app.browse_audio(audio_var)).pack(side='right', padx=5)
+        
+        # Remove button
+        ttk.Button(self.frame, text="Remove", command=lambda: app.remove_animal(self.index)).grid(row=4, column=1, sticky='e', pady=5)
+
+    def field_var(self, field):
+        var = tk.StringVar()
+        var.trace_add('write', lambda *args: self.on_edit(field, var.get()))
+        self.vars[field] = var
+        return var
+
+    def on_edit(self, field, value):
+        # Typing goes straight into the card the row is showing
+        if not self.binding and self.item is not None:
+            setattr(self.item, field, value)
+            self.app.record_edit({'op': 'set', 'kind': 'card', 'index': self.index, 'field': field, 'value': value})
+
+    def bind(self, index, item):
+        self.binding = True
+        self.index = index
+        self.item = item
+        for field, var in self.vars.items():
+            var.set(getattr(item, field))
+        self.binding = False
+
+class QuestionRow:
+    """ Editor row for one question, re-bound to different questions as the list scrolls """
+    def __init__(self, app, parent):
+        self.app = app
+        self.index = None
+        self.item = None
+        self.binding = False
+        self.frame = ttk.Frame(parent, relief='groove', borderwidth=1)
+
+        # Question image URL
+        ttk.Label(self.frame, text="Question Image URL (optional):").grid(row=0, column=0, sticky='w', pady=2)
+        self.image_url_var = tk.StringVar()
+        self.image_url_var.trace_add('write', lambda *args: self.on_edit('image_url', self.image_url_var.get()))
+        ttk.Entry(self.frame, width=50, textvariable=self.image_url_var).grid(row=0, column=1, columnspan=2, sticky='we', pady=2, padx=5)
+        
+        # Question text
+        ttk.Label(self.frame, text="Question Text:").grid(row=1, column=0, sticky='w', pady=2)
+        self.text_var = tk.StringVar()
+        self.text_var.trace_add('write', lambda *args: self.on_edit('text', self.text_var.get()))
+        ttk.Entry(self.frame, width=50, textvariable=self.text_var).grid(row=1, column=1, columnspan=2, sticky='we', pady=2, padx=5)
+        
+        # Answers frame
+        self.answers_frame = ttk.LabelFrame(self.frame, text="Answers")
+        self.answers_frame.grid(row=2, column=0, columnspan=3, sticky='we', pady=5, padx=5)
+        
+        # Correct answer variable, shared by the answer radio buttons
+        self.correct_answer_var = tk.StringVar()
+        self.correct_answer_var.trace_add('write', lambda *args: self.on_correct_answer())
+        
+        # Answer widgets (radio button, entry, remove button, variable), created as needed
+        self.answer_rows = []
+            
+        # Remove question button
+        ttk.Button(self.frame, text="Remove Question", command=lambda: app.remove_question(self.index)).grid(row=4, column=2, sticky='e', pady=5)
+        ttk.Button(self.frame, text="Add Answer", command=lambda: app.add_answer(self.index)).grid(row=4, column=3, sticky='e', pady=5)
+        
+        # Configure grid weights
+        self.frame.columnconfigure(1, weight=1)
+        self.answers_frame.columnconfigure(1, weight=1)
+
+    def add_answer_row(self):
+        j = len(self.answer_rows)
+        # Radio button for correct answer
+        rb = ttk.Radiobutton(self.answers_frame, variable=self.correct_answer_var, value=str(j))
+        # Answer entry
+        var = tk.StringVar()
+        var.trace_add('write', lambda *args: self.on_answer_edit(j, var.get()))
+        entry = ttk.Entry(self.answers_frame, width=40, textvariable=var)
+        btn = ttk.Button(self.answers_frame, text="Remove", command=lambda: self.app.remove_answer(self.index, j))
+        self.answer_rows.append((rb, entry, btn, var))
+
+    def on_edit(self, field, value):
+        if not self.binding and self.item is not None:
+            setattr(self.item, field, value)
+            self.app.record_edit({'op': 'set', 'kind': 'question', 'index': self.index, 'field': field, 'value': value})
+
+    def on_answer_edit(self, j, value):
+        if not self.binding and self.item is not None:
+            self.item.answers[j] = value
+            self.app.record_edit({'op': 'answer', 'index': self.index, 'answer': j, 'value': value})
+
+    def on_correct_answer(self):
+        if not self.binding and self.item is not None:
+            value = self.correct_answer_var.get()
+            self.item.correct_index = int(value) if value else None
+            self.app.record_edit({'op': 'correct', 'index': self.index, 'value': self.item.correct_index})
+
+    def bind(self, index, item):
+        self.binding = True
+        self.index = index
+        self.item = item
+        self.image_url_var.set(item.image_url)
+        self.text_var.set(item.text)
+
+        answers = item.answers
+        while len(self.answer_rows) < len(answers):
+            self.add_answer_row()
+        for j, (rb, entry, btn, var) in enumerate(self.answer_rows):
+            if j < len(answers):
+                rb.grid(row=j, column=0, padx=5)
+                entry.grid(row=j, column=1, pady=2, padx=5, sticky='we')
+                btn.grid(row=j, column=2, padx=5)
+                var.set(answers[j])
+            else:
+                rb.grid_remove()
+                entry.grid_remove()
+                btn.grid_remove()
+
+        correct_index = item.correct_index
+        self.correct_answer_var.set("" if correct_index is None else str(correct_index))
+        self.binding = False
+
+# Seconds quitting waits for a cancelled generation to stop and clean up
+GENERATION_EXIT_TIMEOUT = 5.0
+
+class AnimalLearningGameGenerator:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Learning Game Generator")
+        self.root.geometry("900x700")
+        
+        # Data storage, starting with one empty card and question
+        self.animals = [Card()]
+        self.questions = [Question()]
+        self.animals_per_row = 3
+        
+        # Settings variables exist from the start; their widgets come with the tabs
+        self.animals_per_row_var = tk.StringVar(value="3")
+        self.output_file_var = tk.StringVar(value="animal_game.html")
+        self.output_mode_var = tk.StringVar(value="single")
+        self.localize_images_var = tk.BooleanVar(value=False)
+        self.write_report_var = tk.BooleanVar(value=False)
+        self.precompress_var = tk.BooleanVar(value=False)
+        self.template_var = tk.StringVar()
+        self.lazy_page_var = tk.BooleanVar(value=False)
+        self.data_page_var = tk.BooleanVar(value=False)
+        self.offline_var = tk.BooleanVar(value=False)
+        self.profile_var = tk.BooleanVar(value=False)
+        self.cache_info_var = tk.StringVar()
+        self.report_summary_var = tk.StringVar(value="No generation yet")
+        self.animals_list = self.questions_list = None
+
+        # Settings by name, whose changes are autosaved like the cards and questions
+        self.setting_vars = {
+            'animals_per_row': self.animals_per_row_var,
+            'output_file': self.output_file_var,
+            'output_mode': self.output_mode_var,
+            'localize_images': self.localize_images_var,
+            'write_report': self.write_report_var,
+            'precompress': self.precompress_var,
+            'template': self.template_var,
+            'lazy_page': self.lazy_page_var,
+            'data_page': self.data_page_var,
+            'offline': self.offline_var,
+        }
+        for name, var in self.setting_vars.items():
+            var.trace_add('write', lambda *args, name=name: self.record_edit({'op': 'setting', 'name': name, 'value': self.setting_vars[name].get()}))
+        self.autosave = AutosaveJournal()
+        self.autosave_after = None
+        # The last autosave error shown, so a failing disk warns once rather than on every edit
+        self.autosave_error = None
+        # Set while a whole quiz is put into the editor, which is not an edit
+        self.autosave_paused = False
+        
+        # Create notebook for sections
+        self.notebook = ttk.Notebook(root)
+        self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Animals frame
+        self.animals_frame = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self.animals_frame, text="Cards")
+        
+        # Questions frame
+        self.questions_frame = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self.questions_frame, text="Questions")
+        
+        # Settings frame
+        self.settings_frame = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self.settings_frame, text="Settings")
+        
+        # Each tab is built the first time it is shown
+        self.tab_builders = [self.setup_animals_section, self.setup_questions_section, self.setup_settings_section]
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.root.after_idle(self.on_tab_changed)
+
+        # Caches of encoded audio and downloaded images shared by all generations
+        self.audio_cache = AudioCache()
+        self.image_cache = ImageCache()
+        # Rendered cards and questions of the last generation, reused when unchanged
+        self.fragment_cache = FragmentCache()
+
+        # successAudio, encoded on the first generation
+        self.successAudioEncodedString = None
+        self.generation = None
+        self.progress_frame = None
+        self.context_menu = None
+        
+        self.setup_menu()
+        # Bind right-click event to all entry widgets
+        self.root.bind_class("TEntry", "<Button-3>", self.show_context_menu)
+        self.root.protocol("WM_DELETE_WINDOW", self.exit)
+        self.start_autosave()
+        
+    def on_tab_changed(self, event=None):
+        index = self.notebook.index("current")
+        if self.tab_builders[index] is not None:
+            builder, self.tab_builders[index] = self.tab_builders[index], None
+            builder()
+
+    def setup_context_menus(self):
+        # Create a context menu
+        self.context_menu = tk.Menu(self.root, tearoff=0)
+        self.context_menu.add_command(label="Cut", command=lambda: self.cut_text())
+        self.context_menu.add_command(label="Copy", command=lambda: self.copy_text())
+        self.context_menu.add_command(label="Paste", command=lambda: self.paste_text())
+        
+    def show_context_menu(self, event):
+        if self.context_menu is None:
+            self.setup_context_menus()
+        # Store the widget that was right-clicked
+        self.focused_widget = event.widget
+        # Show the context menu at the cursor position
+        self.context_menu.post(event.x_root, event.y_root)
+        
+    def cut_text(self):
+        if hasattr(self, 'focused_widget') and isinstance(self.focused_widget, tk.Entry):
+            self.focused_widget.event_generate("<<Cut>>")
+            
+    def copy_text(self):
+        if hasattr(self, 'focused_widget') and isinstance(self.focused_widget, tk.Entry):
+            self.focused_widget.event_generate("<<Copy>>")
+            
+    def paste_text(self):
+        if hasattr(self, 'focused_widget') and isinstance(self.focused_widget, tk.Entry):
+            self.focused_widget.event_generate("<<Paste>>")
+        
+    def setup_menu(self):
+        menubar = tk.Menu(self.root)
+        file_menu = self.file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="New", command=self.new_config)
+        file_menu.add_command(label="Load", command=self.load_config)
+        file_menu.add_command(label="Save", command=self.save_config)
+        file_menu.add_command(label="Import Bank...", command=self.import_bank_files)
+        file_menu.add_separator()
+        file_menu.add_command(label="Generate HTML", command=self.generate_html)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.exit)
+        menubar.add_cascade(label="File", menu=file_menu)
+        self.root.config(menu=menubar)
+        
+    def setup_progress_bar(self):
+        # Generation progress, shown below the tabs while the worker thread runs
+        self.progress_frame = ttk.Frame(self.root, padding=(10, 0, 10, 10))
+        self.progress_var = tk.DoubleVar()
+        self.progress_text_var = tk.StringVar()
+        ttk.Progressbar(self.progress_frame, variable=self.progress_var, maximum=1.0).pack(side='left', fill='x', expand=True)
+        ttk.Label(self.progress_frame, textvariable=self.progress_text_var, width=45).pack(side='left', padx=10)
+        self.cancel_button = ttk.Button(self.progress_frame, text="Cancel", command=self.cancel_generation)
+        self.cancel_button.pack(side='right')
+        
+    def setup_animals_section(self):
+        # Animals per row setting
+        ttk.Label(self.animals_frame, text="Cards per row:").grid(row=0, column=0, sticky='w', pady=5)
+        animals_per_row_spinbox = ttk.Spinbox(self.animals_frame, from_=1, to=6, textvariable=self.animals_per_row_var, width=5)
+        animals_per_row_spinbox.grid(row=0, column=1, sticky='w', pady=5)
+        
+        # Add animal button
+        ttk.Button(self.animals_frame, text="Add Card", command=self.add_animal).grid(row=0, column=2, pady=5, padx=5)
+        
+        # Create a frame for the card list; only the cards in view get widgets
+        container = ttk.Frame(self.animals_frame)
+        container.grid(row=1, column=0, columnspan=3, sticky='nsew', pady=10)
+        self.animals_list = VirtualList(container, self.animals, lambda parent: CardRow(self, parent))
+        self.animals_list.relayout()
+        
+        # Configure grid weights
+        self.animals_frame.columnconfigure(0, weight=1)
+        self.animals_frame.rowconfigure(1, weight=1)
+        
+    def add_animal(self):
+        self.animals.append(Card())
+        self.record_edit({'op': 'insert', 'kind': 'card', 'index': len(self.animals) - 1})
+        self.animals_list.relayout()
+        self.animals_list.see(len(self.animals) - 1)
+        
+    def remove_animal(self, index):
+        del self.animals[index]
+        self.record_edit({'op': 'delete', 'kind': 'card', 'index': index})
+        self.animals_list.relayout()
+        
+    def browse_audio(self, audio_var):
+        filename = filedialog.askopenfilename(
+            title="Select Audio File",
+            filetypes=[("Audio files", "*.mp3 *.wav *.ogg *.OPUS"), ("All files", "*.*")]
+        )
+        if filename:
+            audio_var.set(filename)
+            
+    def setup_questions_section(self):
+        # Add question button
+        ttk.Button(self.questions_frame, text="Add Question", command=self.add_question).pack(pady=5)
+        
+        # Create a frame for the question list; only the questions in view get widgets
+        container = ttk.Frame(self.questions_frame)
+        container.pack(fill='both', expand=True, pady=10)
+        self.questions_list = VirtualList(
+            container, self.questions, lambda parent: QuestionRow(self, parent),
+            height_key=lambda question: len(question.answers)
+        )
+        self.questions_list.relayout()
+        
+    def add_question(self):
+        self.questions.append(Question())
+        self.record_edit({'op': 'insert', 'kind': 'question', 'index': len(self.questions) - 1})
+        self.questions_list.relayout()
+        self.questions_list.see(len(self.questions) - 1)
+        
+    def remove_question(self, index):
+        del self.questions[index]
+        self.record_edit({'op': 'delete', 'kind': 'question', 'index': index})
+        self.questions_list.relayout()
+        
+    def add_answer(self, index):
+        self.questions[index].answers.append('')
+        self.record_edit({'op': 'insert_answer', 'index': index, 'answer': len(self.questions[index].answers) - 1})
+        self.questions_list.relayout()
+        
+    def remove_answer(self, index, answer_index):
+        question = self.questions[index]
+        del question.answers[answer_index]
+        # Keep the correct answer pointing at the same answer
+        correct_index = question.correct_index
+        if correct_index == answer_index:
+            question.correct_index = None
+        elif correct_index is not None and correct_index > answer_index:
+            question.correct_index = correct_index - 1
+        self.record_edit({'op': 'delete_answer', 'index': index, 'answer': answer_index})
+        self.record_edit({'op': 'correct', 'index': index, 'value': question.correct_index})
+        self.questions_list.relayout()
+        
+    def setup_settings_section(self):
+        # Output file settings
+        ttk.Label(self.settings_frame, text="Output File:").grid(row=0, column=0, sticky='w', pady=5)
+        output_entry = ttk.Entry(self.settings_frame, textvariable=self.output_file_var, width=40)
+        output_entry.grid(row=0, column=1, pady=5, padx=5, sticky='we')
+        ttk.Button(self.settings_frame, text="Browse", command=self.browse_output).grid(row=0, column=2, pady=5, padx=5)
+        
+        # Output mode
+        ttk.Label(self.settings_frame, text="Output Mode:").grid(row=1, column=0, sticky='nw', pady=5)
+        mode_frame = ttk.Frame(self.settings_frame)
+        mode_frame.grid(row=1, column=1, columnspan=2, sticky='w', pady=5, padx=5)
+        ttk.Radiobutton(mode_frame, text="Single HTML file (audio embedded)", variable=self.output_mode_var, value="single").pack(anchor='w')
+        ttk.Radiobutton(mode_frame, text="Folder with index.html and audio files loaded on demand", variable=self.output_mode_var, value="folder").pack(anchor='w')
+        ttk.Radiobutton(mode_frame, text="Single HTML file, compressed (expands in the browser)", variable=self.output_mode_var, value="compressed").pack(anchor='w')
+        ttk.Checkbutton(mode_frame, text="Also write .html.gz / .br copies for web servers", variable=self.precompress_var).pack(anchor='w', pady=(5, 0))
+        ttk.Checkbutton(mode_frame, text="Show cards and questions as they scroll into view (for large quizzes on slow devices)", variable=self.lazy_page_var).pack(anchor='w')
+        ttk.Checkbutton(mode_frame, text="Write cards and questions as compact data the page builds itself (smaller pages)", variable=self.data_page_var).pack(anchor='w')
+        ttk.Checkbutton(mode_frame, text="Keep the game and its images for offline use once opened from a web server", variable=self.offline_var).pack(anchor='w')
+        
+        # Images
+        ttk.Label(self.settings_frame, text="Images:").grid(row=2, column=0, sticky='w', pady=5)
+        ttk.Checkbutton(self.settings_frame, text="Download images and store them with the game", variable=self.localize_images_var).grid(row=2, column=1, columnspan=2, sticky='w', pady=5, padx=5)
+        
+        # Page template; empty for the built-in one
+        ttk.Label(self.settings_frame, text="Template:").grid(row=3, column=0, sticky='w', pady=5)
+        ttk.Entry(self.settings_frame, width=50, textvariable=self.template_var).grid(row=3, column=1, pady=5, padx=5, sticky='we')
+        ttk.Button(self.settings_frame, text="Browse", command=self.browse_template).grid(row=3, column=2, pady=5, padx=5)
+        
+        # Caches
+        ttk.Label(self.settings_frame, text="Cache:").grid(row=4, column=0, sticky='w', pady=5)
+        ttk.Label(self.settings_frame, textvariable=self.cache_info_var).grid(row=4, column=1, sticky='w', pady=5, padx=5)
+        ttk.Button(self.settings_frame, text="Clear", command=self.clear_audio_cache).grid(row=4, column=2, pady=5, padx=5)
+        self.update_cache_info()
+        
+        # Reports and profiling
+        ttk.Label(self.settings_frame, text="Reports:").grid(row=5, column=0, sticky='nw', pady=5)
+        report_frame = ttk.Frame(self.settings_frame)
+        report_frame.grid(row=5, column=1, columnspan=2, sticky='w', pady=5, padx=5)
+        ttk.Checkbutton(report_frame, text="Save a JSON report of each generation next to the HTML", variable=self.write_report_var).pack(anchor='w')
+        ttk.Checkbutton(report_frame, text="Capture cProfile and tracemalloc data (for support tickets)", variable=self.profile_var).pack(anchor='w')
+        
+        # Summary of the last generation
+        summary_frame = ttk.LabelFrame(self.settings_frame, text="Last generation", padding=5)
+        summary_frame.grid(row=6, column=0, columnspan=3, sticky='we', pady=10)
+        ttk.Label(summary_frame, textvariable=self.report_summary_var, justify='left', wraplength=800).pack(anchor='w')
+        
+        # Configure grid weights
+        self.settings_frame.columnconfigure(1, weight=1)
+        
+    def update_cache_info(self):
+        # Only shown on the Settings tab, so skipped until that is built
+        if self.tab_builders[2] is not None:
+            return
+        count, size = self.audio_cache.info()
+        image_count, image_size = self.image_cache.info()
+        self.cache_info_var.set(f"{count} encoded file(s), {format_size(size)}; {image_count} image(s), {format_size(image_size)}")
+        
+    def clear_audio_cache(self):
+        if self.generation is not None:
+            messagebox.showinfo("Clear Cache", "The cache is in use by the running generation.")
+            return
+        if not messagebox.askyesno("Clear Cache", "Remove all cached audio and images? They will be encoded and downloaded again on the next generation."):
+            return
+        self.audio_cache.clear()
+        self.image_cache.clear()
+        self.update_cache_info()
+        
+    def browse_output(self):
+        filename = filedialog.asksaveasfilename(
+            title="Save HTML File",
+            defaultextension=".html",
+            filetypes=[("HTML files", "*.html"), ("All files", "*.*")]
+        )
+        if filename:
+            self.output_file_var.set(filename)
+            
+    def browse_template(self):
+        filename = filedialog.askopenfilename(
+            title="Select Page Template",
+            filetypes=[("HTML files", "*.html *.htm"), ("All files", "*.*")]
+        )
+        if filename:
+            self.template_var.set(filename)
+            
+    def new_config(self):
+        # Start over with one empty card and question
+        self.apply_quiz(Quiz([Card()], [Question()]))
+        self.reset_autosave()
+        
+    def load_config(self):
+        filename = filedialog.askopenfilename(
+            title="Load Configuration",
+            filetypes=[("Quiz files", "*.json *" + PACK_EXTENSION), ("JSON files", "*.json"),
+                       ("Project bundles", "*" + PACK_EXTENSION), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        self.open_config(filename)
+
+    def open_config(self, filename):
+        """ Load a configuration or project bundle into the editor """
+        try:
+            quiz = load_quiz_file(filename)
+                
+            self.apply_quiz(quiz)
+            self.reset_autosave()
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
+            
+    def import_bank_files(self):
+        if self.generation is not None:
+            messagebox.showinfo("Import", "Please wait until the running generation finishes.")
+            return
+        filenames = filedialog.askopenfilenames(
+            title="Import Card and Question Banks",
+            filetypes=[("CSV and JSONL files", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")]
+        )
+        if not filenames:
+            return
+            
+        # Selection options for the rows of the banks
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Import Banks")
+        dialog.transient(self.root)
+        frame = ttk.Frame(dialog, padding=10)
+        frame.pack(fill='both', expand=True)
+        sample_var = tk.StringVar()
+        where_var = tk.StringVar()
+        kind_var = tk.StringVar(value="auto")
+        ttk.Label(frame, text=f"{len(filenames)} file(s) selected").grid(row=0, column=0, columnspan=2, sticky='w', pady=5)
+        ttk.Label(frame, text="Random cards and questions to pick (empty for all):").grid(row=1, column=0, sticky='w', pady=5)
+        ttk.Entry(frame, width=10, textvariable=sample_var).grid(row=1, column=1, sticky='w', pady=5, padx=5)
+        ttk.Label(frame, text="Only rows where (COLUMN=VALUE, ...):").grid(row=2, column=0, sticky='w', pady=5)
+        ttk.Entry(frame, width=30, textvariable=where_var).grid(row=2, column=1, sticky='w', pady=5, padx=5)
+        ttk.Label(frame, text="Rows are:").grid(row=3, column=0, sticky='nw', pady=5)
+        kind_frame = ttk.Frame(frame)
+        kind_frame.grid(row=3, column=1, sticky='w', pady=5, padx=5)
+        for value, text in (("auto", "Questions if they have question text, otherwise cards"), ("cards", "Cards"), ("questions", "Questions")):
+            ttk.Radiobutton(kind_frame, text=text, variable=kind_var, value=value).pack(anchor='w')
+        ttk.Button(frame, text="Import", command=lambda: self.run_import(
+            dialog, filenames, sample_var.get(), where_var.get(), kind_var.get())).grid(row=4, column=1, sticky='e', pady=10)
+        
+    def run_import(self, dialog, filenames, sample_text, where_text, kind):
+        try:
+            sample = int(sample_text) if sample_text.strip() else None
+            where = parse_pairs([pair for pair in where_text.split(",") if pair.strip()], "a filter")
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid import options: {e}")
+            return
+        dialog.destroy()
+        
+        if self.progress_frame is None:
+            self.setup_progress_bar()
+        self.cancel_button.configure(state="disabled")
+        self.progress_var.set(0)
+        self.progress_frame.pack(side='bottom', fill='x', before=self.notebook)
+        def progress(path, bytes_read, bytes_total, rows_read):
+            self.progress_var.set(bytes_read / bytes_total if bytes_total else 1.0)
+            self.progress_text_var.set(f"Reading {os.path.basename(path)}: {rows_read} row(s)")
+            self.root.update_idletasks()
+        try:
+            cards, questions, stats = import_bank(filenames, kind=kind, where=where, sample=sample, progress=progress)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to import: {e}")
+            return
+        finally:
+            self.progress_frame.pack_forget()
+            
+        # An untouched starting card or question makes way for the imported ones
+        if cards and [card.to_config() for card in self.animals] == [Card().to_config()]:
+            self.animals.clear()
+        if questions and [question.to_config() for question in self.questions] == [Question().to_config()]:
+            self.questions.clear()
+        self.animals.extend(cards)
+        self.questions.extend(questions)
+        if self.animals_list is not None:
+            self.animals_list.relayout()
+        if self.questions_list is not None:
+            self.questions_list.relayout()
+        # A whole import is kept as a new snapshot rather than an edit per item
+        self.reset_autosave(dirty=True)
+        message = (f"Read {stats['rows']} row(s) and imported {len(cards)} of {stats['matched_cards']} matching card(s) "
+                   f"and {len(questions)} of {stats['matched_questions']} matching question(s).")
+        if stats['rejected']:
+            message += f"\n\nRejected {stats['rejected']} row(s):\n" + "\n".join(stats['rejected_rows'])
+        messagebox.showinfo("Import", message)
+            
+    def apply_quiz(self, quiz):
+        self.autosave_paused = True
+        try:
+            self.show_quiz(quiz)
+        finally:
+            self.autosave_paused = False
+
+    def show_quiz(self, quiz):
+        # The model is complete before the editors are laid out once
+        self.animals = quiz.cards
+        self.questions = quiz.questions
+        if self.animals_list is not None:
+            self.animals_list.set_items(self.animals)
+        if self.questions_list is not None:
+            self.questions_list.set_items(self.questions)
+        
+        # Load settings
+        self.animals_per_row_var.set(str(quiz.animals_per_row))
+        self.output_file_var.set(quiz.output_file)
+        self.output_mode_var.set(quiz.output_mode)
+        self.localize_images_var.set(quiz.localize_images)
+        self.write_report_var.set(quiz.write_report)
+        self.precompress_var.set(quiz.precompress)
+        self.template_var.set(quiz.template)
+        self.lazy_page_var.set(quiz.lazy_page)
+        self.data_page_var.set(quiz.data_page)
+        self.offline_var.set(quiz.offline)
+            
+    def collect_quiz(self):
+        # Cards and questions are kept up to date by the editor rows; only the settings are read here
+        return Quiz(
+            self.animals,
+            self.questions,
+            animals_per_row=int(self.animals_per_row_var.get()),
+            output_file=self.output_file_var.get(),
+            output_mode=self.output_mode_var.get(),
+            localize_images=self.localize_images_var.get(),
+            write_report=self.write_report_var.get(),
+            precompress=self.precompress_var.get(),
+            template=self.template_var.get().strip(),
+            lazy_page=self.lazy_page_var.get(),
+            data_page=self.data_page_var.get(),
+            offline=self.offline_var.get()
+        )
+        
+    def save_config(self):
+        filename = filedialog.asksaveasfilename(
+            title="Save Configuration",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("Project bundles", "*" + PACK_EXTENSION), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+            
+        try:
+            # A bundle also stores the cards' audio
+            quiz = self.collect_quiz()
+            save_quiz_file(quiz, filename, self.audio_cache)
+            self.reset_autosave(quiz)
+                
+            messagebox.showinfo("Success", "Configuration saved successfully!")
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
+            
+    def start_autosave(self):
+        # Work left unsaved by an editor that crashed comes back as it was
+        quiz = self.autosave.recover()
+        if quiz is None:
+            # The starting quiz is written once the window is up
+            self.root.after_idle(self.reset_autosave)
+            return
+        self.apply_quiz(quiz)
+        self.reset_autosave(dirty=True)
+        self.root.after_idle(lambda: messagebox.showinfo(
+            "Autosave", "Unsaved work from an earlier session was recovered. Save it to keep it in a file."))
+
+    def autosave_quiz(self):
+        # The quiz as edited so far; a half-typed cards per row value counts as the default
+        settings = {name: var.get() for name, var in self.setting_vars.items()}
+        try:
+            settings['animals_per_row'] = int(settings['animals_per_row'])
+        except ValueError:
+            settings['animals_per_row'] = Quiz.SETTINGS['animals_per_row']
+        settings['template'] = settings['template'].strip()
+        return Quiz(self.animals, self.questions, **settings)
+
+    def record_edit(self, entry):
+        if self.autosave_paused:
+            return
+        self.autosave.record(entry)
+        # Written after a moment without edits, or regularly while they go on
+        if self.autosave_after is not None:
+            self.root.after_cancel(self.autosave_after)
+        delay = max(0.0, min(AUTOSAVE_DELAY, AUTOSAVE_MAX_DELAY - self.autosave.pending_age()))
+        self.autosave_after = self.root.after(int(delay * 1000), self.flush_autosave)
+
+    def flush_autosave(self):
+        self.autosave_after = None
+        try:
+            self.autosave.flush(self.autosave_quiz)
+        except OSError as e:
+            # Editing goes on; the next autosave tries again
+            self.autosave_failed(e)
+        else:
+            self.autosave_error = None
+
+    def reset_autosave(self, quiz=None, dirty=False):
+        if self.autosave_after is not None:
+            self.root.after_cancel(self.autosave_after)
+            self.autosave_after = None
+        try:
+            self.autosave.reset(quiz or self.autosave_quiz(), dirty)
+        except OSError as e:
+            self.autosave_failed(e)
+        else:
+            self.autosave_error = None
+
+    def autosave_failed(self, error):
+        if self.autosave_error is None:
+            messagebox.showwarning("Autosave", f"Autosave failed: {error}\n\nYour edits are still in the editor. "
+                                               "Save them to a file to keep them safe.")
+        self.autosave_error = error
+
+    def exit(self):
+        if self.generation is not None:
+            if not messagebox.askyesno("Quit", "A page is being generated. Stop it and quit? The previous output file is left unchanged."):
+                return
+            # The worker removes its temporary file when it sees the cancel; one stuck
+            # in a download is cut short when the process ends, so remove it here too
+            self.generation['cancel'].set()
+            self.generation['thread'].join(GENERATION_EXIT_TIMEOUT)
+            try:
+                os.remove(self.generation['temp_file'])
+            except OSError:
+                pass
+        # Edits still waiting are written; unsaved work is recovered on the next start
+        if self.autosave_after is not None:
+            self.root.after_cancel(self.autosave_after)
+        self.flush_autosave()
+        self.autosave.close()
+        self.root.quit()
+
+    def generate_html(self):
+        # Only one generation at a time; the menu entry is disabled meanwhile
+        if self.generation is not None:
+            return
+        try:
+            # The worker renders a copy, so editing can go on while it runs
+            quiz = Quiz.from_config(self.collect_quiz().to_config())
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to generate HTML: {str(e)}")
+            return
+            
+        if self.successAudioEncodedString is None:
+            # Encoded (or read from the audio cache) on first use rather than at startup
+            self.successAudioEncodedString = ""
+            try:
+                self.successAudioEncodedString = load_success_audio(self.audio_cache)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load success audio: {str(e)}")
+        if self.progress_frame is None:
+            self.setup_progress_bar()
+            
+        self.generation = {
+            'events': queue.Queue(),
+            'cancel': threading.Event(),
+            'start': time.perf_counter(),
+            'profile': self.profile_var.get(),
+            'temp_file': resolve_output(quiz.output_file, quiz.output_mode)[0] + f".{os.getpid()}.tmp",
+        }
+        self.file_menu.entryconfigure("Generate HTML", state="disabled")
+        self.progress_var.set(0)
+        self.progress_text_var.set("Preparing...")
+        self.cancel_button.configure(state="normal")
+        self.progress_frame.pack(side='bottom', fill='x', before=self.notebook)
+        
+        self.generation['thread'] = threading.Thread(target=self.run_generation, args=(quiz, self.generation), daemon=True)
+        self.generation['thread'].start()
+        self.root.after(100, self.poll_generation)
+        
+    def run_generation(self, quiz, generation):
+        # Runs on the worker thread; results go back to the UI through the queue
+        events = generation['events']
+        def progress(*counts):
+            events.put(('progress', counts))
+        try:
+            stats = generate(quiz, quiz.output_file, self.successAudioEncodedString, self.audio_cache,
+                             image_cache=self.image_cache, fragment_cache=self.fragment_cache,
+                             progress=progress, cancel=generation['cancel'], profile=generation['profile'])
+            events.put(('done', stats))
+        except GenerationCancelled:
+            events.put(('cancelled', None))
+        except Exception as e:
+            events.put(('error', str(e)))
+            
+    def cancel_generation(self):
+        if self.generation is not None:
+            self.generation['cancel'].set()
+            self.cancel_button.configure(state="disabled")
+            self.progress_text_var.set("Cancelling...")
+            
+    def poll_generation(self):
+        generation = self.generation
+        result = None
+        while result is None:
+            try:
+                kind, value = generation['events'].get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.show_progress(generation, *value)
+            else:
+                result = (kind, value)
+        if result is None:
+            self.root.after(100, self.poll_generation)
+            return
+            
+        self.generation = None
+        self.progress_frame.pack_forget()
+        self.file_menu.entryconfigure("Generate HTML", state="normal")
+        kind, value = result
+        if kind == 'cancelled':
+            messagebox.showinfo("Cancelled", "Generation cancelled. The previous output file was left unchanged.")
+        elif kind == 'error':
+            messagebox.showerror("Error", f"Failed to generate HTML: {value}")
+        else:
+            self.generation_finished(value)
+            
+    def show_progress(self, generation, bytes_written, bytes_total, files_encoded, files_total):
+        if generation['cancel'].is_set():
+            return
+        fraction = bytes_written / bytes_total if bytes_total else 1.0
+        self.progress_var.set(fraction)
+        text = f"Encoded {files_encoded} of {files_total} file(s), {format_size(bytes_written)} of {format_size(bytes_total)}"
+        # Estimate the time left from the rate since writing started
+        generation.setdefault('write_start', (time.perf_counter(), bytes_written))
+        write_start, start_bytes = generation['write_start']
+        elapsed = time.perf_counter() - write_start
+        if bytes_written > start_bytes and elapsed > 0.5 and fraction < 1:
+            remaining = (bytes_total - bytes_written) * elapsed / (bytes_written - start_bytes)
+            text += f", about {int(remaining) + 1}s left"
+        self.progress_text_var.set(text)
+        
+    def generation_finished(self, stats):
+        self.audio_cache.trim()
+        self.image_cache.trim()
+        self.update_cache_info()
+        self.report_summary_var.set(format_report_summary(stats['report']))
+        if stats['unchanged']:
+            message = f"Nothing changed since the last generation.\n{stats['html_file']} is up to date."
+        else:
+            message = f"HTML file generated successfully!\nSaved as: {stats['html_file']}"
+        if stats['duplicate_audio']:
+            message += f"\n{stats['duplicate_audio']} repeated audio clip(s) embedded once, saving {format_size(stats['dedup_saved_bytes'])}"
+        if stats.get('images'):
+            message += f"\n{stats['images'] - stats['images_failed']} of {stats['images']} image(s) stored with the game"
+            if stats['image_bytes_saved']:
+                message += f", {format_size(stats['image_bytes_saved'])} saved by resizing"
+            for url, error in stats['image_errors'].items():
+                message += f"\n  {url}: {error}"
+        for path in [stats.get('report_file')] + stats.get('profile_files', []):
+            if path:
+                message += f"\nSaved {path}"
+        for path in stats['precompressed_files']:
+            message += f"\nSaved {path} ({format_size(os.path.getsize(path))})"
+        messagebox.showinfo("Success", message)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Learning Game Generator. Run without arguments to open the editor.")
+    parser.add_argument("--startup-report", nargs="?", const="-", metavar="FILE",
+                        help="report how long the editor took to show its window and become usable, on standard output or as a JSON line appended to FILE")
+    subparsers = parser.add_subparsers(dest="command")
+
+    build_parser = subparsers.add_parser("build", help="render saved configurations to HTML without the GUI")
+    build_parser.add_argument("configs", nargs="+", help="config files, directories of configs or glob patterns")
+    build_parser.add_argument("-o", "--output-dir", help="directory for the generated pages (default: next to each config)")
+    build_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes (default: CPU count)")
+    build_parser.add_argument("--mode", choices=["single", "folder", "compressed", "site"],
+                              help="output mode for every config; site writes all pages into one folder (-o, default ./site) "
+                                   "with shared assets and an index page (default: each config's own setting)")
+    build_parser.add_argument("--localize-images", action="store_true", help="download images and store them with every page")
+    build_parser.add_argument("--no-cache", action="store_true", help="encode all audio again instead of using the audio cache")
+    build_parser.add_argument("--cache-size", type=int, metavar="MB", help="size cap of the audio cache (default: 1024)")
+    build_parser.add_argument("--report", action="store_true", help="save a JSON report of time per phase and bytes per card and question next to every page")
+    build_parser.add_argument("--profile", action="store_true", help="save cProfile and tracemalloc captures of every build next to its page")
+    build_parser.add_argument("--template", metavar="FILE", help="page template for every config (default: each config's own setting)")
+    build_parser.add_argument("--lazy", action="store_true", help="write pages that show cards and questions as they scroll into view")
+    build_parser.add_argument("--data", action="store_true", help="write cards and questions as a JSON data island that the page renders")
+    build_parser.add_argument("--offline", action="store_true", help="also write a service worker that keeps each game and its images for offline use")
+    build_parser.add_argument("--precompress", action="store_true", help="also write .gz (and .br with the brotli module) copies of every page for web servers")
+
+    watch_parser = subparsers.add_parser("watch", help="regenerate a configuration's page whenever it or its audio files change")
+    watch_parser.add_argument("config", help="config file to watch")
+    watch_parser.add_argument("-o", "--output", help="page to write (default: next to the config)")
+    watch_parser.add_argument("--mode", choices=["single", "folder", "compressed"], help="output mode (default: the config's own setting)")
+    watch_parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help=f"seconds between checks (default: {WATCH_INTERVAL})")
+
+    import_parser = subparsers.add_parser("import", help="make a configuration from CSV or JSONL card and question banks")
+    import_parser.add_argument("banks", nargs="+", help="CSV or JSONL (.jsonl, .ndjson) files with one card or question per row")
+    import_parser.add_argument("-o", "--output", required=True, help="configuration file to write")
+    import_parser.add_argument("--map", action="append", metavar="FIELD=COLUMN",
+                               help="column of a field (image_url, title, word, audio, text, answers, correct_index); "
+                                    "answers may name several columns separated by commas (default: columns named like the fields)")
+    import_parser.add_argument("--kind", choices=["auto", "cards", "questions"], default="auto",
+                               help="what the rows are (default: questions when they have question text, otherwise cards)")
+    import_parser.add_argument("--where", action="append", metavar="COLUMN=VALUE", help="import only rows with this value (repeatable)")
+    import_parser.add_argument("--limit", type=int, metavar="N", help="import only the first N cards and the first N questions")
+    import_parser.add_argument("--sample", type=int, metavar="N", help="import N random cards and N random questions")
+    import_parser.add_argument("--seed", type=int, help="seed of the random sample, to repeat it")
+    import_parser.add_argument("--base", metavar="CONFIG", help="configuration whose settings, cards and questions the import adds to")
+    import_parser.add_argument("--build", action="store_true", help="also render the configuration's page")
+
+    variants_parser = subparsers.add_parser("variants", help="render variants of a configuration with shuffled questions and answers, and their answer key")
+    variants_parser.add_argument("config", help="config file to make variants of")
+    variants_parser.add_argument("--seeds", required=True, help="seeds of the variants, one variant each, such as 1-30 or 1,5,10-12")
+    variants_parser.add_argument("-o", "--output-dir", help="directory for the variants (default: next to the config)")
+    variants_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes (default: CPU count)")
+    variants_parser.add_argument("--mode", choices=["single", "folder", "compressed", "site"], help="output mode (default: the config's own setting)")
+    variants_parser.add_argument("--no-cache", action="store_true", help="keep encoded audio for this run only instead of in the audio cache")
+    variants_parser.add_argument("--offline", action="store_true", help="also write service workers that keep the variants for offline use")
+    variants_parser.add_argument("--key", metavar="FILE", help="answer key to write (default: <config>.answer_key.json next to the variants)")
+
+    template_parser = subparsers.add_parser("template", help="write the built-in page template, as a starting point for a custom one")
+    template_parser.add_argument("output", nargs="?", help="file to write (default: standard output)")
+    template_parser.add_argument("--page", choices=list(BUILTIN_TEMPLATES), default="default", help="built-in template to write: default, lazy or data (default: default)")
+
+    pack_parser = subparsers.add_parser("pack", help="save a configuration and its audio files as a single project bundle")
+    pack_parser.add_argument("config", help="config file to pack")
+    pack_parser.add_argument("-o", "--output", help=f"bundle to write (default: next to the config, with the {PACK_EXTENSION} extension)")
+
+    cache_parser = subparsers.add_parser("cache", help="inspect or clear the audio and image caches")
+    cache_parser.add_argument("action", choices=["info", "clear"], nargs="?", default="info")
+
+    return parser.parse_args(argv)
+
+def report_startup(root, destination, times):
+    """ Add the window and interactive times to times once the editor is up, and report them.
+
+    Times are seconds since the script started. The window time is when the
+    main window is first mapped; the editor is interactive at the first idle
+    moment after that, when the first tab has been built.
+    """
+    def on_map(event):
+        if event.widget is root and 'window' not in times:
+            times['window'] = time.perf_counter() - STARTUP_TIME
+            root.after_idle(lambda: root.after_idle(on_interactive))
+
+    def on_interactive():
+        times['interactive'] = time.perf_counter() - STARTUP_TIME
+        if destination == "-":
+            print("Startup: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in times.items()), flush=True)
+        else:
+            with open(destination, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(dict(times, time=time.time(), frozen=bool(getattr(sys, 'frozen', False)))) + "\n")
+
+    root.bind("<Map>", on_map, add="+")
+
+def run_gui(startup_report=None):
+    times = {'imports': time.perf_counter() - STARTUP_TIME}
+    load_tk()
+    root = tk.Tk()
+    app = AnimalLearningGameGenerator(root)
+    times['setup'] = time.perf_counter() - STARTUP_TIME
+    if startup_report:
+        report_startup(root, startup_report, times)
+    root.mainloop()
+    return 0
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "build":
+        cache_size = args.cache_size * 1024 * 1024 if args.cache_size else None
+        return build_configs(args.configs, args.output_dir, args.jobs, not args.no_cache, cache_size, args.mode, args.localize_images,
+                             args.report, args.profile, args.precompress, args.template, args.lazy, args.data, args.offline)
+    if args.command == "watch":
+        return watch_config(args.config, args.output, args.mode, args.interval)
+    if args.command == "import":
+        try:
+            mapping = parse_pairs(args.map, "a column mapping")
+            where = parse_pairs(args.where, "a filter")
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        return import_banks(args.banks, args.output, mapping, args.kind, where, args.limit, args.sample, args.seed, args.base, args.build)
+    if args.command == "variants":
+        try:
+            seeds = parse_seeds(args.seeds)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        return build_variants(args.config, seeds, args.output_dir, args.jobs, not args.no_cache, args.mode, args.offline, args.key)
+    if args.command == "template":
+        return export_template(args.output, args.page)
+    if args.command == "pack":
+        return pack_config(args.config, args.output)
+    if args.command == "cache":
+        return manage_cache(args.action)
+    return run_gui(args.startup_report)
+
+if __name__ == "__main__":
+    # Needed for the process pool in PyInstaller builds
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(main())
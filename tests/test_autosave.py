@@ -0,0 +1,118 @@
+""" The editor's autosave journal: appends, compaction, crash recovery and session locks """
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+
+def start_session(root):
+    """ A journal that has written its starting quiz, as the editor does when it opens """
+    journal = generator.AutosaveJournal(str(root))
+    quiz = generator.Quiz([generator.Card("", "Cat", "cat")], [generator.Question("", "Which one?", ["Cat", "Dog"], 0)])
+    journal.reset(quiz)
+    return journal, quiz
+
+
+def edit(journal, quiz, entry):
+    """ Make an edit on quiz and queue it, as the editor does """
+    generator.apply_autosave_entry(quiz, entry)
+    journal.record(entry)
+
+
+def crash(journal):
+    # The operating system drops the lock of a process that dies
+    journal.lock_file.close()
+
+
+def journal_entries(journal):
+    with open(journal.journal_path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_flush_appends_coalesced_edits(tmp_path):
+    journal, quiz = start_session(tmp_path)
+    for value in ("C", "Ca", "Cat!"):
+        edit(journal, quiz, {'op': 'set', 'kind': 'card', 'index': 0, 'field': 'title', 'value': value})
+    edit(journal, quiz, {'op': 'insert', 'kind': 'card', 'index': 1})
+    assert journal_entries(journal) == []
+
+    journal.flush(lambda: quiz)
+
+    entries = journal_entries(journal)
+    # Typing in one field writes one entry
+    assert [entry['op'] for entry in entries] == ['set', 'insert']
+    assert entries[0]['value'] == "Cat!"
+    assert [entry['seq'] for entry in entries] == [1, 2]
+    assert journal.pending == []
+
+
+def test_journal_is_compacted_into_a_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(generator, 'AUTOSAVE_COMPACT_ENTRIES', 3)
+    journal, quiz = start_session(tmp_path)
+    for i in range(3):
+        edit(journal, quiz, {'op': 'insert', 'kind': 'card', 'index': i + 1})
+        journal.flush(lambda: quiz)
+
+    assert journal_entries(journal) == []
+    with open(journal.snapshot_path, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert snapshot['sequence'] == 3
+    assert len(snapshot['quiz']['animals']) == 4
+
+
+def test_crashed_session_is_recovered(tmp_path):
+    journal, quiz = start_session(tmp_path)
+    edit(journal, quiz, {'op': 'set', 'kind': 'question', 'index': 0, 'field': 'text', 'value': "Which one barks?"})
+    edit(journal, quiz, {'op': 'correct', 'index': 0, 'value': 1})
+    edit(journal, quiz, {'op': 'setting', 'name': 'animals_per_row', 'value': 4})
+    journal.flush(lambda: quiz)
+    # A line cut short by the crash is ignored
+    with open(journal.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"delete","kind":"ca')
+    crash(journal)
+
+    recovering = generator.AutosaveJournal(str(tmp_path))
+    recovered = recovering.recover()
+
+    assert recovered.to_config() == quiz.to_config()
+    assert recovering.dirty
+    # The work now lives in the new session only
+    assert os.listdir(tmp_path) == [os.path.basename(recovering.directory)]
+    assert generator.read_autosave_session(recovering.directory)[0].to_config() == quiz.to_config()
+    # Should the recovering editor crash as well, the work is still there
+    crash(recovering)
+    assert generator.AutosaveJournal(str(tmp_path)).recover().to_config() == quiz.to_config()
+
+
+def test_session_without_unsaved_work_is_not_recovered(tmp_path):
+    journal, quiz = start_session(tmp_path)
+    crash(journal)
+    assert generator.AutosaveJournal(str(tmp_path)).recover() is None
+    assert not os.path.exists(journal.directory)
+
+
+def test_running_session_is_left_alone(tmp_path):
+    journal, quiz = start_session(tmp_path)
+    edit(journal, quiz, {'op': 'insert', 'kind': 'card', 'index': 1})
+    journal.flush(lambda: quiz)
+
+    assert generator.AutosaveJournal(str(tmp_path)).recover() is None
+    assert os.path.exists(journal.journal_path)
+    with pytest.raises(OSError):
+        generator.lock_session(journal.directory).close()
+
+
+def test_close_keeps_only_unsaved_work(tmp_path):
+    saved, quiz = start_session(tmp_path)
+    saved.close()
+    assert not os.path.exists(saved.directory)
+
+    unsaved, quiz = start_session(tmp_path)
+    edit(unsaved, quiz, {'op': 'insert', 'kind': 'card', 'index': 1})
+    unsaved.flush(lambda: quiz)
+    unsaved.close()
+    assert generator.AutosaveJournal(str(tmp_path)).recover().to_config() == quiz.to_config()
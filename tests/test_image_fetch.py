@@ -0,0 +1,112 @@
+""" Image downloads through a local HTTP server: revalidation, cache reuse and failures """
+import base64
+import http.server
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+# Not a real PNG, so the image is stored as it was downloaded
+IMAGE_BODY = b"\x89PNG\r\n\x1a\nnot really an image"
+IMAGE_ETAG = '"v1"'
+
+
+class ImageHandler(http.server.BaseHTTPRequestHandler):
+    """ Serves /cat.png (always revalidated) and /fresh.png (fresh for an hour); anything else is a 404 """
+    def do_GET(self):
+        if self.path not in ("/cat.png", "/fresh.png"):
+            status = 404
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == IMAGE_ETAG:
+            status = 304
+            self.send_response(status)
+            self.send_header('ETag', IMAGE_ETAG)
+            self.end_headers()
+        else:
+            status = 200
+            self.send_response(status)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(IMAGE_BODY)))
+            self.send_header('ETag', IMAGE_ETAG)
+            self.send_header('Last-Modified', 'Mon, 01 Jan 2024 00:00:00 GMT')
+            self.send_header('Cache-Control', 'max-age=3600' if self.path == "/fresh.png" else 'no-cache')
+            self.end_headers()
+            self.wfile.write(IMAGE_BODY)
+        self.server.requests.append((self.path, status))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def image_url(server, name):
+    return f"http://127.0.0.1:{server.server_address[1]}/{name}"
+
+
+def build(tmp_path, image_cache, *urls):
+    quiz = generator.Quiz([generator.Card(url, f"Card {i}", "word") for i, url in enumerate(urls)], localize_images=True)
+    output_file = str(tmp_path / "game.html")
+    stats = generator.generate(quiz, output_file, output_mode='single', image_cache=image_cache)
+    with open(output_file, encoding='utf-8') as f:
+        return stats, f.read()
+
+
+def test_rebuild_revalidates_with_304(tmp_path, server):
+    image_cache = generator.ImageCache(str(tmp_path / "cache"))
+    url = image_url(server, "cat.png")
+
+    build(tmp_path, image_cache, url)
+    build(tmp_path, image_cache, url)
+
+    assert server.requests == [("/cat.png", 200), ("/cat.png", 304)]
+
+
+def test_cached_bytes_are_reused(tmp_path, server):
+    image_cache = generator.ImageCache(str(tmp_path / "cache"))
+    embedded = base64.b64encode(IMAGE_BODY).decode('ascii')
+
+    # A 304 keeps the body downloaded the first time
+    stats, page = build(tmp_path, image_cache, image_url(server, "cat.png"))
+    body_path = image_cache.load(image_url(server, "cat.png"))['path']
+    modified = os.stat(body_path).st_mtime_ns
+    stats, page = build(tmp_path, image_cache, image_url(server, "cat.png"))
+    assert embedded in page
+    assert os.stat(body_path).st_mtime_ns == modified
+
+    # A fresh entry is used without asking the server at all
+    build(tmp_path, image_cache, image_url(server, "fresh.png"))
+    requests = len(server.requests)
+    stats, page = build(tmp_path, image_cache, image_url(server, "fresh.png"))
+    assert len(server.requests) == requests
+    assert stats['images_from_cache'] == 1
+    assert embedded in page
+
+
+def test_missing_image_is_reported_without_aborting(tmp_path, server):
+    image_cache = generator.ImageCache(str(tmp_path / "cache"))
+    missing = image_url(server, "missing.png")
+
+    stats, page = build(tmp_path, image_cache, image_url(server, "cat.png"), missing)
+
+    assert stats['images'] == 2
+    assert stats['images_failed'] == 1
+    assert "404" in stats['image_errors'][missing]
+    # The missing image stays a remote link; the other one is embedded
+    assert missing in page
+    assert base64.b64encode(IMAGE_BODY).decode('ascii') in page
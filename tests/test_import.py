@@ -0,0 +1,103 @@
+""" Importing cards and questions from CSV and JSONL banks """
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def write_csv(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return str(path)
+
+
+def test_jsonl_rows_with_their_own_fields(tmp_path):
+    bank = write_jsonl(tmp_path / "mixed.jsonl", [
+        {'title': "Cat", 'word': "cat", 'audio': "cat.mp3"},
+        {'question': "Which one barks?", 'choices': ["Cat", "Dog", "Cow"], 'correct_index': 1},
+        {'text': "Which one moos?", 'answers': ["Cow", "Cat"], 'correct': 0, 'image_url': "https://example.com/cow.png"},
+    ])
+
+    cards, questions, stats = generator.import_bank([bank])
+
+    assert [card.title for card in cards] == ["Cat"]
+    assert cards[0].audio == os.path.join(str(tmp_path), "cat.mp3")
+    assert [question.answers for question in questions] == [["Cat", "Dog", "Cow"], ["Cow", "Cat"]]
+    assert [question.correct_index for question in questions] == [1, 0]
+    assert questions[1].image_url == "https://example.com/cow.png"
+    assert stats['rejected'] == 0
+
+
+def test_questions_without_two_answers_are_rejected(tmp_path):
+    bank = write_jsonl(tmp_path / "broken.jsonl", [
+        {'text': "Good?", 'answers': ["Yes", "No"]},
+        {'text': "One answer?", 'answers': ["Only"]},
+        {'text': "No answers?"},
+    ])
+
+    cards, questions, stats = generator.import_bank([bank])
+
+    assert [question.text for question in questions] == ["Good?"]
+    assert stats['matched_questions'] == 1
+    assert stats['rejected'] == 2
+    assert "row 2" in stats['rejected_rows'][0] and "row 3" in stats['rejected_rows'][1]
+
+
+def test_csv_numbered_answers_filter_and_limit(tmp_path):
+    bank = write_csv(tmp_path / "bank.csv", [
+        "question,answer1,answer2,answer3,correct,level",
+        "Q1,a,b,c,2,easy",
+        "Q2,a,b,,1,hard",
+        "Q3,a,b,c,0,easy",
+        "Q4,a,b,c,1,easy",
+    ])
+
+    _, questions, stats = generator.import_bank([bank], where={'level': "easy"}, limit=2)
+
+    assert [question.text for question in questions] == ["Q1", "Q3"]
+    assert questions[0].answers == ["a", "b", "c"]
+    assert questions[0].correct_index == 2
+    assert stats['rows'] == 4
+    assert stats['matched_questions'] == 3
+
+
+def test_reservoir_sample(tmp_path):
+    bank = write_csv(tmp_path / "cards.csv", ["title,word"] + [f"Card {i},word {i}" for i in range(10)])
+    all_titles = [f"Card {i}" for i in range(10)]
+
+    cards, _, stats = generator.import_bank([bank], sample=3, seed=7)
+    titles = [card.title for card in cards]
+    assert len(titles) == 3
+    # A seed repeats its sample, which keeps bank order
+    assert titles == [card.title for card in generator.import_bank([bank], sample=3, seed=7)[0]]
+    assert titles == sorted(titles, key=all_titles.index)
+    assert stats['matched_cards'] == 10
+
+    # Over many seeds every row is picked about equally often
+    picked = dict.fromkeys(all_titles, 0)
+    for seed in range(1000):
+        for card in generator.import_bank([bank], sample=3, seed=seed)[0]:
+            picked[card.title] += 1
+    assert all(220 < count < 380 for count in picked.values()), picked
+
+
+def test_sample_larger_than_bank_keeps_every_row(tmp_path):
+    bank = write_csv(tmp_path / "cards.csv", ["title", "A", "B"])
+    cards, _, _ = generator.import_bank([bank], sample=5, seed=1)
+    assert [card.title for card in cards] == ["A", "B"]
+
+
+def test_import_banks_reports_bad_json(tmp_path, capsys):
+    bank = tmp_path / "bad.jsonl"
+    bank.write_text('{"title": "Cat"}\n{not json\n', encoding='utf-8')
+    assert generator.import_banks([str(bank)], str(tmp_path / "out.json")) == 1
+    assert "line 2" in capsys.readouterr().err
+    assert not (tmp_path / "out.json").exists()
@@ -0,0 +1,89 @@
+""" Offline sites: the service worker's precache manifest and its version """
+import hashlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+
+@pytest.fixture
+def configs(tmp_path, monkeypatch):
+    """ Two saved configurations whose cards have local audio; returns their glob pattern """
+    monkeypatch.setenv("TESTSGENERATOR_CACHE_DIR", str(tmp_path / "cache"))
+    config_dir = tmp_path / "configs"
+    config_dir.mkdir()
+    for name in ("animals", "farm"):
+        audio = config_dir / f"{name}.mp3"
+        audio.write_bytes(f"{name} sound".encode('ascii'))
+        quiz = generator.Quiz(
+            [generator.Card("https://example.com/cat.png", "Cat", "cat", str(audio))],
+            [generator.Question("", "Which one?", ["Cat", "Dog"], 0)],
+        )
+        generator.save_quiz_file(quiz, str(config_dir / f"{name}.json"))
+    return str(config_dir / "*.json")
+
+
+def build_site(configs, site_dir):
+    assert generator.build_configs([configs], str(site_dir), jobs=1, use_cache=False, output_mode='site', offline=True) == 0
+    with open(site_dir / "precache-manifest.json", encoding='utf-8') as f:
+        return json.load(f)
+
+
+def sha256_file(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_manifest_lists_every_asset_with_its_hash(tmp_path, configs):
+    site_dir = tmp_path / "site"
+    manifest = build_site(configs, site_dir)
+
+    asset_dir = site_dir / generator.SITE_ASSET_DIR
+    assets = {
+        f"{generator.SITE_ASSET_DIR}/{path.relative_to(asset_dir).as_posix()}": path
+        for path in asset_dir.rglob("*") if path.is_file()
+    }
+    assert assets
+    listed = {url for url in manifest['entries'] if url.startswith(generator.SITE_ASSET_DIR + "/")}
+    assert listed == set(assets)
+    for url, path in assets.items():
+        assert manifest['entries'][url] == sha256_file(path)[:16]
+
+    for page in ("animals.html", "farm.html", generator.SITE_INDEX):
+        assert manifest['entries'][page] == sha256_file(site_dir / page)[:16]
+    assert manifest['remote'] == ["https://example.com/cat.png"]
+    # The script carries the same manifest
+    assert manifest['version'] in (site_dir / "sw.js").read_text(encoding='utf-8')
+
+
+def test_version_changes_when_an_asset_changes(tmp_path, configs):
+    site_dir = tmp_path / "site"
+    first = build_site(configs, site_dir)
+    assert build_site(configs, site_dir)['version'] == first['version']
+
+    (tmp_path / "configs" / "farm.mp3").write_bytes(b"a new farm sound")
+    second = build_site(configs, site_dir)
+
+    assert second['version'] != first['version']
+    changed = set(second['entries'].items()) ^ set(first['entries'].items())
+    assert any(url.startswith(generator.SITE_ASSET_DIR + "/audio/") for url, _ in changed)
+    assert second['version'] in (site_dir / "sw.js").read_text(encoding='utf-8')
+
+
+def test_failed_asset_write_leaves_no_temporary_file(tmp_path, configs, monkeypatch):
+    def copy_source(source, path):
+        with open(path, 'wb') as f:
+            f.write(b"part of a clip")
+        raise OSError("disk full")
+    monkeypatch.setattr(generator, "copy_source", copy_source)
+
+    site_dir = tmp_path / "site"
+    assert generator.build_configs([configs], str(site_dir), jobs=1, use_cache=False, output_mode='site', offline=True) != 0
+
+    audio_dir = site_dir / generator.SITE_ASSET_DIR / "audio"
+    assert audio_dir.is_dir()
+    assert list(audio_dir.iterdir()) == []
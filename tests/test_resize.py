@@ -0,0 +1,68 @@
+""" Downscaling fetched images to their display size, and the cache of resized copies """
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+Image = pytest.importorskip("PIL.Image")
+
+CARD_URL = "https://example.com/cat.png"
+QUESTION_URL = "https://example.com/dog.png"
+
+
+def png(width, height):
+    image = Image.effect_noise((width, height), 40).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def fetched(tmp_path):
+    image_cache = generator.ImageCache(str(tmp_path / "cache"))
+    images = {
+        url: image_cache.store(url, {'url': url, 'content_type': 'image/png'}, png(1200, 800))
+        for url in (CARD_URL, QUESTION_URL)
+    }
+    return image_cache, images
+
+
+def prepare(image_cache, images):
+    quiz = generator.Quiz([generator.Card(CARD_URL, "Cat", "cat")], [generator.Question(QUESTION_URL, "Which one?", ["Cat", "Dog"], 0)])
+    return generator.prepare_images(quiz, images, image_cache)
+
+
+def test_images_are_resized_to_their_display_size(fetched):
+    image_cache, images = fetched
+    prepared, saved = prepare(image_cache, images)
+
+    card_width, card_height = generator.IMAGE_DISPLAY_SIZES['card']
+    question_width = generator.IMAGE_DISPLAY_SIZES['question'][0]
+    density = generator.IMAGE_DENSITY
+    with Image.open(prepared[('card', CARD_URL)]['path']) as card:
+        # Covers the card box: the shorter side fits
+        assert card.height == card_height * density
+        assert card.width == card.height * 3 // 2
+    with Image.open(prepared[('question', QUESTION_URL)]['path']) as question:
+        assert question.size == (question_width * density, question_width * density * 2 // 3)
+
+    original = sum(image['size'] for image in images.values())
+    assert saved == original - sum(image['size'] for image in prepared.values())
+    assert saved > 0
+
+
+def test_second_build_uses_the_resized_cache(fetched, monkeypatch):
+    image_cache, images = fetched
+    first, saved = prepare(image_cache, images)
+
+    # A cache hit neither decodes the source nor hashes the copy again
+    monkeypatch.setattr(Image, 'open', lambda *args, **kwargs: pytest.fail("image decoded again"))
+    monkeypatch.setattr(generator, 'hash_file', lambda path: pytest.fail("resized image hashed again"))
+    second, saved_again = prepare(image_cache, images)
+
+    assert second == first
+    assert saved_again == saved
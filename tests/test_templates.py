@@ -0,0 +1,69 @@
+""" Custom page templates and the kinds of page they can be used for """
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+
+def export(tmp_path, page):
+    path = str(tmp_path / f"{page}.html")
+    assert generator.export_template(path, page) == 0
+    return path
+
+
+def quiz(template, **settings):
+    return generator.Quiz(
+        [generator.Card("", "Cat", "cat")],
+        [generator.Question("", "Which one?", ["Cat", "Dog"], 1)],
+        template=template, **settings
+    )
+
+
+def test_lazy_page_needs_a_lazy_template(tmp_path):
+    template = export(tmp_path, 'default')
+    with pytest.raises(ValueError, match="cannot be used for lazy pages"):
+        generator.generate(quiz(template, lazy_page=True), str(tmp_path / "game.html"))
+    assert not (tmp_path / "game.html").exists()
+
+    # The same file still works for ordinary pages
+    generator.generate(quiz(template), str(tmp_path / "game.html"))
+
+
+def test_exported_lazy_template_builds_lazy_pages(tmp_path):
+    generator.generate(quiz(export(tmp_path, 'lazy'), lazy_page=True), str(tmp_path / "game.html"))
+    page = (tmp_path / "game.html").read_text(encoding='utf-8')
+    assert 'class="lazy-chunk"' in page
+    assert "mountChunk" in page
+
+
+def test_data_page_needs_the_quiz_data_slot(tmp_path):
+    template = export(tmp_path, 'lazy')
+    with pytest.raises(ValueError, match=r"cannot be used for data pages: it lacks \{\{quiz_data\}\}"):
+        generator.generate(quiz(template, data_page=True), str(tmp_path / "game.html"))
+    assert not (tmp_path / "game.html").exists()
+
+
+def test_exported_data_template_builds_data_pages(tmp_path):
+    generator.generate(quiz(export(tmp_path, 'data'), data_page=True), str(tmp_path / "game.html"))
+    page = (tmp_path / "game.html").read_text(encoding='utf-8')
+    assert '"questions":[' in page
+    assert '"Dog"' in page
+
+
+def test_relative_template_is_found_next_to_its_configuration(tmp_path, monkeypatch):
+    monkeypatch.setenv("TESTSGENERATOR_CACHE_DIR", str(tmp_path / "cache"))
+    config_dir = tmp_path / "configs"
+    config_dir.mkdir()
+    with open(export(tmp_path, 'default'), encoding='utf-8') as f:
+        template = f.read()
+    (config_dir / "custom.html").write_text(template.replace("<body>", "<body><!-- custom -->", 1), encoding='utf-8')
+    generator.save_quiz_file(quiz("custom.html"), str(config_dir / "quiz.json"))
+
+    # Built from another folder, the template still comes from the configuration's
+    monkeypatch.chdir(tmp_path)
+    assert generator.load_quiz_file(str(config_dir / "quiz.json")).template == str(config_dir / "custom.html")
+    assert generator.build_configs([str(config_dir / "quiz.json")], str(tmp_path / "out"), jobs=1, use_cache=False) == 0
+    assert "<!-- custom -->" in (tmp_path / "out" / "quiz.html").read_text(encoding='utf-8')
@@ -0,0 +1,83 @@
+""" Shuffled quiz variants: each page's correct answers and the answer key agree, and seeds repeat """
+import json
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import testGeneratorScript as generator
+
+QUESTIONS = [(f"Question {i}", [f"Q{i} answer {j}" for j in range(4)], i % 4) for i in range(6)]
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.setenv("TESTSGENERATOR_CACHE_DIR", str(tmp_path / "cache"))
+    quiz = generator.Quiz(
+        [generator.Card("", "Cat", "cat")],
+        [generator.Question("", text, list(answers), correct) for text, answers, correct in QUESTIONS],
+    )
+    path = str(tmp_path / "quiz.json")
+    generator.save_quiz_file(quiz, path)
+    return path
+
+
+def build(config, output_dir, seeds):
+    assert generator.build_variants(config, seeds, str(output_dir), jobs=1, use_cache=False) == 0
+    with open(output_dir / "quiz.answer_key.json", encoding='utf-8') as f:
+        return {variant['seed']: variant for variant in json.load(f)['variants']}
+
+
+def read_page(path):
+    """ Question texts, their answers and the correctAnswers of a default page, in page order """
+    page = path.read_text(encoding='utf-8')
+    texts = re.findall(r'<div class="question-text">(.*?)</div>', page)
+    answers = [[] for _ in texts]
+    for question, answer, text in re.findall(r'onclick="checkAnswer\((\d+), (\d+)\)">(.*?)</div>', page):
+        assert int(answer) == len(answers[int(question) - 1])
+        answers[int(question) - 1].append(text)
+    block = re.search(r"const correctAnswers = \{(.*?)\};", page, re.S).group(1)
+    correct = {int(number): int(index) for number, index in re.findall(r"(\d+): (\d+),", block)}
+    return texts, answers, [correct[i + 1] for i in range(len(texts))]
+
+
+def test_answer_key_matches_each_page(tmp_path, config):
+    variants = build(config, tmp_path / "out", [1, 2, 3])
+
+    for seed, variant in variants.items():
+        texts, answers, correct = read_page(tmp_path / "out" / variant['file'])
+        assert correct == variant['correct']
+        assert len(variant['questions']) == len(QUESTIONS)
+        for position, entry in enumerate(variant['questions']):
+            text, original_answers, original_correct = QUESTIONS[entry['question']]
+            assert texts[position] == text
+            assert answers[position] == [original_answers[j] for j in entry['answers']]
+            # The answer marked correct on the page is the original correct answer
+            assert answers[position][correct[position]] == original_answers[original_correct]
+            assert entry['correct_answer'] == original_answers[original_correct]
+        assert sorted(entry['question'] for entry in variant['questions']) == list(range(len(QUESTIONS)))
+
+
+def test_same_seed_gives_the_same_variant(tmp_path, config):
+    first = build(config, tmp_path / "first", [5, 6])
+    second = build(config, tmp_path / "second", [6])
+
+    assert second[6]['questions'] == first[6]['questions']
+    assert (tmp_path / "second" / "quiz_v6.html").read_bytes() == (tmp_path / "first" / "quiz_v6.html").read_bytes()
+    # Different seeds shuffle differently
+    assert first[5]['questions'] != first[6]['questions']
+
+
+def test_make_variant_repeats_for_a_seed(config):
+    quiz = generator.load_quiz_file(config)
+
+    variant, key = generator.make_variant(quiz, 42)
+    again, again_key = generator.make_variant(quiz, 42)
+
+    assert again.to_config() == variant.to_config()
+    assert again_key == key
+    for question, entry in zip(variant.questions, key):
+        assert question.answer_index() == entry['correct_index']
+        assert question.answers[question.answer_index()] == entry['correct_answer']